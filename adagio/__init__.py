@@ -1,3 +1,5 @@
+__version__ = '0.0.1'
+
 from adagio.layers.engine import Engine
 from adagio.layers.longonly import LongOnly
 from adagio.layers.portfolio import Portfolio
@@ -0,0 +1,229 @@
+""" Benchmark suite running on synthetic data
+
+Usage: python -m adagio.benchmarks.suite --output benchmark.json
+"""
+from argparse import ArgumentParser
+from datetime import datetime
+import json
+import logging
+import platform
+import time
+
+import numpy as np
+import pandas as pd
+
+import adagio
+from .synthetic import InMemoryArctic, populate
+from ..layers.longonly import LongOnlyQuandlFutures
+from ..layers.signal import signal_trend_ma_xover_batch
+from ..stats.performance import Performance
+from ..utils import keys
+from ..utils.cache import get_data_cache
+from ..utils.const import FuturesInfo
+from ..utils.date import (data_asfreq, date_shift,
+                          get_rebalance_mask_cache)
+from ..utils.mongo import use_store
+from ..utils.quandl import get_tickers_from_db
+from ..utils.storage import LocalStore, copy_library
+
+SIZES = (1, 10, 120)
+CHG_RULE = '+Wed-1bd+1bd'
+SIGNAL_WINDOWS = [[8, 24], [16, 48], [32, 96]]
+
+
+def make_engine(lo_tickers, **engine_params):
+    """ Return an engine which has all the layer types """
+    engine = adagio.Engine(**engine_params)
+    engine.add(adagio.LongOnly(lo_ticker=lo_tickers))
+    engine.add(adagio.VolatilityScaling(**{
+        keys.vs_chg_rule: CHG_RULE,
+        keys.vs_target_vol: 0.1,
+        keys.vs_method_params: {
+            keys.vs_method: keys.vs_rolling,
+            keys.vs_window: 63,
+        }
+    }))
+    engine.add(adagio.Signal(**{
+        keys.signal_method_params: {
+            keys.signal_method: keys.signal_trend_ma_xover,
+            keys.signal_windows: SIGNAL_WINDOWS,
+        },
+        keys.signal_chg_rule: CHG_RULE,
+        keys.signal_to_position: keys.linear,
+        keys.position_cap: 1.0,
+        keys.position_floor: -1.0
+    }))
+    engine.add(adagio.Portfolio(**{
+        keys.weighting: keys.equal_weight,
+        keys.port_weight_chg_rule: CHG_RULE,
+    }))
+    engine.add(adagio.PortVolatilityScaling(**{
+        keys.vs_chg_rule: CHG_RULE,
+        keys.vs_target_vol: 0.1,
+        keys.vs_method_params: {
+            keys.vs_method: keys.vs_rolling,
+            keys.vs_window: 63,
+        }
+    }))
+    return engine
+
+
+def measure(func, repeat, setup=None):
+    """ Return a list of elapsed seconds of func. setup is called before
+    each run and its return value is passed to func. """
+    times = []
+    for _ in range(repeat):
+        arg = setup() if setup is not None else None
+        start = time.perf_counter()
+        func(arg)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def run_size(lo_tickers, repeat, **engine_params):
+    """ Run benchmarks for a list of tickers and return a dict of
+    benchmark name -> list of elapsed seconds """
+    results = dict()
+    engines = []
+
+    def new_engine():
+        return make_engine(lo_tickers, **engine_params)
+
+    def compiled_engine():
+        engine = new_engine()
+        engine.compile()
+        engines.append(engine)
+        return engine
+
+    def compiled_engine_cold():
+        get_data_cache().clear()
+        get_rebalance_mask_cache().clear()
+        return compiled_engine()
+
+    results['engine.compile'] = measure(lambda e: e.compile(), repeat,
+                                        setup=new_engine)
+    results['engine.backtest'] = measure(lambda e: e.backtest(), repeat,
+                                         setup=compiled_engine_cold)
+    # contracts are read from the data cache
+    results['engine.backtest_warm'] = measure(lambda e: e.backtest(), repeat,
+                                              setup=compiled_engine)
+
+    returns = engines[-1].get_sub_net_returns()
+    levels = returns.fillna(0.0).add(1.0).cumprod()
+    results['performance.summary'] = measure(
+        lambda _: Performance(levels).summary(), repeat)
+
+    generic_tickers = [i.replace('_', '/') for i in lo_tickers]
+    results['utils.get_tickers_from_db'] = measure(
+        lambda _: [get_tickers_from_db(i) for i in generic_tickers], repeat)
+    results['utils.date_shift'] = measure(
+        lambda _: [date_shift(levels.index, FuturesInfo[i].value
+                              .last_trade_date) for i in lo_tickers],
+        repeat)
+    results['utils.data_asfreq'] = measure(
+        lambda _: [data_asfreq(levels[i], CHG_RULE) for i in levels],
+        repeat)
+    # signals of all instruments at once
+    results['signal.ma_xover_batch'] = measure(
+        lambda _: signal_trend_ma_xover_batch(returns, SIGNAL_WINDOWS),
+        repeat)
+    return results
+
+
+def run(sizes=SIZES, repeat=3, start_yyyymm=201001, end_yyyymm=201712,
+        seed=0, store_path=None, **engine_params):
+    """ Run the benchmark suite on synthetic data
+
+    :param sizes: list of numbers of tickers
+    :param repeat: number of runs of each benchmark
+    :param start_yyyymm: int, first delivery month of contracts (YYYYMM)
+    :param end_yyyymm: int, last delivery month of contracts (YYYYMM)
+    :param seed: seed of the random numbers
+    :param store_path: if given, data is read from a LocalStore at this path
+    instead of memory
+    :param engine_params: parameters passed to Engine (e.g., n_jobs)
+    :return: dict which can be serialised to JSON
+    """
+    all_lo_tickers = [i.name for i in FuturesInfo]
+    if max(sizes) > len(all_lo_tickers):
+        raise ValueError('Only {} tickers available. Got {}'
+                         .format(len(all_lo_tickers), max(sizes)))
+
+    store = InMemoryArctic()
+    populate(store, all_lo_tickers[:max(sizes)], start_yyyymm=start_yyyymm,
+             end_yyyymm=end_yyyymm, seed=seed)
+    if store_path is not None:
+        memory_store = store
+        store = LocalStore(store_path)
+        for library_name in memory_store.list_libraries():
+            store.initialize_library(library_name)
+            copy_library(memory_store[library_name], store[library_name])
+        with use_store(store):
+            # versions in the copied manifests are those of memory_store
+            for lo_ticker in all_lo_tickers[:max(sizes)]:
+                LongOnlyQuandlFutures(lo_ticker=lo_ticker).build_manifest()
+
+    records = []
+    with use_store(store):
+        for size in sizes:
+            times = run_size(all_lo_tickers[:size], repeat, **engine_params)
+            for name, elapsed in times.items():
+                records.append({
+                    'benchmark': name,
+                    'n_tickers': size,
+                    'times': elapsed,
+                    'min': min(elapsed),
+                    'mean': float(np.mean(elapsed)),
+                })
+
+    return {
+        'adagio_version': adagio.__version__,
+        'python_version': platform.python_version(),
+        'numpy_version': np.__version__,
+        'pandas_version': pd.__version__,
+        'created': datetime.now().isoformat(),
+        'params': {
+            'repeat': repeat,
+            'start_yyyymm': start_yyyymm,
+            'end_yyyymm': end_yyyymm,
+            'seed': seed,
+            'store': repr(store),
+            'engine_params': engine_params,
+        },
+        'results': records,
+        'data_cache': get_data_cache().stats(),
+    }
+
+
+def main(args=None):
+    parser = ArgumentParser(description='Run adagio benchmarks on synthetic '
+                                        'futures data')
+    parser.add_argument('--output', default='benchmark.json',
+                        help='path of the JSON file to write results')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES,
+                        help='numbers of tickers')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--start-yyyymm', type=int, default=201001)
+    parser.add_argument('--end-yyyymm', type=int, default=201712)
+    parser.add_argument('--n-jobs', type=int, default=1)
+    parser.add_argument('--store-path', default=None,
+                        help='directory of a LocalStore to read data from. '
+                             'Data is kept in memory if not given')
+    args = parser.parse_args(args)
+
+    # logging to the console would dominate the timings
+    logging.disable(logging.INFO)
+    results = run(sizes=args.sizes, repeat=args.repeat,
+                  start_yyyymm=args.start_yyyymm,
+                  end_yyyymm=args.end_yyyymm, store_path=args.store_path,
+                  n_jobs=args.n_jobs)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    for record in results['results']:
+        print('{:<28}{:>5} tickers{:>10.3f}s'.format(
+            record['benchmark'], record['n_tickers'], record['min']))
+
+
+if __name__ == '__main__':
+    main()
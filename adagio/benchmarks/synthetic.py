@@ -0,0 +1,251 @@
+""" Synthetic futures data and an in-memory stand-in for the Arctic store so
+that backtests can run without MongoDB and Quandl. """
+from copy import deepcopy
+from datetime import datetime
+import re
+
+import numpy as np
+import pandas as pd
+from arctic.store.versioned_item import VersionedItem
+
+from ..layers.longonly import LongOnlyQuandlFutures
+from ..utils import keys
+from ..utils.mongo import get_library, use_store
+from ..utils.const import (FuturesInfo, Denominator, PriceSkipDates,
+                           ReturnSkipDates, FutureContractMonth,
+                           RETURN_KEY_PRIORITY, VOLUME_KEY_PRIORITY)
+from ..utils.date import date_shift
+from ..utils.storage import (BaseLibrary, BaseStore, select_columns,
+                             select_dates)
+from ..utils.trading_calendar import get_ticker_calendar
+
+# contracts of these tickers are spliced with the ones of other tickers
+SPLICED_TICKERS = {
+    FuturesInfo.CME_ES.name: [FuturesInfo.CME_SP.name],
+    FuturesInfo.CME_NQ.name: [FuturesInfo.CME_ND.name],
+    FuturesInfo.CME_YM.name: [FuturesInfo.CME_DJ.name],
+}
+
+BACKTEST_CCY = 'USD'
+HISTORY = '-1y'
+
+
+class InMemoryLibrary(BaseLibrary):
+    """ Library keeping data in a dict. Data is copied on write and read as
+    arctic serialises it. """
+
+    def __init__(self, name):
+        super(InMemoryLibrary, self).__init__(name)
+        self._items = dict()
+
+    def list_symbols(self, regex=None):
+        symbols = sorted(self._items.keys())
+        if regex is not None:
+            symbols = [s for s in symbols if re.search(regex, s)]
+        return symbols
+
+    def has_symbol(self, symbol):
+        return symbol in self._items
+
+    def read(self, symbol, columns=None, date_range=None, **kwargs):
+        item = self._get(symbol)
+        data = select_dates(select_columns(item.data, columns), date_range)
+        return item._replace(data=deepcopy(data))
+
+    def read_metadata(self, symbol, **kwargs):
+        return self._get(symbol)._replace(data=None)
+
+    def write(self, symbol, data, metadata=None, **kwargs):
+        version = 1
+        if symbol in self._items:
+            version = self._items[symbol].version + 1
+        item = VersionedItem(symbol=symbol, library=self.name,
+                             data=deepcopy(data), version=version,
+                             metadata=metadata)
+        self._items[symbol] = item
+        return item._replace(data=None)
+
+    def delete(self, symbol):
+        self._get(symbol)
+        del self._items[symbol]
+
+    def _get(self, symbol):
+        if symbol not in self._items:
+            raise self._not_found(symbol)
+        return self._items[symbol]
+
+
+class InMemoryArctic(BaseStore):
+    """ Store keeping libraries in memory """
+
+    def __init__(self):
+        self._libraries = dict()
+
+    def __repr__(self):
+        return '{}()'.format(self.__class__.__name__)
+
+    def __getitem__(self, library_name):
+        return self._libraries[library_name]
+
+    def list_libraries(self):
+        return list(self._libraries.keys())
+
+    def initialize_library(self, library_name, **kwargs):
+        self._libraries[library_name] = InMemoryLibrary(library_name)
+
+
+def contract_tickers(lo_ticker, start_yyyymm, end_yyyymm):
+    """ Return a list of contract tickers of lo_ticker following its roll
+    schedule. Both start_yyyymm and end_yyyymm are inclusive.
+
+    :param lo_ticker: name of FuturesInfo such as CME_ES
+    :param start_yyyymm: int, first delivery month (YYYYMM)
+    :param end_yyyymm: int, last delivery month (YYYYMM)
+    :return:
+    """
+    futures_info = FuturesInfo[lo_ticker].value
+    first_month = futures_info.start_from[0]
+    first_yyyymm = (int(futures_info.start_from[1:]) * 100
+                    + FutureContractMonth[first_month].value)
+    start_yyyymm = max(start_yyyymm, first_yyyymm)
+
+    tickers = []
+    for contract_year in range(start_yyyymm // 100, end_yyyymm // 100 + 1):
+        for month in futures_info.roll_schedule:
+            yyyymm = contract_year * 100 + FutureContractMonth[month].value
+            if start_yyyymm <= yyyymm <= end_yyyymm:
+                tickers.append('{}{}{}'.format(lo_ticker.replace('_', '/'),
+                                               month, contract_year))
+    return tickers
+
+
+def contract_data(lo_ticker, contract_month_dt, spot, seed):
+    """ Return a daily history of a contract which ends on its last trade
+    date.
+
+    Prices are the spot series with a carry which decays towards the expiry.
+    Volume peaks around the roll and dates listed in PriceSkipDates and
+    ReturnSkipDates contain erroneous prices as in the Quandl data.
+
+    :param lo_ticker: name of FuturesInfo
+    :param contract_month_dt: datetime of the beginning of delivery month
+    :param spot: Series of spot prices covering the contract history
+    :param seed: seed of the random numbers
+    :return: DataFrame
+    """
+    futures_info = FuturesInfo[lo_ticker].value
+    rng = np.random.RandomState(seed)
+    last_trade_date = date_shift(contract_month_dt,
+                                 futures_info.last_trade_date,
+                                 get_ticker_calendar(lo_ticker))
+    index = pd.bdate_range(date_shift(last_trade_date, HISTORY),
+                           last_trade_date)
+    index = index[(index >= spot.index[0]) & (index <= spot.index[-1])]
+
+    days_to_expiry = (last_trade_date - index).days.values
+    settle = (spot.reindex(index).values
+              * np.exp(rng.normal(0.01, 0.02) * days_to_expiry / 365.0))
+    settle = _round_to_tick(settle, futures_info.tick_size)
+    spread = np.abs(rng.normal(0, 0.005, len(index))) * settle
+    volume = (rng.lognormal(10, 0.5)
+              * np.exp(-np.abs(days_to_expiry - 45) / 30.0)
+              * rng.lognormal(0, 0.3, len(index)))
+
+    data = pd.DataFrame({
+        'Open': settle + rng.uniform(-0.5, 0.5, len(index)) * spread,
+        'High': settle + spread,
+        'Low': settle - spread,
+        RETURN_KEY_PRIORITY[0]: settle,
+        VOLUME_KEY_PRIORITY[0]: np.floor(volume),
+        'Open Interest': np.floor(volume.cumsum()),
+    }, index=index)
+
+    skip_dates = []
+    for skip_dates_enum in (PriceSkipDates, ReturnSkipDates):
+        if lo_ticker in skip_dates_enum.__members__.keys():
+            skip_dates += skip_dates_enum[lo_ticker].value
+    skip_dates = [d for d in pd.DatetimeIndex(skip_dates) if d in index]
+    data.loc[skip_dates, RETURN_KEY_PRIORITY[0]] *= 10.0
+    return data
+
+
+def spot_prices(lo_ticker, start_date, end_date, seed):
+    """ Return a random walk of the underlying price of lo_ticker. Interest
+    rate futures are quoted as 100 - rate. """
+    futures_info = FuturesInfo[lo_ticker].value
+    rng = np.random.RandomState(seed)
+    index = pd.bdate_range(start_date, end_date)
+
+    if futures_info.denominator == Denominator.MM_FUT.value:
+        rate = np.abs(2.0 + rng.normal(0, 0.02, len(index)).cumsum())
+        prices = 100.0 - rate
+    else:
+        log_returns = rng.normal(0.0002, 0.012, len(index))
+        prices = 100.0 * np.exp(log_returns.cumsum())
+    return pd.Series(prices, index=index)
+
+
+def fx_rates(currency, start_date, end_date, seed):
+    """ Return a random walk of the fx rate of currency against
+    BACKTEST_CCY """
+    rng = np.random.RandomState(seed)
+    index = pd.bdate_range(start_date, end_date)
+    rates = np.exp(rng.normal(0, 0.006, len(index)).cumsum())
+    return pd.Series(rates, index=index,
+                     name='{}/{}'.format(currency, BACKTEST_CCY))
+
+
+def populate(store, lo_tickers, start_yyyymm=201001, end_yyyymm=201712,
+             seed=0):
+    """ Write synthetic contracts of lo_tickers, their manifests and fx rates
+    for their contract currencies to store.
+
+    Contracts of tickers which are spliced (e.g., CME_SP for CME_ES) are
+    added as well.
+
+    :param store: InMemoryArctic
+    :param lo_tickers: list of names of FuturesInfo
+    :param start_yyyymm: int, first delivery month (YYYYMM)
+    :param end_yyyymm: int, last delivery month (YYYYMM)
+    :param seed: seed of the random numbers
+    :return: list of contract tickers written
+    """
+    all_lo_tickers = []
+    for lo_ticker in lo_tickers:
+        for i in SPLICED_TICKERS.get(lo_ticker, []) + [lo_ticker]:
+            if i not in all_lo_tickers:
+                all_lo_tickers.append(i)
+
+    start_date = date_shift(datetime(start_yyyymm // 100,
+                                     start_yyyymm % 100, 1), HISTORY)
+    end_date = date_shift(datetime(end_yyyymm // 100, end_yyyymm % 100, 1),
+                          '+2m')
+
+    with use_store(store):
+        library = get_library(keys.quandl_contract)
+        written = []
+        currencies = set()
+        for ticker_idx, lo_ticker in enumerate(all_lo_tickers):
+            spot = spot_prices(lo_ticker, start_date, end_date,
+                               seed + ticker_idx)
+            for contract_idx, ticker in enumerate(
+                    contract_tickers(lo_ticker, start_yyyymm, end_yyyymm)):
+                contract_month_dt = datetime(
+                    int(ticker[-4:]), FutureContractMonth[ticker[-5]].value, 1)
+                data = contract_data(lo_ticker, contract_month_dt, spot,
+                                     seed + ticker_idx * 1000 + contract_idx)
+                library.write(ticker, data)
+                written.append(ticker)
+            currencies.add(FuturesInfo[lo_ticker].value.contract_ccy)
+            LongOnlyQuandlFutures(lo_ticker=lo_ticker).build_manifest()
+
+        library = get_library(keys.fx_rates)
+        for ccy_idx, ccy in enumerate(sorted(currencies)):
+            if ccy != BACKTEST_CCY:
+                library.write(ccy, fx_rates(ccy, start_date, end_date,
+                                            seed + ccy_idx))
+    return written
+
+
+def _round_to_tick(prices, tick_size):
+    return np.round(prices / tick_size) * tick_size
@@ -2,19 +2,28 @@ from datetime import datetime
 
 import pandas as pd
 import numpy as np
-import quandl
+from arctic.date import DateRange
 from arctic.exceptions import NoDataFoundException
 
 from .base import BaseBacktestObject
+from .position import PositionMatrix
 from ..utils import keys
 from ..utils.config import AdagioConfig
 from ..utils.const import (FutureContractMonth, Denominator, PriceSkipDates,
                            ReturnSkipDates, FuturesInfo, RETURN_KEY_PRIORITY,
-                           VOLUME_KEY_PRIORITY)
+                           VOLUME_KEY_PRIORITY, DATA_MARGIN_BEFORE,
+                           DATA_MARGIN_AFTER)
 from ..utils.date import date_shift
+from ..utils.decorators import cached
+from ..utils.downloader import get_downloader
+from ..utils.fx import get_fx_service
 from ..utils.logging import get_logger
+from ..utils.manifest import EXPIRED, LAST_DATE, make_entry
 from ..utils.mongo import get_library
-from ..utils.quandl import futures_contract_name, futures_contract_month, year
+from ..utils.profiler import profiled
+from ..utils.quandl import (futures_contract_name, futures_contract_month,
+                            year, to_yyyymm)
+from ..utils.trading_calendar import get_ticker_calendar
 
 logger = get_logger(name=__name__)
 
@@ -41,6 +50,8 @@ class QuandlFutures(BaseBacktestObject):
         self.roll_date = None
         self.position = None
         self.is_expired = False
+        self.data_version = None
+        self._cache = dict()
 
     def __repr__(self):
         return '{}({})'.format(self.__class__.__name__,
@@ -76,6 +87,11 @@ class QuandlFutures(BaseBacktestObject):
         """ Return delivery year """
         return year(self[keys.quandl_ticker])
 
+    @property
+    def calendar(self):
+        """ Return the trading calendar of the exchange """
+        return get_ticker_calendar(self[keys.quandl_ticker])
+
     @property
     def price_for_return(self):
         """ Return a series for returns """
@@ -90,13 +106,28 @@ class QuandlFutures(BaseBacktestObject):
         except ValueError:
             return False
 
+    def clear_cache(self, keep_data=False):
+        """ Clear cached positions and returns. This must be called when
+        data or position is changed.
+
+        :param keep_data: if True, values which only depend on data (e.g.,
+        fx adjustment) are kept. Use this when only position is changed.
+        """
+        if keep_data:
+            self._cache = {k: v for k, v in self._cache.items()
+                           if k[0] in _data_cached_funcs}
+        else:
+            self._cache = dict()
+
+    @cached
     def get_final_positions(self):
         """ Return final position (adjusted by signals etc.) 
         Trading lags are already applied so that the final return can be
         calculated by final_position * returns.
         """
-        return self.position.prod(axis=1).rename('final_position')
+        return self.position.get_final().rename('final_position')
 
+    @cached
     def get_final_gross_returns(self):
         """ Return final gross returns for its contract using final_positions 
         Any slippage is not deducted.
@@ -104,6 +135,7 @@ class QuandlFutures(BaseBacktestObject):
         return ((self.calc_return() * self.get_final_positions())
                 .rename('final_gross_returns'))
 
+    @cached
     def get_final_net_returns(self):
         """ Return final net returns for its contract using final_positions 
         
@@ -136,86 +168,177 @@ class QuandlFutures(BaseBacktestObject):
         else:
             return self.get_final_net_returns()
 
-    def backtest(self, start_date, end_date, *args, **kwargs):
+    @profiled(per_item=True)
+    def backtest(self, start_date, end_date, *args, item=None, **kwargs):
         """ Get data from Quandl and clean it. Positions are calculated
         according to start_date and end_date (both including).
 
         :param start_date: 
         :param end_date: 
+        :param item: item of the contract already read from the library.
+        The contract is read from the library if None.
         :return: 
         """
         logger.info('Run layers: {}'.format(self))
 
         # load data
-        self.data = self.load_data()
+        self.data = self.load_data(item)
         self.data = self.clean_data()
-        self.roll_date = end_date
+        self._set_base_position(start_date, end_date)
+
+    def restore(self, data, start_date, end_date, data_version):
+        """ Set data already cleaned (e.g., saved by an incremental
+        backtest) instead of loading it and determine base positions in the
+        same way as backtest
+
+        :param data: cleaned data
+        :param start_date: first date of the base position
+        :param end_date: roll date
+        :param data_version: version of the stored data which data is from
+        :return:
+        """
+        self.data = data
+        self.data_version = data_version
+        self.is_expired = True
+        self._set_base_position(start_date, end_date)
 
-        # determine base positions based on the roll date
+    def _set_base_position(self, start_date, end_date):
+        """ Determine base positions based on the roll date """
+        self.roll_date = end_date
         logger.debug('Determining base positions')
-        self.position = pd.DataFrame(0.0, columns=['base'],
-                                     index=self.data.index)
-        self.position.loc[slice(start_date, end_date), 'base'] = 1.0
+        base = pd.Series(0.0, index=self.data.index, name='base')
+        base.loc[slice(start_date, end_date)] = 1.0
+        self.position = PositionMatrix(base)
+        self.clear_cache()
         self[keys.start_date] = start_date
         self[keys.end_date] = end_date
 
     def check_if_expired(self, data):
         """ Check if the contract is expired """
-        if data.index[-1] >= self.last_trade_date():
+        self.check_last_date(data.index[-1])
+
+    def check_last_date(self, last_date):
+        """ Check if the contract is expired given the last date of data """
+        if last_date >= self.last_trade_date():
             # if data contains the last trade date
             self.is_expired = True
         else:
             today = datetime.today()
-            if data.index[-1] < date_shift(today, '-1y'):
+            if last_date < date_shift(today, '-1y'):
                 # if data is very old the contract is assumed to be expired
                 self.is_expired = True
 
     def load_from_quandl(self):
         """ Download data from quandl """
         logger.debug('Downloading data from Quandl')
-        data = quandl.get(self[keys.quandl_ticker],
-                          api_key=AdagioConfig.quandl_token)
+        data = get_downloader().get(self[keys.quandl_ticker])
         self.check_if_expired(data)
         return data
 
     def to_mongo(self, library, data):
         """ Save data to MongoDB """
         logger.debug('Pushing data to MongoDB')
-        library.write(self[keys.quandl_ticker], data)
+        return library.write(self[keys.quandl_ticker], data)
 
-    def load_data(self):
-        """ Load data either from MongoDB stored locally """
+    @profiled(per_item=True)
+    def load_data(self, item=None):
+        """ Load data either from MongoDB stored locally. Only the columns
+        and dates given by get_read_kwargs are read.
 
-        library = get_library(keys.quandl_contract)
-        item = library.read(self[keys.quandl_ticker])
+        :param item: item of the contract already read from the library with
+        the same arguments
+        :return:
+        """
+        read_kwargs = get_read_kwargs(self.backtest_params)
+        if item is None:
+            library = get_library(keys.quandl_contract)
+            item = library.read(self[keys.quandl_ticker], **read_kwargs)
+        elif item.symbol != self[keys.quandl_ticker]:
+            raise ValueError('Item of {} is given to {}'
+                             .format(item.symbol, self))
         data = item.data
-        self.check_if_expired(data)
+        self.data_version = item.version
+        if read_kwargs['date_range'] is None:
+            self.check_if_expired(data)
         return data
 
-    def update_database(self):
+    def update_database(self, entry=None):
         """ Update local database by checking Quandl if they have the latest
-        data """
+        data
+
+        :param entry: manifest entry of the contract. The stored data is not
+        read if the entry shows that the contract is expired.
+        :return: manifest entry of the stored data
+        """
+        if entry is not None and not self[keys.force_download]:
+            self.is_expired = entry[EXPIRED]
+            self.check_last_date(entry[LAST_DATE])
+            if self.is_expired:
+                logger.debug('Expired contract: {}'.format(self))
+                return entry
+
         library = get_library(keys.quandl_contract)
         try:
             item = library.read(self[keys.quandl_ticker])
             data = item.data
             self.check_if_expired(data)
 
-            if not self.is_expired or self[keys.force_download]:
+            if self[keys.force_download]:
                 # re-download data. Quandl might have more recent data
                 data = self.load_from_quandl()
-                self.to_mongo(library, data)
+                item = self.to_mongo(library, data)
+            elif not self.is_expired:
+                data, item = self.update_from_quandl(library, item)
             else:
                 logger.debug('Load data from MongoDB')
 
         except NoDataFoundException:
             # if not found in MongoDB, then it tries to get data from Quandl
             data = self.load_from_quandl()
-            self.to_mongo(library, data)
+            item = self.to_mongo(library, data)
+
+        return make_entry(to_yyyymm(self[keys.quandl_ticker]), data,
+                          item.version, self.is_expired)
+
+    def update_from_quandl(self, library, item):
+        """ Download rows from a few business days before the last stored
+        date. New rows are appended to the stored data if the rows
+        downloaded again are the same as the stored ones. Otherwise the
+        stored data is replaced with the revised rows merged.
+
+        :param library: library in which data is stored
+        :param item: stored item
+        :return: tuple of the updated data and the item of its version
+        """
+        data = item.data
+        start_date = date_shift(data.index[-1], '-{}bd'.format(
+            AdagioConfig.download_overlap))
+        logger.debug('Downloading data from Quandl since {:%Y-%m-%d}'
+                     .format(start_date))
+        new_data = get_downloader().get(self[keys.quandl_ticker],
+                                        start_date=start_date)
+        if len(new_data) == 0:
+            return data, item
+        self.check_if_expired(new_data)
+
+        overlap = new_data.loc[:data.index[-1]]
+        if data.loc[new_data.index[0]:].equals(overlap):
+            appended = new_data.loc[new_data.index > data.index[-1]]
+            if len(appended) > 0:
+                logger.debug('Appending data to MongoDB')
+                item = library.append(self[keys.quandl_ticker], appended)
+                data = pd.concat([data, appended])
+        else:
+            logger.debug('Revised data found')
+            data = pd.concat([data.loc[data.index < new_data.index[0]],
+                              new_data])
+            item = self.to_mongo(library, data)
+        return data, item
 
     def get_date(self, shift_string):
         """ Shift date from the delivery month-begin """
-        return date_shift(self.contract_month_dt, shift_string)
+        return date_shift(self.contract_month_dt, shift_string,
+                          self.calendar)
 
     def last_trade_date(self):
         return self.get_date(self[keys.last_trade_date])
@@ -235,6 +358,7 @@ class QuandlFutures(BaseBacktestObject):
         else:
             return self.last_trade_date()
 
+    @profiled(per_item=True)
     def get_roll_date(self, roll_rule):
         """ Return roll date
          
@@ -243,8 +367,10 @@ class QuandlFutures(BaseBacktestObject):
         If the contract has a setting for first notice date, then the roll date
         is min(X-days before last trade date, X-days before first notice date)
         """
-        return date_shift(self.get_roll_base_date(), roll_rule)
+        return date_shift(self.get_roll_base_date(), roll_rule,
+                          self.calendar)
 
+    @profiled(per_item=True)
     def clean_data(self):
         """ Clean erroneous dates """
         cleaned_data = self.data
@@ -273,7 +399,8 @@ class QuandlFutures(BaseBacktestObject):
         period = slice(self[keys.backtest_start_date],
                        self[keys.backtest_end_date])
         self.data = self.data.loc[period, :]
-        self.position = self.position.loc[period, :]
+        self.position = self.position.truncate(period.start, period.stop)
+        self.clear_cache()
 
     def get_return_key(self):
         """ Return a column name used to be used for calculating returns """
@@ -291,6 +418,8 @@ class QuandlFutures(BaseBacktestObject):
         raise ValueError('No volume key found. Data contains {}'
                          .format(self.data.keys()))
 
+    @cached
+    @profiled(per_item=True)
     def calc_return(self):
         """ Calculate returns and clean it if necessary """
         return_raw = self._calc_return_raw()
@@ -322,7 +451,13 @@ class QuandlFutures(BaseBacktestObject):
             else:
                 raise ValueError("{} is not a valid denominator."
                                  .format(self[keys.denominator]))
-        return self.price_for_return.diff().div(base_price.shift()).fillna(0)
+        return self.get_price_change().div(base_price.shift()).fillna(0)
+
+    @cached
+    def get_price_change(self):
+        """ Return daily changes of the price used for returns. Unlike
+        returns, they don't depend on positions. """
+        return self.price_for_return.diff()
 
     def _get_base_price(self, constant=None):
         """ Get base price series that will be used as a denominator
@@ -362,32 +497,45 @@ class QuandlFutures(BaseBacktestObject):
         if self[keys.contract_ccy] == self[keys.backtest_ccy]:
             return returns
         else:
-            library = get_library(keys.fx_rates)
-            symbols = library.list_symbols(regex=self[keys.contract_ccy])
-
-            if len(symbols) > 1:
-                raise ValueError('Multiple fx rates found')
-
-            fx_rates = library.read(symbols[0])
-            fx_rates = fx_rates.data
-
-            if fx_rates.name == '{}/{}'.format(self[keys.contract_ccy],
-                                               self[keys.backtest_ccy]):
-                # use fx rates as is
-                pass
-            elif fx_rates.name == '{}/{}'.format(self[keys.backtest_ccy],
-                                                 self[keys.contract_ccy]):
-                fx_rates = fx_rates.pow(-1)
-
-            fx_adj = (fx_rates
-                      .reindex(returns.index)
-                      .fillna(method='pad')
-                      .pct_change()
-                      .fillna(0)
-                      .add(1.0)
-                      )
+            fx_adj = self.get_fx_adjustment()
             return (returns * fx_adj).rename(returns.name)
 
+    @cached
+    def get_fx_adjustment(self):
+        """ Return a series of (1 + fx returns) aligned to the data index
+        which converts returns in the contract currency into the backtest
+        currency. Fx rates are shared with other contracts through the
+        FxService. """
+        return get_fx_service().get_adjustment(self[keys.contract_ccy],
+                                               self[keys.backtest_ccy],
+                                               self.data.index)
+
+
+def get_read_kwargs(backtest_params):
+    """ Return keyword arguments of library.read which load only the data
+    columns and the dates around the backtest period
+
+    :param backtest_params: backtest parameters of a contract or LongOnly
+    :return: dict
+    """
+    start_date = backtest_params.get(keys.backtest_start_date)
+    end_date = backtest_params.get(keys.backtest_end_date)
+    date_range = None
+    if start_date is not None or end_date is not None:
+        if start_date is not None:
+            start_date = date_shift(start_date, DATA_MARGIN_BEFORE)
+        if end_date is not None:
+            end_date = date_shift(end_date, DATA_MARGIN_AFTER)
+        date_range = DateRange(start_date, end_date)
+    return {'columns': backtest_params.get(keys.data_columns),
+            'date_range': date_range}
+
+
+# cached methods which don't depend on position. calc_return is not one of
+# them as the base price of returns changes with final positions.
+_data_cached_funcs = [QuandlFutures.get_fx_adjustment.__name__,
+                      QuandlFutures.get_price_change.__name__]
+
 
 def _clean_jgb_prices(df):
     df[:'2018-01-18'] *= 0.1
@@ -1,17 +1,31 @@
-from copy import copy
-from functools import reduce
+from concurrent.futures import ThreadPoolExecutor
+from copy import copy, deepcopy
+from functools import reduce, partial
+from itertools import product
+import os
 
 import pandas as pd
+from arctic.exceptions import NoDataFoundException
 
 from .layer import Layer
 from .longonly import LongOnly
+from .scheduler import Scheduler
 from ..utils import keys
 from ..utils.array import merge_params
+from ..utils.downloader import get_downloader
+from ..utils.fx import get_fx_service
 from ..utils.hash import to_hash
 from ..utils.logging import get_logger
+from ..utils.mongo import get_library
+from ..utils.profiler import Profiler, profiling, profiled, timed
+from ..utils.trading_calendar import get_calendar_key
 
 logger = get_logger(name=__name__)
 
+# parameters which don't change backtest results
+_runtime_params = [keys.n_jobs, keys.use_cache, keys.incremental,
+                   keys.profile, keys.profile_memory]
+
 
 class Engine(object):
     def __init__(self, **backtest_params):
@@ -19,6 +33,8 @@ class Engine(object):
         self.backtest_params = backtest_params
         self.layers = []
         self.is_compiled = False
+        self.cached_results = None
+        self.profiler = None
 
     def __repr__(self):
         layers = '\n\t'.join([str(i) for i in self.layers])
@@ -39,6 +55,11 @@ class Engine(object):
         """ Initialise parameters """
         backtest_params.setdefault(keys.name, 'engine')
         backtest_params.setdefault(keys.backtest_ccy, 'USD')
+        backtest_params.setdefault(keys.n_jobs, 1)
+        backtest_params.setdefault(keys.use_cache, False)
+        backtest_params.setdefault(keys.incremental, False)
+        backtest_params.setdefault(keys.profile, False)
+        backtest_params.setdefault(keys.profile_memory, False)
 
         start_date = backtest_params.get(keys.backtest_start_date, None)
         end_date = backtest_params.get(keys.backtest_end_date, None)
@@ -61,8 +82,20 @@ class Engine(object):
         params_for_symbol = copy(self.all_params)
         del params_for_symbol[keys.backtest_start_date]
         del params_for_symbol[keys.backtest_end_date]
+        for key in _runtime_params:
+            params_for_symbol.pop(key, None)
         return to_hash(params_for_symbol)
 
+    @property
+    def n_jobs(self):
+        """ Return the number of processes used to run the first layer,
+        which consists of either LongOnly or Engine objects. -1 means using
+        all CPUs """
+        n_jobs = self.backtest_params[keys.n_jobs]
+        if n_jobs == -1:
+            n_jobs = os.cpu_count()
+        return n_jobs
+
     @property
     def all_params(self):
         """ Merge backtest params in all layers """
@@ -85,6 +118,8 @@ class Engine(object):
         LongOnly, this returns each futures gross strategy returns.
         If the first layer is Engine, then this returns each Engine's 
         gross performance """
+        if self.cached_results is not None:
+            return self.cached_results[keys.gross_returns]
         return pd.concat([item.get_final_gross_returns() for item in self[0]], axis=1)
 
     def get_sub_net_returns(self):
@@ -92,6 +127,8 @@ class Engine(object):
         LongOnly, this returns each futures net strategy returns.
         If the first layer is Engine, then this returns each Engine's 
         net performance """
+        if self.cached_results is not None:
+            return self.cached_results[keys.net_returns]
         return pd.concat([item.get_final_net_returns() for item in self[0]], axis=1)
 
     def get_final_positions(self):
@@ -104,6 +141,8 @@ class Engine(object):
         LongOnly, this returns each futures aggregated positions.
         If the first layer is Engine, then this returns each Engine's 
         positions """
+        if self.cached_results is not None:
+            return self.cached_results[keys.positions]
         return pd.concat([item.get_final_positions() for item in self[0]], axis=1)
 
     def get_long_only_names(self):
@@ -120,6 +159,71 @@ class Engine(object):
                             .format(self[0]))
         return lo_list
 
+    def get_long_only_objects(self):
+        """ Return a list of LongOnly objects including ones in nested
+        engines """
+        lo_list = []
+        for item in self[0]:
+            if isinstance(item, Engine):
+                lo_list = lo_list + item.get_long_only_objects()
+            else:
+                lo_list.append(item)
+        return lo_list
+
+    def get_data_versions(self):
+        """ Return stored data versions used in all LongOnly objects """
+        versions = dict()
+        for item in self[0]:
+            versions.update(item.get_data_versions())
+        return versions
+
+    def get_results_metadata(self):
+        """ Return metadata which identifies cached backtest results together
+        with the symbol """
+        start_date = self.backtest_params[keys.backtest_start_date]
+        end_date = self.backtest_params[keys.backtest_end_date]
+        return {
+            keys.backtest_start_date: None if start_date is None
+            else start_date.strftime('%Y-%m-%d'),
+            keys.backtest_end_date: None if end_date is None
+            else end_date.strftime('%Y-%m-%d'),
+            keys.data_version: to_hash(self.get_data_versions()),
+            keys.trading_calendar: get_calendar_key(
+                [i.calendar for i in self.get_long_only_objects()]),
+        }
+
+    @profiled()
+    def load_results(self):
+        """ Load backtest results from MongoDB if they were saved with the
+        same parameters and the same input data.
+
+        :return: True if the results are found
+        """
+        library = get_library(keys.backtest)
+        try:
+            item = library.read(self.symbol)
+        except NoDataFoundException:
+            return False
+
+        if item.metadata != self.get_results_metadata():
+            logger.debug('Cached results are outdated: {}'.format(self.symbol))
+            return False
+
+        self.cached_results = item.data
+        return True
+
+    @profiled()
+    def save_results(self):
+        """ Save positions and returns to MongoDB using the symbol """
+        results = {
+            keys.positions: self.get_sub_positions(),
+            keys.gross_returns: self.get_sub_gross_returns(),
+            keys.net_returns: self.get_sub_net_returns(),
+        }
+        library = get_library(keys.backtest)
+        library.write(self.symbol, results,
+                      metadata=self.get_results_metadata())
+
     def add(self, other):
         """ Append an element to the layer """
         layer = Layer(other)
@@ -127,6 +231,10 @@ class Engine(object):
 
     def cascade(self, func_name, others=None):
         """ Look for a layer which has the specified function and run it """
+        with timed('Engine.cascade', func_name):
+            self._cascade(func_name, others=others)
+
+    def _cascade(self, func_name, others=None):
         for layer in self:
             if all([hasattr(i, self.cascade.__name__) for i in layer]):
                 #  in case layer consists of Engine
@@ -169,28 +277,257 @@ class Engine(object):
                          others=[self.backtest_params[keys.backtest_start_date]])
             self.cascade('set_backtest_end_date',
                          others=[self.backtest_params[keys.backtest_end_date]])
+            self.cascade('set_incremental',
+                         others=[self.backtest_params[keys.incremental]])
             self.is_compiled = True
 
     def update_database(self):
-        """ Update database used for LongOnly objects """
+        """ Update database used for LongOnly objects. LongOnly objects are
+        updated on threads. Downloads are limited by the downloader so the
+        number of threads doesn't change the load on Quandl. """
         self.compile()
         logger.info('Database update started')
-        self[0].run('update_database')
+        lo_list = self.get_long_only_objects()
+        n_workers = min(get_downloader().n_workers, len(lo_list))
+        if n_workers > 1:
+            with ThreadPoolExecutor(max_workers=n_workers) as executor:
+                futures = [executor.submit(lo.update_database)
+                           for lo in lo_list]
+                for future in futures:
+                    future.result()
+        else:
+            for lo in lo_list:
+                lo.update_database()
         logger.info('Database update completed')
 
-    def backtest(self):
-        """ Run the layers by calling their functions in order """
-
-        self.compile()
+    def run_root_layer(self, func_name):
+        """ Run a function in the first layer. Items are distributed to
+        a process pool if n_jobs is greater than 1 """
         root_layer = self[0]
+        n_jobs = min(self.n_jobs, len(root_layer))
+        if n_jobs > 1:
+            logger.info('Running {} on {} processes'.format(func_name, n_jobs))
+            root_layer.run_parallel(func_name, n_jobs=n_jobs)
+        else:
+            root_layer.run(func_name)
+
+    def run_layer(self, layer_idx):
+        """ Run a layer other than the first one and propagate its positions
+        down to the first layer """
+        layer = self[layer_idx]
+        layer.run('backtest', others=self[0])
+        self.cascade('propagate_position', others=layer)
+
+    def run_sub_engines(self):
+        """ Run sub-engines in the first layer on a process pool. Each
+        sub-engine is replaced with the copy returned from the worker. """
+        root_layer = self[0]
+        n_jobs = min(self.n_jobs, len(root_layer))
+        logger.info('Running {} sub-engines on {} processes'
+                    .format(len(root_layer), n_jobs))
+        root_layer.run_parallel('run_layers', n_jobs=n_jobs)
+
+    def run_layers(self):
+        """ Run all layers of this engine in the current process without
+        compiling or caching """
+        scheduler = Scheduler()
+        self.schedule(scheduler)
+        scheduler.run()
+
+    def schedule(self, scheduler):
+        """ Add the backtest of this engine to a scheduler as a chain of
+        tasks, one per layer. If the first layer consists of Engine, they
+        run as one task on a process pool if n_jobs is greater than 1 and
+        otherwise each of them is added as a branch which runs in turn in the
+        current process. The second layer waits for all of them.
+
+        :param scheduler: Scheduler object
+        :return: list of task names which complete this engine
+        """
+        last_tasks = self._schedule_root(scheduler)
+        for layer_idx in range(1, len(self)):
+            task_name = self._task_name(layer_idx)
+            scheduler.add(task_name, partial(self.run_layer, layer_idx),
+                          depends_on=last_tasks)
+            last_tasks = [task_name]
+
+        return last_tasks
+
+    def _schedule_root(self, scheduler):
+        """ Add tasks of the first layer to a scheduler and return the list
+        of task names which complete it """
+        root_layer = self[0]
+        if not all([isinstance(item, Engine) for item in root_layer]):
+            task_name = self._task_name(0)
+            scheduler.add(task_name, partial(self.run_root_layer, 'backtest'))
+            return [task_name]
 
-        for layer_idx, layer in enumerate(self):
-            if layer_idx == 0:
-                # set up the first layer (usually LongOnly)
-                layer.run('backtest')
+        if min(self.n_jobs, len(root_layer)) > 1:
+            task_name = self._task_name(0)
+            scheduler.add(task_name, self.run_sub_engines)
+            return [task_name]
 
-            else:
-                layer.run('backtest', others=root_layer)
-                self.cascade('propagate_position', others=layer)
+        last_tasks = []
+        for item in root_layer:
+            last_tasks += item.schedule(scheduler)
+        return last_tasks
+
+    def _task_name(self, layer_idx):
+        """ Return a unique task name for a layer of this engine """
+        return '{}({}):{}'.format(self.name, id(self), layer_idx)
+
+    def backtest(self):
+        """ Run the layers by calling their functions in order. Sub-engines
+        in the first layer run in parallel only if n_jobs is greater than 1,
+        in which case they are run by run_sub_engines on a process pool.
+
+        If use_cache is True, results saved by a previous run with the same
+        parameters and input data are loaded instead of running the layers.
 
+        If profile is True, wall time and call counts of layers, items and
+        contract steps are recorded to self.profiler. Memory allocated is
+        recorded as well if profile_memory is True.
+        """
+        if not self.backtest_params[keys.profile]:
+            self._backtest()
+            return
+
+        self.profiler = Profiler(
+            trace_memory=self.backtest_params[keys.profile_memory])
+        with profiling(self.profiler):
+            with timed('Engine.backtest', self.name):
+                self._backtest()
+
+    def _backtest(self):
+        with timed('Engine.compile', self.name):
+            self.compile()
+        self.cached_results = None
+        # fx rates are read again in case they are updated
+        get_fx_service().clear()
+        use_cache = self.backtest_params[keys.use_cache]
+        if use_cache and self.load_results():
+            logger.info('Backtest results loaded: {}'.format(self.symbol))
+            return
+
+        scheduler = Scheduler()
+        self.schedule(scheduler)
+        scheduler.run()
+
+        if use_cache:
+            self.save_results()
         logger.info('Backtest completed')
+
+    def sweep(self, grid, is_gross=False):
+        """ Run backtests for every combination of parameters in grid.
+
+        Parameters are applied to all items in the layers above the first
+        one which have them either directly or in their method parameters
+        (e.g., vs_window in vs_method_params). The first layer and the
+        layers below the first one having swept parameters are run only
+        once. For each combination positions of contracts are restored and
+        the remaining layers are run again, so that each combination costs
+        a backtest of those layers and the returns of all contracts with new
+        positions (returns depend on positions through the base price).
+        Values which only depend on data (price changes and fx adjustments)
+        are computed once. Positions of contracts are reset to those before
+        the first layer having swept parameters after the sweep.
+
+        :param grid: dict of parameter name -> list of values
+        :param is_gross: bool. If True gross returns are returned otherwise
+        net returns.
+        :return: DataFrame of final returns with a column per combination
+        """
+        if len(self) < 2:
+            raise ValueError('Engine must have layers other than the first one '
+                             'to sweep parameters.')
+
+        swept = [idx for idx in range(1, len(self))
+                 if any(set(grid).intersection(_param_names(item))
+                        for item in self[idx])]
+        unknown = set(grid).difference(
+            *[_param_names(item) for layer in self[1:] for item in layer])
+        if len(unknown) > 0:
+            raise KeyError('Parameters not found in layers: {}'
+                           .format(sorted(unknown)))
+
+        self.compile()
+        self.cached_results = None
+        logger.info('Sweep started: {} combinations'
+                    .format(len(list(_iter_grid(grid)))))
+
+        scheduler = Scheduler()
+        self._schedule_root(scheduler)
+        scheduler.run()
+        first_idx = swept[0] if len(swept) > 0 else 1
+        for layer_idx in range(1, first_idx):
+            self.run_layer(layer_idx)
+        self.cascade('save_positions')
+
+        original_items = [layer.items for layer in self[first_idx:]]
+        results = []
+        try:
+            for overrides in _iter_grid(grid):
+                logger.debug('Sweep: {}'.format(overrides))
+                self.cascade('restore_positions')
+                for layer, items in zip(self[first_idx:], original_items):
+                    layer.items = [_override_item(item, overrides)
+                                   for item in items]
+
+                for layer_idx in range(first_idx, len(self)):
+                    self.run_layer(layer_idx)
+
+                if is_gross:
+                    results.append(self.get_final_gross_returns())
+                else:
+                    results.append(self.get_final_net_returns())
+        finally:
+            for layer, items in zip(self[first_idx:], original_items):
+                layer.items = items
+            self.cascade('restore_positions')
+
+        results = pd.concat(results, axis=1)
+        results.columns = _grid_columns(grid)
+        logger.info('Sweep completed')
+        return results
+
+
+def _iter_grid(grid):
+    """ Yield a dict of parameters for each combination in grid """
+    names = list(grid.keys())
+    for values in product(*[grid[name] for name in names]):
+        yield dict(zip(names, values))
+
+
+def _grid_columns(grid):
+    """ Return column labels for combinations in grid. Values which can't
+    be used as labels (e.g., signal windows) are converted to strings. """
+    names = list(grid.keys())
+    labels = [[v if isinstance(v, (int, float, str, type(None))) else str(v)
+               for v in grid[name]] for name in names]
+    if len(names) == 1:
+        return pd.Index(labels[0], name=names[0])
+    return pd.MultiIndex.from_product(labels, names=names)
+
+
+def _param_names(item):
+    """ Return names of parameters of item including those in its method
+    parameters """
+    names = set(item.backtest_params)
+    for method_params in item.backtest_params.values():
+        if isinstance(method_params, dict):
+            names.update(method_params)
+    return names
+
+
+def _override_item(item, overrides):
+    """ Return a new object of the same class as item whose parameters are
+    replaced by overrides """
+    params = deepcopy(item.backtest_params)
+    for key, value in overrides.items():
+        if key in params:
+            params[key] = value
+            continue
+        for method_params in params.values():
+            if isinstance(method_params, dict) and key in method_params:
+                method_params[key] = value
+    return item.__class__(**params)
@@ -1,3 +1,29 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from ..utils.profiler import Profiler, get_profiler, profiling, timed
+
+
+def _run_item(item, func_name, trace_memory=None):
+    """ Run a function of an item in a worker process and send the item
+    back to the parent process together with the statistics of the steps
+    if profiling
+
+    :param trace_memory: None if the parent process isn't profiling.
+    Otherwise trace_memory of the Profiler of the parent process.
+    :return: tuple of the item and a dict of statistics (None if not
+    profiling)
+    """
+    if trace_memory is None:
+        getattr(item, func_name)()
+        return item, None
+
+    # the profiler inherited from the parent process isn't sent back
+    profiler = Profiler(trace_memory=trace_memory)
+    with profiling(profiler):
+        getattr(item, func_name)()
+    return item, profiler.stats
+
+
 class Layer(object):
     def __init__(self, items):
         if isinstance(items, list):
@@ -26,22 +52,55 @@ class Layer(object):
         :return: 
         """
 
-        if others is None:
-            for item in self:
-                getattr(item, func_name)()
-        else:
-            if len(self) == len(others):
-                for item, other in zip(self, others):
-                    getattr(item, func_name)(other)
+        with timed('Layer.run', func_name):
+            if others is None:
+                for item in self:
+                    self._call_item(item, func_name)
+            else:
+                if len(self) == len(others):
+                    for item, other in zip(self, others):
+                        self._call_item(item, func_name, other)
 
-            elif len(self) == 1:
-                getattr(self[0], func_name)(others)
+                elif len(self) == 1:
+                    self._call_item(self[0], func_name, others)
 
-            elif len(others) == 1:
-                for item in self:
-                    getattr(item, func_name)(others[0])
+                elif len(others) == 1:
+                    for item in self:
+                        self._call_item(item, func_name, others[0])
 
-            else:
-                raise ValueError('Lengths mismatch.\n'
-                                 'Self = {} while others = {}'
-                                 .format(len(self), len(others)))
+                else:
+                    raise ValueError('Lengths mismatch.\n'
+                                     'Self = {} while others = {}'
+                                     .format(len(self), len(others)))
+
+    @staticmethod
+    def _call_item(item, func_name, *args):
+        """ Run a function of an item and record it to the profiler """
+        func = getattr(item, func_name)
+        with timed('{}.{}'.format(item.__class__.__name__, func_name), item):
+            func(*args)
+
+    def run_parallel(self, func_name, n_jobs):
+        """ Run a function given by func_name in a process pool
+
+        Each item is sent to a worker process and replaced with the copy
+        returned from the worker so that the results computed there (e.g.,
+        contracts of LongOnly) are available in the parent process. Steps
+        recorded in the workers are added to the active Profiler.
+
+        :param func_name: string representing a function name to run
+        :param n_jobs: maximum number of worker processes
+        :return:
+        """
+        profiler = get_profiler()
+        trace_memory = None if profiler is None else profiler.trace_memory
+        with timed('Layer.run_parallel', func_name):
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                results = list(executor.map(_run_item, self.items,
+                                            [func_name] * len(self),
+                                            [trace_memory] * len(self)))
+
+        self.items = [item for item, _ in results]
+        for _, stats in results:
+            if stats is not None:
+                profiler.merge(stats)
@@ -1,19 +1,32 @@
 import abc
+from concurrent.futures import ThreadPoolExecutor
 from copy import copy
-from datetime import datetime
 
+import numpy as np
 import pandas as pd
 import quandl
+from arctic.exceptions import NoDataFoundException
 
 from .base import BaseBacktestObject
-from .contract import QuandlFutures
+from .contract import QuandlFutures, get_read_kwargs
+from .panel import ContractPanel
 from ..utils import keys
-from ..utils.const import FuturesInfo, DEFAULT_ROLL_RULE, FutureContractMonth
+from ..utils.const import (FuturesInfo, DEFAULT_ROLL_RULE, LISTING_HORIZON,
+                           QUANDL_TICKER_FORMAT, DATA_COLUMNS)
 from ..utils.date import date_shift
 from ..utils.dict import merge_dicts
+from ..utils.downloader import get_downloader
+from ..utils.fx import get_fx_service
+from ..utils.hash import to_hash
 from ..utils.logging import get_logger
-from ..utils.quandl import (next_fut_ticker, futures_contract_month, year,
-                            get_tickers_from_db, to_yyyymm)
+from ..utils.manifest import (EXPIRED, VERSION, get_entries, make_entry,
+                              write_manifest)
+from ..utils.mongo import get_library, iter_read
+from ..utils.profiler import profiled
+from ..utils.universe import list_contracts
+from ..utils.quandl import get_tickers_from_db, to_yyyymm
+from ..utils.roll_calendar import get_roll_calendar_service
+from ..utils.trading_calendar import get_calendar_key, get_ticker_calendar
 
 logger = get_logger(name=__name__)
 
@@ -25,6 +38,8 @@ class LongOnly(BaseBacktestObject):
         backtest_params = self.init_params(**backtest_params)
         super(LongOnly, self).__init__(**backtest_params)
         self.contracts = None
+        self.panel = None
+        self._saved_positions = None
 
     def __repr__(self):
         return '{}({})'.format(self.__class__.__name__, self[keys.lo_ticker])
@@ -53,12 +68,18 @@ class LongOnly(BaseBacktestObject):
         backtest_params.setdefault(keys.force_download, False)
         backtest_params.setdefault(keys.slippage, 0.0)
         backtest_params.setdefault(keys.price_source, keys.pcs_quandl_futures)
+        backtest_params.setdefault(keys.incremental, False)
         return backtest_params
 
     @property
     def name(self):
         return self[keys.lo_ticker]
 
+    @property
+    def calendar(self):
+        """ Trading calendar of the instrument. None for weekdays """
+        return None
+
     def get_final_gross_returns(self):
         """ Return gross long-only return series """
         return (self.aggregate_contract_returns(is_gross=True)
@@ -71,18 +92,15 @@ class LongOnly(BaseBacktestObject):
 
     def get_final_positions(self):
         """ Return aggregated positions for long-only returns """
-        return (self.get_individual_positions()
-                .sum(axis=1)
+        return (self.panel.sum([c.get_final_positions()
+                                for c in self.contracts])
                 .rename('final_positions ({})'.format(self.name)))
 
     def get_individual_positions(self, date_range=None):
         """ Return individual positions for each underlying contracts """
-        positions = (pd.concat([c.get_final_positions().rename(c.name)
-                                for c in self.contracts], axis=1))
-        if date_range is not None:
-            positions = positions.loc[date_range, :]
-
-        return positions.dropna(how='all', axis=1)
+        positions = self.panel.scatter([c.get_final_positions()
+                                        for c in self.contracts])
+        return self.panel.to_frame(positions, date_range)
 
     def aggregate_contract_returns(self, is_gross):
         """ Sum up returns for each contract
@@ -91,9 +109,8 @@ class LongOnly(BaseBacktestObject):
         returns after subtracting transaction cost estimates.
         :return:
         """
-        return (pd.concat([c.get_final_returns(is_gross=is_gross)
-                           for c in self.contracts], axis=1)
-                .sum(axis=1))
+        return self.panel.sum([c.get_final_returns(is_gross=is_gross)
+                               for c in self.contracts])
 
     @abc.abstractmethod
     def backtest(self, *args, **kwargs):
@@ -107,6 +124,10 @@ class LongOnly(BaseBacktestObject):
     def update_database(self):
         """ Update database if necessary for underlying contract objects """
 
+    @abc.abstractmethod
+    def get_data_versions(self):
+        """ Return a dict of stored data versions used for the backtest """
+
     def propagate_position(self, other):
         """ Propagate position to individual contract level """
         for contract in self.contracts:
@@ -124,7 +145,19 @@ class LongOnly(BaseBacktestObject):
             else:
                 raise NotImplementedError()
 
-            contract.position = contract.position.join(other_position)
+            contract.position.add_layer(other_position)
+            contract.clear_cache(keep_data=True)
+
+    def save_positions(self):
+        """ Keep current positions of the contracts so that they can be
+        restored after running other layers """
+        self._saved_positions = [c.position.copy() for c in self.contracts]
+
+    def restore_positions(self):
+        """ Restore positions kept by save_positions """
+        for contract, position in zip(self.contracts, self._saved_positions):
+            contract.position = position.copy()
+            contract.clear_cache(keep_data=True)
 
     def set_return_currency(self, currency):
         """ Propagate return currency to individual contract level """
@@ -136,10 +169,15 @@ class LongOnly(BaseBacktestObject):
     def set_backtest_end_date(self, backtest_end_date):
         self[keys.backtest_end_date] = backtest_end_date
 
+    def set_incremental(self, incremental):
+        self[keys.incremental] = incremental
+
 
 class LongOnlyQuandlFutures(LongOnly):
     def __init__(self, **backtest_params):
         super(LongOnlyQuandlFutures, self).__init__(**backtest_params)
+        # tickers of contracts restored from snapshots of cleaned data
+        self._restored = set()
 
     def init_params(self, **backtest_params):
         ticker = backtest_params[keys.lo_ticker]
@@ -149,20 +187,228 @@ class LongOnlyQuandlFutures(LongOnly):
         backtest_params.setdefault(keys.backtest_ccy,
                                    backtest_params[keys.contract_ccy])
         backtest_params.setdefault(keys.nth_contract, 1)
+        backtest_params.setdefault(keys.data_columns, list(DATA_COLUMNS))
         backtest_params[keys.is_spliced] = ticker in _splice_func_map
 
         # common params for LongOnly
         backtest_params = super(LongOnlyQuandlFutures, self).init_params(**backtest_params)
         return backtest_params
 
+    @property
+    def generic_ticker(self):
+        """ Generic quandl ticker such as CME/ES """
+        return self[keys.lo_ticker].replace('_', '/')
+
+    @property
+    def calendar(self):
+        """ Trading calendar of the exchange """
+        return get_ticker_calendar(self[keys.lo_ticker])
+
     @property
     def first_ticker(self):
-        return self[keys.lo_ticker].replace('_', '/') + self[keys.start_from]
+        return self.generic_ticker + self[keys.start_from]
+
+    @property
+    def state_symbol(self):
+        """ Symbol used for saving contracts in MongoDB """
+        params = {k: v for k, v in self.backtest_params.items()
+                  if k not in [keys.backtest_start_date,
+                               keys.backtest_end_date, keys.incremental]}
+        return '{}_{}'.format(self.name, to_hash(params))
+
+    def _state_metadata(self):
+        """ Return metadata which identifies the saved contracts together
+        with state_symbol """
+        start_date = self[keys.backtest_start_date]
+        end_date = self[keys.backtest_end_date]
+        return {
+            keys.backtest_start_date: None if start_date is None
+            else start_date.strftime('%Y-%m-%d'),
+            keys.backtest_end_date: None if end_date is None
+            else end_date.strftime('%Y-%m-%d'),
+            keys.trading_calendar: get_calendar_key([self.calendar]),
+        }
 
     def backtest(self, *args, **kwargs):
-        """ Run backtest """
+        """ Run backtest. If incremental is True, contracts are rebuilt from
+        the state saved by the previous backtest and extended instead of
+        looking up all roll dates again. """
         logger.info('Run layers: {}'.format(self))
-        self.contracts = self.get_contracts()
+        contracts = None
+        self._restored = set()
+        if self[keys.incremental]:
+            state = self.load_state()
+            if state is not None:
+                contracts = self.extend_contracts(state)
+
+        if contracts is None:
+            self._restored = set()
+            contracts = self.get_contracts()
+        self.contracts = contracts
+        self.panel = ContractPanel(contracts)
+
+        if self[keys.incremental]:
+            self.save_state()
+
+    def load_state(self):
+        """ Load the state saved by the previous backtest. Return None if
+        not found """
+        library = get_library(keys.backtest)
+        try:
+            item = library.read(self.state_symbol)
+        except NoDataFoundException:
+            logger.info('No saved contracts found: {}'.format(self))
+            return None
+
+        if item.metadata != self._state_metadata():
+            logger.info('Backtest period changed: {}'.format(self))
+            return None
+        return item.data
+
+    def save_state(self):
+        """ Save roll dates, data versions and expiry of the contracts to
+        MongoDB. Cleaned data of expired contracts is saved once per data
+        version as a snapshot so that it's neither read nor cleaned again
+        while the stored data is the same. """
+        library = get_library(keys.backtest)
+        entries = get_entries(self.generic_ticker)
+        expired = [c.is_expired or entries.get(c.name, {}).get(EXPIRED, False)
+                   for c in self.contracts]
+        for contract, is_expired in zip(self.contracts, expired):
+            if is_expired and contract.name not in self._restored:
+                library.write(self._snapshot_symbol(contract.name),
+                              contract.data,
+                              metadata=self._snapshot_metadata(
+                                  contract.data_version))
+
+        state = pd.DataFrame({
+            keys.start_date: [c[keys.start_date] for c in self.contracts],
+            keys.end_date: [c[keys.end_date] for c in self.contracts],
+            keys.data_version: [c.data_version for c in self.contracts],
+            EXPIRED: expired,
+        }, index=pd.Index([c.name for c in self.contracts],
+                          name=keys.quandl_ticker),
+            columns=[keys.start_date, keys.end_date, keys.data_version,
+                     EXPIRED])
+        library.write(self.state_symbol, state,
+                      metadata=self._state_metadata())
+
+    def _snapshot_symbol(self, ticker):
+        """ Symbol of the cleaned data of a contract saved by save_state """
+        return '{}/{}'.format(self.state_symbol, ticker)
+
+    def _snapshot_metadata(self, data_version):
+        """ Metadata which identifies a snapshot of a contract together with
+        its symbol """
+        metadata = self._state_metadata()
+        metadata[keys.data_version] = data_version
+        return metadata
+
+    def _load_snapshot(self, ticker, data_version):
+        """ Return cleaned data of a contract saved by save_state. None if
+        not found or saved from another version of the data """
+        library = get_library(keys.backtest)
+        try:
+            item = library.read(self._snapshot_symbol(ticker))
+        except NoDataFoundException:
+            return None
+        if item.metadata != self._snapshot_metadata(data_version):
+            return None
+        return item.data
+
+    def extend_contracts(self, state):
+        """ Rebuild contracts saved by the previous backtest.
+
+        Expired contracts whose stored data hasn't changed are restored
+        from the snapshots of their cleaned data. Other contracts, including
+        those whose data has been revised, are read again (through the cache
+        of the library) and cleaned. Base positions of all of them are
+        determined by the saved roll dates. Contracts listed after the last
+        one are added in the same way as get_contracts.
+
+        :param state: DataFrame of roll dates, data versions and expiry of
+        the contracts saved by save_state
+        :return: list of contracts. None if the list of available contracts
+        has changed in which case all contracts must be rebuilt.
+        """
+        all_tickers = self.get_all_tickers()
+        names = list(state.index)
+        if len(names) == 0 or names[0] not in all_tickers:
+            return None
+        first_idx = all_tickers.index(names[0])
+        if all_tickers[first_idx:first_idx + len(names)] != names:
+            logger.info('Available contracts changed: {}'.format(self))
+            return None
+
+        library = get_library(keys.quandl_contract)
+        versions = [i.version for i in iter_read(library, names,
+                                                 method='read_metadata')]
+        snapshots = dict()
+        for name, version, saved_version, is_expired in zip(
+                names, versions, state[keys.data_version], state[EXPIRED]):
+            if version != saved_version:
+                logger.info('Data revised: {}'.format(name))
+            elif is_expired:
+                data = self._load_snapshot(name, version)
+                if data is not None:
+                    snapshots[name] = (data, version)
+
+        contracts = []
+        items = iter_read(library, [i for i in names if i not in snapshots],
+                          **get_read_kwargs(self.backtest_params))
+        try:
+            for name, start_date, end_date in zip(
+                    names, state[keys.start_date], state[keys.end_date]):
+                start_date = None if pd.isnull(start_date) else start_date
+                contract = self._new_contract(name)
+                if name in snapshots:
+                    data, version = snapshots[name]
+                    contract.restore(data, start_date, end_date, version)
+                    self._restored.add(name)
+                else:
+                    contract.backtest(start_date, end_date, item=next(items))
+                    contract._trim_data()
+                if len(contract.data) == 0:
+                    return None
+                contracts.append(contract)
+        finally:
+            items.close()
+
+        # add contracts listed after the last one
+        roll_dates = self.get_roll_dates(all_tickers)
+        start_date = date_shift(contracts[-1][keys.end_date], '+1bd')
+        for idx in range(first_idx + len(names), len(all_tickers)):
+            if self[keys.backtest_end_date] is not None:
+                if start_date > self[keys.backtest_end_date]:
+                    break
+
+            end_date = roll_dates[idx - self[keys.nth_contract] + 1]
+            contract = self._new_contract(all_tickers[idx])
+            contract.backtest(start_date, end_date)
+            start_date = date_shift(end_date, '+1bd')
+
+            contract._trim_data()
+            if len(contract.data) > 0:
+                contracts.append(contract)
+
+        return contracts
+
+    def get_roll_dates(self, tickers):
+        """ Return a list of roll dates of tickers looked up in the roll
+        calendar of the instrument """
+        calendar = get_roll_calendar_service().get_calendar(
+            self[keys.lo_ticker], self[keys.last_trade_date],
+            first_notice_date=self[keys.first_notice_date],
+            roll_rule=DEFAULT_ROLL_RULE,
+            yyyymms=[to_yyyymm(t) for t in tickers],
+            trading_calendar=self.calendar)
+        return calendar.get_roll_dates(tickers)
+
+    def _new_contract(self, ticker):
+        """ Return a contract object for a ticker """
+        params = copy(self.backtest_params)
+        params[keys.quandl_ticker] = ticker  # individual
+        return QuandlFutures(**params)
 
     def get_individual_prices(self, date_range=None, keys=None):
         """ Return concatenated price data from all contracts
@@ -172,17 +418,11 @@ class LongOnlyQuandlFutures(LongOnly):
         :return:
         """
         if keys is None:
-            all_prices = pd.concat([i.price_for_return
-                                    for i in self.contracts], axis=1)
+            all_prices = self.panel.price
         else:
-            all_prices = pd.concat([i.data[keys]
-                                    for i in self.contracts], axis=1)
-
-        if date_range is not None:
-            all_prices = all_prices.loc[date_range, :]
-
-        all_prices.columns = [i.name for i in self.contracts]
-        return all_prices.dropna(how='all', axis=1)
+            all_prices = self.panel.scatter([i.data[keys]
+                                             for i in self.contracts])
+        return self.panel.to_frame(all_prices, date_range)
 
     def get_futures_curve(self, date):
         """ Return futures curve for a given date
@@ -195,61 +435,80 @@ class LongOnlyQuandlFutures(LongOnly):
     def get_generic_volume(self):
         """ Return historical trading volume of contracts that are used for
         long-only performance """
-        base_positions = pd.concat([i.position['base'].rename(i.name)
-                                    for i in self.contracts], axis=1)
-
-        if self.contracts[0].has_volume:
-            key_name = self.contracts[0].get_volume_key()
-            volume = pd.concat([i.data[key_name].rename(i.name)
-                                for i in self.contracts], axis=1)
-            return base_positions.mul(volume).sum(axis=1).rename(key_name)
+        if self.panel.volume is not None:
+            volume = np.nansum(self.panel.base * self.panel.volume, axis=1)
+            return pd.Series(volume, index=self.panel.index,
+                             name=self.panel.volume_key)
         else:
             # return NaN if volume doesn't exist
-            return pd.Series(index=base_positions.index)
+            return pd.Series(index=self.panel.index)
 
-    def get_contracts(self):
-        """ Return a list of available futures contract objects """
-        contracts = []
-        start_date = None
+    def get_all_tickers(self):
+        """ Return a sorted list of contract tickers available for the
+        backtest period """
         if self[keys.backtest_start_date] is not None:
             start_yyyymm = int(self[keys.backtest_start_date].strftime('%Y%m'))
         else:
             start_yyyymm = 190001
 
         if self[keys.is_spliced]:
-            all_tickers = _splice_func_map[self[keys.lo_ticker]](
+            return _splice_func_map[self[keys.lo_ticker]](
                 start_yyyymm=start_yyyymm
             )
         else:
-            all_tickers = get_tickers_from_db(self[keys.lo_ticker]
-                                              .replace('_', '/'),
-                                              start_yyyymm=start_yyyymm)
-
-        for idx, ticker in enumerate(all_tickers):
-            # all tickers are instantiated regardless of nth_contract as
-            # old contracts might be used to get roll dates.
-            params = copy(self.backtest_params)
-            params[keys.quandl_ticker] = ticker  # individual
-            contract = QuandlFutures(**params)
+            return get_tickers_from_db(self.generic_ticker,
+                                       start_yyyymm=start_yyyymm)
+
+    def get_data_versions(self):
+        """ Return stored versions of the contracts and fx rates used for
+        the backtest. Only metadata is read from the database. """
+        versions = dict()
+        library = get_library(keys.quandl_contract)
+        for item in iter_read(library, self.get_all_tickers(),
+                              method='read_metadata'):
+            versions[item.symbol] = item.version
+
+        if self[keys.contract_ccy] != self[keys.backtest_ccy]:
+            library = get_library(keys.fx_rates)
+            fx_service = get_fx_service()
+            for currency in [self[keys.contract_ccy], self[keys.backtest_ccy]]:
+                for symbol in fx_service.symbols(currency):
+                    versions['{}/{}'.format(keys.fx_rates, symbol)] = (
+                        library.read_metadata(symbol).version)
+        return versions
+
+    @profiled(per_item=True)
+    def get_contracts(self):
+        """ Return a list of available futures contract objects """
+        contracts = []
+        start_date = None
+        all_tickers = self.get_all_tickers()
+        nth_contract = self[keys.nth_contract]
+        roll_dates = self.get_roll_dates(all_tickers)
+
+        # contracts before nth_contract are only used for roll dates and
+        # their data is not read.
+        library = get_library(keys.quandl_contract)
+        items = iter_read(library, all_tickers[nth_contract - 1:],
+                          **get_read_kwargs(self.backtest_params))
+
+        for idx in range(nth_contract - 1, len(all_tickers)):
+            # the contract is held until the roll date of the contract
+            # nth_contract - 1 before
+            end_date = roll_dates[idx - nth_contract + 1]
+            contract = self._new_contract(all_tickers[idx])
+            contract.backtest(start_date, end_date, item=next(items))
             contracts.append(contract)
+            start_date = date_shift(end_date, '+1bd')
 
-            if idx >= self[keys.nth_contract] - 1:
-                contract_for_roll = contracts[idx - self[keys.nth_contract]
-                                              + 1]
-                end_date = contract_for_roll.get_roll_date(DEFAULT_ROLL_RULE)
-                contract.backtest(start_date, end_date)
-                start_date = date_shift(end_date, '+1bd')
-
-                # Trim position and data baed on backtest period
-                contract._trim_data()
-                if self[keys.backtest_end_date] is not None:
-                    if start_date > self[keys.backtest_end_date]:
-                        break
+            # Trim position and data baed on backtest period
+            contract._trim_data()
+            if self[keys.backtest_end_date] is not None:
+                if start_date > self[keys.backtest_end_date]:
+                    break
 
-        # Remove contracts that are not used
-        # For instance, if we want to use second contract,
-        # the very first contract is not necessary for the backtest
-        contracts = contracts[(self[keys.nth_contract] - 1):]
+        # stop reading ahead
+        items.close()
 
         # Remove ones that are completely trimmed
         contracts = [i for i in contracts if len(i.data) > 0]
@@ -257,29 +516,84 @@ class LongOnlyQuandlFutures(LongOnly):
         return contracts
 
     def update_database(self):
-        """ Update database if necessary for underlying contract objects """
-        ticker = self.first_ticker
-
-        while True:
-            try:
-                params = copy(self.backtest_params)
-                params[keys.quandl_ticker] = ticker  # individual
-                logger.info('Checking if new data exists: {}'.format(ticker))
-
-                contract = QuandlFutures(**params)
-                contract.update_database()
-
-            except (quandl.NotFoundError, IndexError):
-                # if the requesting contract is far future
-                # Usually quandl throws NotFoundError, but sometimes it gets
-                # IndexError.
-                m = FutureContractMonth[futures_contract_month(ticker)]
-                tmp_last_dt = datetime(year(ticker), m.value, 1)
-                tmp_last_dt = date_shift(tmp_last_dt, "+MonthEnd")
-                if tmp_last_dt.date() > datetime.today().date():
-                    break
-
-            ticker = next_fut_ticker(ticker, self[keys.roll_schedule])
+        """ Update database if necessary for underlying contract objects.
+        Contracts which should be listed today according to the futures
+        calendar are updated on threads in one batch. The manifest of the
+        contracts is updated at the end so that expired contracts are not
+        read next time. Entries of contracts updated are written even if
+        updating other contracts fails.
+        """
+        entries = get_entries(self.generic_ticker)
+        tickers = self.get_listed_tickers()
+        results = dict()
+
+        def update(ticker):
+            results[ticker] = self._update_contract(ticker,
+                                                    entries.get(ticker))
+
+        n_workers = min(get_downloader().n_workers, len(tickers))
+        try:
+            if n_workers > 1:
+                # unlike map, submitted updates are not cancelled when one
+                # of them fails and all finish before leaving the executor
+                with ThreadPoolExecutor(max_workers=n_workers) as executor:
+                    futures = [executor.submit(update, t) for t in tickers]
+                for future in futures:
+                    future.result()
+            else:
+                for ticker in tickers:
+                    update(ticker)
+        finally:
+            entries.update({t: entry for t, entry in results.items()
+                            if entry is not None})
+            if len(entries) > 0:
+                write_manifest(self.generic_ticker, entries)
+
+    def get_listed_tickers(self, as_of=None):
+        """ Return a list of tickers which should be listed as of a date
+        from the first ticker """
+        return list_contracts(self.first_ticker, self[keys.roll_schedule],
+                              self[keys.last_trade_date],
+                              LISTING_HORIZON[self[keys.asset_class]],
+                              as_of=as_of)
+
+    def build_manifest(self):
+        """ Build the manifest of contracts already stored so that contracts
+        written without update_database (e.g., by copy_library) are
+        registered. Entries of contracts whose stored version is unchanged
+        are kept and only new or revised contracts are read. """
+        library = get_library(keys.quandl_contract)
+        symbol_regex = QUANDL_TICKER_FORMAT.format(self.generic_ticker)
+        tickers = library.list_symbols(regex=symbol_regex)
+        old_entries = get_entries(self.generic_ticker)
+        entries = dict()
+        for item in iter_read(library, tickers, method='read_metadata'):
+            entry = old_entries.get(item.symbol)
+            if entry is not None and entry[VERSION] == item.version:
+                entries[item.symbol] = entry
+        to_read = [t for t in tickers if t not in entries]
+        for item in iter_read(library, to_read):
+            contract = self._new_contract(item.symbol)
+            contract.check_if_expired(item.data)
+            entries[item.symbol] = make_entry(to_yyyymm(item.symbol),
+                                              item.data, item.version,
+                                              contract.is_expired)
+        if len(to_read) > 0 or len(entries) != len(old_entries):
+            write_manifest(self.generic_ticker, entries)
+
+    def _update_contract(self, ticker, entry=None):
+        """ Update database of a contract. Return the manifest entry of the
+        contract or None if the contract is not found """
+        params = copy(self.backtest_params)
+        params[keys.quandl_ticker] = ticker  # individual
+        logger.info('Checking if new data exists: {}'.format(ticker))
+        try:
+            return QuandlFutures(**params).update_database(entry=entry)
+        except (quandl.NotFoundError, IndexError):
+            # Usually quandl throws NotFoundError, but sometimes it gets
+            # IndexError.
+            logger.info('Contract not found: {}'.format(ticker))
+            return None
 
 
 class LongOnlyTrueFX(LongOnly):
@@ -328,6 +642,16 @@ def splice_ym_and_dj(start_yyyymm=None, end_yyyymm=None):
     return _get_spliced_symbols(lo_tickers, ranges, start_yyyymm, end_yyyymm)
 
 
+def get_common_calendar(items):
+    """ Return the trading calendar shared by all items. None (weekdays) if
+    items have different calendars or are not LongOnly objects. """
+    calendars = set(i.calendar if isinstance(i, LongOnly) else None
+                    for i in items)
+    if len(calendars) == 1:
+        return calendars.pop()
+    return None
+
+
 _splice_func_map = {
     FuturesInfo.CME_ES._name_: splice_es_and_sp,
     FuturesInfo.CME_NQ._name_: splice_nq_and_nd,
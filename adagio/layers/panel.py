@@ -0,0 +1,84 @@
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+
+class ContractPanel(object):
+    """ Data of futures contracts aligned to the union of their dates.
+
+    Prices, volume and base positions are stored as 2D arrays (dates x
+    contracts) when the panel is built. Other values of contracts (e.g.,
+    final returns) are placed in the panel using the row indexer of each
+    contract, which is computed only once. """
+
+    def __init__(self, contracts):
+        """
+        :param contracts: list of QuandlFutures objects after backtest
+        """
+        self.names = [c.name for c in contracts]
+        self.index = pd.DatetimeIndex([])
+        if len(contracts) > 0:
+            self.index = reduce(lambda x, y: x.union(y),
+                                [c.data.index for c in contracts])
+        self.rows = [self.index.get_indexer(c.data.index) for c in contracts]
+
+        self.price = self.scatter([c.price_for_return for c in contracts])
+        self.base = self.scatter([c.position['base'] for c in contracts])
+        if len(contracts) > 0 and contracts[0].has_volume:
+            self.volume_key = contracts[0].get_volume_key()
+            self.volume = self.scatter([c.data[self.volume_key]
+                                        for c in contracts])
+        else:
+            self.volume_key = None
+            self.volume = None
+
+    def __repr__(self):
+        return '{}({})'.format(self.__class__.__name__, self.names)
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def shape(self):
+        return len(self.index), len(self.names)
+
+    def scatter(self, series_list):
+        """ Return a 2D array (dates x contracts) of values given by a list
+        of series, one for each contract. Missing values are NaN.
+
+        :param series_list: list of series indexed by the contract dates
+        :return:
+        """
+        values = np.full(self.shape, np.nan)
+        for col, (rows, series) in enumerate(zip(self.rows, series_list)):
+            values[rows, col] = series.values
+        return values
+
+    def sum(self, series_list):
+        """ Return the sum of series across contracts. Dates when no contract
+        has a value are 0 """
+        total = np.zeros(len(self.index))
+        for rows, series in zip(self.rows, series_list):
+            values = series.values
+            total[rows] += np.where(np.isnan(values), 0.0, values)
+        return pd.Series(total, index=self.index)
+
+    def to_frame(self, values, date_range=None):
+        """ Return a DataFrame of a 2D array in the panel with contract names
+        as columns. Contracts without values are dropped.
+
+        :param values: 2D array (dates x contracts)
+        :param date_range: slice or list of dates
+        :return:
+        """
+        if isinstance(date_range, slice):
+            indexer = self.index.slice_indexer(date_range.start,
+                                               date_range.stop)
+            frame = pd.DataFrame(values[indexer], index=self.index[indexer],
+                                 columns=self.names)
+        else:
+            frame = pd.DataFrame(values, index=self.index, columns=self.names)
+            if date_range is not None:
+                frame = frame.loc[date_range, :]
+        return frame.dropna(how='all', axis=1)
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+
+# number of layers for which columns are allocated in advance
+DEFAULT_CAPACITY = 8
+
+
+class PositionMatrix(object):
+    """ Positions of a contract for each layer stored in a 2D array aligned
+    to the data index. The product of all layers (final positions) is
+    updated in place every time a layer is added. """
+
+    def __init__(self, base, capacity=DEFAULT_CAPACITY):
+        """
+        :param base: Series of base positions. Its name is used as the
+        column name.
+        :param capacity: number of columns allocated in advance
+        """
+        self.index = base.index
+        self.names = [base.name]
+        self.values = np.empty((len(base), max(capacity, 1)))
+        self.values[:, 0] = base.values
+        self.final = np.where(np.isnan(self.values[:, 0]), 1.0,
+                              self.values[:, 0])
+
+    def __repr__(self):
+        return '{}({})'.format(self.__class__.__name__, self.names)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, item):
+        idx = self.names.index(item)
+        return pd.Series(self.values[:, idx], index=self.index, name=item)
+
+    @property
+    def columns(self):
+        return pd.Index(self.names)
+
+    @property
+    def shape(self):
+        return len(self.index), len(self.names)
+
+    def add_layer(self, position):
+        """ Add positions of a layer. Positions are aligned to the index and
+        missing values don't change final positions.
+
+        :param position: named Series or DataFrame
+        :return:
+        """
+        if isinstance(position, pd.Series):
+            if position.name is None:
+                raise ValueError('Position must have a name.')
+            position = position.to_frame()
+
+        overlap = set(self.names).intersection(position.columns)
+        if len(overlap) > 0:
+            raise ValueError('Columns overlap: {}'.format(sorted(overlap)))
+
+        position = position.reindex(self.index)
+        for name in position.columns:
+            if len(self.names) == self.values.shape[1]:
+                self._grow()
+            values = position[name].values.astype(float)
+            self.values[:, len(self.names)] = values
+            self.names.append(name)
+            self.final *= np.where(np.isnan(values), 1.0, values)
+
+    def get_final(self):
+        """ Return the product of positions across layers """
+        return pd.Series(self.final, index=self.index)
+
+    def to_frame(self):
+        """ Return positions as a DataFrame with a column per layer """
+        return pd.DataFrame(self.values[:, :len(self.names)],
+                            index=self.index, columns=self.names)
+
+    def truncate(self, before=None, after=None):
+        """ Return positions between two dates (both including) """
+        indexer = self.index.slice_indexer(before, after)
+        return self._new(self.index[indexer], self.values[indexer],
+                         self.final[indexer])
+
+    def copy(self):
+        return self._new(self.index, self.values, self.final)
+
+    def _new(self, index, values, final):
+        """ Return a new object with copies of values and final """
+        other = PositionMatrix.__new__(PositionMatrix)
+        other.index = index
+        other.names = list(self.names)
+        other.values = values.copy()
+        other.final = final.copy()
+        return other
+
+    def _grow(self):
+        """ Double the number of allocated columns """
+        values = np.empty((self.values.shape[0], 2 * self.values.shape[1]))
+        values[:, :self.values.shape[1]] = self.values
+        self.values = values
@@ -1,11 +1,12 @@
 import pandas as pd
 
 from .base import BaseBacktestObject
-from .longonly import LongOnly
+from .longonly import LongOnly, get_common_calendar
 from ..utils import keys
 from ..utils.logging import get_logger
 from ..utils.const import ANNUAL_FACTOR
 from ..utils.date import data_asfreq
+from ..utils.profiler import profiled
 
 logger = get_logger(name=__name__)
 
@@ -49,7 +50,8 @@ class VolatilityScaling(BaseScaling):
         logger.info('Run layers: {}'.format(self))
         raw_returns = other.get_final_net_returns()
         vs_func = vs_method_map[self[keys.vs_method_params][keys.vs_method]]
-        self.position = (vs_func(raw_returns, self.backtest_params)
+        self.position = (vs_func(raw_returns, self.backtest_params,
+                                 calendar=get_common_calendar([other]))
                          .rename(self.name))
 
 
@@ -76,15 +78,18 @@ class PortVolatilityScaling(BaseScaling):
                                  for i in others], axis=1)
         raw_returns = raw_returns.sum(axis=1)
         vs_func = vs_method_map[self[keys.vs_method_params][keys.vs_method]]
-        self.position = (vs_func(raw_returns, self.backtest_params)
+        self.position = (vs_func(raw_returns, self.backtest_params,
+                                 calendar=get_common_calendar(others))
                          .rename(self.name))
 
 
-def volatility_scale_rolling(raw_returns, config):
+@profiled()
+def volatility_scale_rolling(raw_returns, config, calendar=None):
     """ Calculate scaling factor to achieve target volatility
 
     :param raw_returns: dataframe containing return series
     :param config: dictionary with parameters for scaling
+    :param calendar: ExchangeCalendar of rebalance dates
     :return: 
     """
     vs_window = config[keys.vs_method_params][keys.vs_window]
@@ -97,17 +102,20 @@ def volatility_scale_rolling(raw_returns, config):
                 .clip(lower=config[keys.vs_floor],
                       upper=config[keys.vs_cap])
                 .shift(2)  # trading lag
-                .pipe(data_asfreq, config[keys.vs_chg_rule])
+                .pipe(data_asfreq, config[keys.vs_chg_rule],
+                      calendar=calendar)
                 .fillna(method='backfill'))
     return leverage
 
 
-def volatility_scale_exponential(raw_returns, config):
+@profiled()
+def volatility_scale_exponential(raw_returns, config, calendar=None):
     """ Calculate scaling factor to achieve target volatility using
     exponentially weighted rolling standard deviation.
 
     :param raw_returns: dataframe containing return series
     :param config: dictionary with parameters for scaling
+    :param calendar: ExchangeCalendar of rebalance dates
     :return:
     """
     vs_method_params = config[keys.vs_method_params]
@@ -124,7 +132,8 @@ def volatility_scale_exponential(raw_returns, config):
                 .clip(lower=config[keys.vs_floor],
                       upper=config[keys.vs_cap])
                 .shift(2)  # trading lag
-                .pipe(data_asfreq, config[keys.vs_chg_rule])
+                .pipe(data_asfreq, config[keys.vs_chg_rule],
+                      calendar=calendar)
                 .fillna(method='backfill'))
     return leverage
 
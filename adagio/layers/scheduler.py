@@ -0,0 +1,67 @@
+from collections import OrderedDict
+
+
+class Scheduler(object):
+    """ Run tasks in the current process according to their dependencies.
+
+    Tasks run one at a time in an order where each task follows the tasks it
+    depends on. Layers are CPU-bound and don't gain from threads, so
+    sub-engines run in parallel only as one task of the parent engine
+    (Engine.run_sub_engines) on a process pool if its n_jobs is greater
+    than 1. """
+
+    def __init__(self):
+        self.tasks = OrderedDict()
+        self.dependencies = OrderedDict()
+
+    def __repr__(self):
+        return '{}({})'.format(self.__class__.__name__, list(self.tasks))
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def add(self, name, func, depends_on=None):
+        """ Add a task
+
+        :param name: unique name of the task
+        :param func: callable without arguments
+        :param depends_on: list of task names which must be completed before
+        this task starts
+        :return:
+        """
+        if name in self.tasks:
+            raise ValueError('Task {} already exists.'.format(name))
+        self.tasks[name] = func
+        self.dependencies[name] = set(depends_on or [])
+
+    def run(self):
+        """ Run all tasks. A task starts as soon as all the tasks it depends
+        on are completed. """
+        for name, dependencies in self.dependencies.items():
+            unknown = dependencies.difference(self.tasks)
+            if len(unknown) > 0:
+                raise ValueError('Task {} depends on unknown tasks: {}'
+                                 .format(name, sorted(unknown)))
+
+        self._run_in_order()
+
+    def _pop_ready(self, remaining, done):
+        """ Return tasks whose dependencies are all completed and remove
+        them from remaining """
+        ready = [name for name, dependencies in remaining.items()
+                 if dependencies.issubset(done)]
+        for name in ready:
+            del remaining[name]
+        return ready
+
+    def _run_in_order(self):
+        remaining = OrderedDict(self.dependencies)
+        done = set()
+        while len(remaining) > 0:
+            ready = self._pop_ready(remaining, done)
+            if len(ready) == 0:
+                raise ValueError('Circular dependencies found: {}'
+                                 .format(list(remaining)))
+            for name in ready:
+                self.tasks[name]()
+                done.add(name)
@@ -2,13 +2,19 @@ import pandas as pd
 import numpy as np
 
 from .base import BaseBacktestObject
+from .longonly import get_common_calendar
 from ..utils import keys
-from ..utils.array import is_flat_list
+from ..utils.array import is_flat_list, to_flat_list
 from ..utils.date import data_asfreq
+from ..utils.ewm import ewm_mean, ewm_std
 from ..utils.logging import get_logger
+from ..utils.profiler import profiled
 
 logger = get_logger(name=__name__)
 
+# halflife of the volatility which raw signals are divided by
+SIGNAL_VOL_HALFLIFE = 252
+
 
 class Signal(BaseBacktestObject):
     def __init__(self, **backtest_params):
@@ -62,6 +68,7 @@ class Signal(BaseBacktestObject):
         self.position = self.signal_to_position(signal)
 
 
+@profiled()
 def signal_trend_ma_xover(other, config):
     """ Compute trend following signal using moving average cross-over.
     Multiple lookback windows can be applied to the signal calculation.
@@ -75,17 +82,48 @@ def signal_trend_ma_xover(other, config):
     windows = signal_method_params[keys.signal_windows]
     if is_flat_list(windows):
         windows = [windows]
-    signal = pd.concat([signal_trend_ma_xover_single(raw_returns, *w)
-                        for w in windows], axis=1)
 
-    signal = (signal
-              .mean(axis=1)
+    signal = (signal_trend_ma_xover_batch(raw_returns, windows)
               .shift(2)  # trading lag
-              .pipe(data_asfreq, config[keys.signal_chg_rule])
+              .pipe(data_asfreq, config[keys.signal_chg_rule],
+                    calendar=get_common_calendar([other]))
               .fillna(method='backfill'))
     return signal
 
 
+@profiled()
+def signal_trend_ma_xover_batch(lo_returns, windows):
+    """ Compute trend following signals averaged over multiple windows at
+    once. The log-level is computed once and moving averages are computed
+    once for each distinct window. Same as the mean of
+    signal_trend_ma_xover_single over windows for each instrument.
+
+    :param lo_returns: return series or dataframe of dates x instruments
+    :param windows: list of [st_window, lt_window]
+    :return: signal series or dataframe of the same shape as lo_returns
+    """
+    ln_level = np.log(lo_returns.add(1).cumprod().values)
+    halflives = sorted(set(to_flat_list(windows)))
+    trends = dict(zip(halflives, ewm_mean(ln_level, halflives)))
+
+    # raw signals of windows are stacked along the last axis
+    raw_signal = np.stack([trends[st_window] - trends[lt_window]
+                           for st_window, lt_window in windows], axis=-1)
+    signal = raw_signal / ewm_std(raw_signal, SIGNAL_VOL_HALFLIFE)
+
+    # mean over windows skipping NaN
+    is_valid = ~np.isnan(signal)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        signal = (np.where(is_valid, signal, 0.0).sum(axis=-1)
+                  / is_valid.sum(axis=-1))
+
+    if isinstance(lo_returns, pd.Series):
+        return pd.Series(signal, index=lo_returns.index)
+    return pd.DataFrame(signal, index=lo_returns.index,
+                        columns=lo_returns.columns)
+
+
+@profiled()
 def signal_trend_ma_xover_single(lo_return, st_window, lt_window):
     """ Compute trend following signal using moving average cross-over.
     
@@ -107,7 +145,8 @@ def signal_trend_ma_xover_single(lo_return, st_window, lt_window):
         raw_signal=lambda df: df['st_trend'].sub(df['lt_trend'])
     ).assign(
         signal=lambda df: (df['raw_signal']
-                           .div(df['raw_signal'].ewm(halflife=252).std()))
+                           .div(df['raw_signal']
+                                .ewm(halflife=SIGNAL_VOL_HALFLIFE).std()))
     )[['signal']]
 
 
@@ -0,0 +1,65 @@
+import unittest
+
+import adagio
+from adagio.benchmarks.suite import run
+from adagio.benchmarks.synthetic import (InMemoryArctic, populate,
+                                         contract_tickers)
+from adagio.utils import keys
+from adagio.utils.mongo import get_library, use_store
+from adagio.utils.quandl import get_tickers_from_db
+
+
+class TestSynthetic(unittest.TestCase):
+    def setUp(self):
+        self.store = InMemoryArctic()
+        populate(self.store, ['CME_ES', 'EUREX_FDAX'],
+                 start_yyyymm=201501, end_yyyymm=201612)
+
+    def test_contract_tickers(self):
+        tickers = contract_tickers('CME_ES', 201501, 201512)
+        self.assertEqual(tickers, ['CME/ESH2015', 'CME/ESM2015',
+                                   'CME/ESU2015', 'CME/ESZ2015'])
+
+        # contracts before start_from are not generated
+        tickers = contract_tickers('CME_DA', 201001, 201103)
+        self.assertEqual(tickers[0], 'CME/DAF2011')
+
+    def test_store(self):
+        with use_store(self.store):
+            tickers = get_tickers_from_db('CME/SP')
+            self.assertEqual(tickers[0], 'CME/SPH2015')
+            self.assertEqual(tickers[-1], 'CME/SPZ2016')
+
+            library = get_library(keys.quandl_contract)
+            item = library.read('CME/ESH2015')
+            self.assertEqual(item.version, 1)
+            settle = item.data['Settle'].copy()
+            item.data['Settle'] = 0.0
+            self.assertTrue(library.read('CME/ESH2015').data['Settle']
+                            .equals(settle))
+
+            library.write('CME/ESH2015', item.data)
+            self.assertEqual(library.read_metadata('CME/ESH2015').version, 2)
+
+            library = get_library(keys.fx_rates)
+            self.assertEqual(library.list_symbols(), ['EUR'])
+
+    def test_backtest(self):
+        with use_store(self.store):
+            engine = adagio.Engine()
+            engine.add(adagio.LongOnly(lo_ticker=['CME_ES', 'EUREX_FDAX']))
+            engine.backtest()
+            net_returns = engine.get_final_net_returns()
+
+        contract = engine[0][0].contracts[0]
+        self.assertEqual(contract.name, 'CME/ESH2015')
+        self.assertEqual(net_returns.isnull().sum(), 0)
+
+    def test_run(self):
+        results = run(sizes=[1], repeat=1, start_yyyymm=201601,
+                      end_yyyymm=201612)
+        names = [i['benchmark'] for i in results['results']]
+        self.assertIn('engine.backtest', names)
+        self.assertIn('performance.summary', names)
+        self.assertTrue(all([i['n_tickers'] == 1
+                             for i in results['results']]))
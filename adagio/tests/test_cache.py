@@ -0,0 +1,111 @@
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import adagio
+from adagio.benchmarks.synthetic import InMemoryArctic, populate
+from adagio.utils import keys
+from adagio.utils.cache import DataCache, CachedLibrary
+from adagio.utils.mongo import use_store
+from adagio.utils.storage import LocalStore
+
+
+class TestDataCache(unittest.TestCase):
+    def setUp(self):
+        store = InMemoryArctic()
+        store.initialize_library('test')
+        self.raw_library = store['test']
+        self.cache = DataCache()
+        self.library = CachedLibrary(self.raw_library, self.cache)
+
+        index = pd.date_range('2018-01-01', periods=100)
+        self.data = pd.DataFrame({'Settle': np.arange(100.0)}, index=index)
+        self.raw_library.write('a', self.data)
+        self.raw_library.write('b', self.data)
+
+    def test_hit(self):
+        item = self.library.read('a')
+        item.data.iloc[0] = -1.0
+        item = self.library.read('a')
+        self.assertEqual(item.version, 1)
+        self.assertEqual(item.data['Settle'].iloc[0], 0.0)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+        self.assertEqual(self.cache.stats()['misses'], 1)
+
+    def test_version(self):
+        self.library.read('a')
+        self.raw_library.write('a', self.data.iloc[:10])
+        item = self.library.read('a')
+        self.assertEqual(item.version, 2)
+        self.assertEqual(len(item.data), 10)
+        self.assertEqual(self.cache.stats()['misses'], 2)
+
+    def test_eviction(self):
+        self.cache._max_size = int(self.data.memory_usage(deep=True).sum())
+        self.library.read('a')
+        self.library.read('b')
+        self.library.read('a')
+        stats = self.cache.stats()
+        self.assertEqual(stats['hits'], 0)
+        self.assertEqual(stats['evictions'], 2)
+        self.assertEqual(stats['n_items'], 1)
+        self.assertEqual(stats['size'], self.cache.max_size)
+
+        # other objects are not cached
+        self.raw_library.write('c', {'x': 1})
+        self.assertEqual(self.library.read('c').data, {'x': 1})
+        self.assertEqual(self.cache.stats()['n_items'], 1)
+
+    def test_identity(self):
+        # handles of the same library share entries
+        CachedLibrary(self.raw_library, self.cache).read('a')
+        self.library.read('a')
+        self.assertEqual(self.cache.stats()['hits'], 1)
+
+        path = tempfile.mkdtemp()
+        try:
+            store = LocalStore(path)
+            store.initialize_library('test')
+            store['test'].write('a', self.data.iloc[:10])
+            library = CachedLibrary(store['test'], self.cache)
+            self.assertEqual(len(library.read('a').data), 10)
+            library = CachedLibrary(LocalStore(path)['test'], self.cache)
+            self.assertEqual(len(library.read('a').data), 10)
+            self.assertEqual(self.cache.stats()['hits'], 2)
+            self.assertEqual(self.cache.stats()['n_items'], 2)
+        finally:
+            shutil.rmtree(path)
+
+
+class TestContractCache(unittest.TestCase):
+    def test_positions_changed(self):
+        store = InMemoryArctic()
+        populate(store, ['CME_ES', 'CME_TY'], start_yyyymm=201501,
+                 end_yyyymm=201612)
+        with use_store(store):
+            engine = adagio.Engine()
+            engine.add(adagio.LongOnly(lo_ticker=['CME_ES', 'CME_TY']))
+            engine.add(adagio.VolatilityScaling(**{
+                keys.vs_chg_rule: '+Wed-1bd+1bd',
+                keys.vs_target_vol: 0.1,
+                keys.vs_method_params: {
+                    keys.vs_method: keys.vs_rolling,
+                    keys.vs_window: 21,
+                }
+            }))
+            engine.backtest()
+
+        # returns cached while positions changed are the same as those
+        # computed from scratch
+        for lo in engine.get_long_only_objects():
+            for contract in lo.contracts:
+                returns = contract.calc_return()
+                net_returns = contract.get_final_net_returns()
+                contract.clear_cache()
+                pd.testing.assert_series_equal(returns,
+                                               contract.calc_return())
+                pd.testing.assert_series_equal(
+                    net_returns, contract.get_final_net_returns())
@@ -24,5 +24,16 @@ class TestContract(unittest.TestCase):
     def test_get_roll_date(self):
         # CME/SPM1982
         self.assertEqual(self.contract_sp.roll_date, datetime(1982, 6, 15))
-        # CME/TYM1990 - uses first notice date
-        self.assertEqual(self.contract_ty.roll_date, datetime(1990, 5, 28))
+        # CME/TYM1990 - uses first notice date. 1990-05-28 is Memorial Day
+        self.assertEqual(self.contract_ty.roll_date, datetime(1990, 5, 25))
+
+    def test_cache(self):
+        net_returns = self.contract_sp.get_final_net_returns()
+        self.assertTrue(net_returns is self.contract_sp.get_final_net_returns())
+
+        self.contract_sp.clear_cache(keep_data=True)
+        self.assertFalse(net_returns is
+                         self.contract_sp.get_final_net_returns())
+        self.assertAlmostEqual(
+            net_returns.sum(),
+            self.contract_sp.get_final_net_returns().sum())
@@ -1,7 +1,11 @@
 import unittest
 from datetime import datetime
 
-from adagio.utils.date import date_shift
+import numpy as np
+import pandas as pd
+
+from adagio.utils.date import (data_asfreq, date_shift, get_shift_rule,
+                               RebalanceMaskCache, ShiftRule)
 
 
 class TestDate(unittest.TestCase):
@@ -25,3 +29,51 @@ class TestDate(unittest.TestCase):
     def test_multi_apply(self):
         ans = datetime(2016, 8, 26)
         self.assertEqual(date_shift(self.t, "+MonthEnd-3bd"), ans)
+
+    def test_shift_rule(self):
+        rule = get_shift_rule("+MonthEnd-3bd")
+        self.assertIs(rule, get_shift_rule("+MonthEnd-3bd"))
+        self.assertEqual(rule, ShiftRule("+monthend-3BD"))
+        self.assertEqual(len({rule, ShiftRule("+monthend-3BD")}), 1)
+        self.assertEqual(date_shift(self.t, rule), datetime(2016, 8, 26))
+
+        index = pd.DatetimeIndex([self.t, datetime(2016, 9, 1)])
+        expected = pd.DatetimeIndex([datetime(2016, 8, 26),
+                                     datetime(2016, 9, 27)])
+        self.assertTrue(rule(index).equals(expected))
+
+    def test_data_asfreq(self):
+        index = pd.bdate_range('2016-08-01', '2016-09-30')
+        data = pd.Series(np.arange(len(index), dtype=float), index=index)
+        data.iloc[10] = np.nan
+
+        # updated on Mondays. missing values are padded
+        result = data_asfreq(data, '-1bd+Fri')
+        self.assertTrue(result.index.equals(index))
+        self.assertTrue(np.isnan(result.iloc[0]))
+        self.assertEqual(result['2016-08-12'], 5.0)
+        self.assertEqual(result['2016-08-15'], 5.0)
+        self.assertEqual(result['2016-08-22'], 15.0)
+
+        frame = pd.concat([data, data * 2], axis=1)
+        expected = pd.concat([result, result * 2], axis=1)
+        pd.testing.assert_frame_equal(data_asfreq(frame, '-1bd+Fri'),
+                                      expected)
+
+    def test_rebalance_mask_cache(self):
+        cache = RebalanceMaskCache(max_size=1)
+        index = pd.bdate_range('2016-08-01', '2016-09-30')
+        mask = cache.get_mask(index, '-1bd+Fri')
+        self.assertFalse(mask[0])
+        self.assertEqual(mask.sum(), 8)
+        self.assertFalse(mask.flags.writeable)
+
+        # same index values and equivalent rule
+        self.assertIs(cache.get_mask(index.copy(), get_shift_rule('-1BD+fri')),
+                      mask)
+        self.assertEqual(cache.stats()['hits'], 1)
+
+        cache.get_mask(index[1:], '-1bd+Fri')
+        self.assertEqual(cache.stats()['n_items'], 1)
+        self.assertIsNot(cache.get_mask(index, '-1bd+Fri'), mask)
+        self.assertEqual(cache.stats()['misses'], 3)
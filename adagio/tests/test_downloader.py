@@ -0,0 +1,181 @@
+from datetime import datetime
+import threading
+import time
+import unittest
+
+import numpy as np
+import pandas as pd
+import quandl
+from quandl.errors.quandl_error import LimitExceededError
+
+from adagio.benchmarks.synthetic import InMemoryArctic, contract_tickers
+from adagio.layers.engine import Engine
+from adagio.layers.longonly import LongOnly, LongOnlyQuandlFutures
+from adagio.utils import keys
+from adagio.utils.config import AdagioConfig
+from adagio.utils.downloader import Downloader, RateLimiter, set_downloader
+from adagio.utils.mongo import get_library, use_store
+
+
+class FakeDownloader(Downloader):
+    """ Serve data of tickers from a dict like a local Quandl server """
+
+    def __init__(self, data, n_failures=0, **kwargs):
+        super(FakeDownloader, self).__init__(**kwargs)
+        self.data = data
+        self.n_failures = n_failures
+        self.calls = []
+        self.start_dates = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def download(self, ticker, start_date=None):
+        with self._lock:
+            self.calls.append(ticker)
+            self.start_dates.append(start_date)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(0.01)
+            with self._lock:
+                if self.n_failures > 0:
+                    self.n_failures -= 1
+                    raise LimitExceededError('Too many requests')
+            if ticker not in self.data:
+                raise quandl.NotFoundError('Not found')
+            data = self.data[ticker]
+            if start_date is not None:
+                data = data.loc[start_date:]
+            return data.copy()
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def make_data(tickers):
+    index = pd.bdate_range('2018-01-01', periods=5)
+    return {t: pd.DataFrame({'Settle': [1.0, 2.0, 3.0, 4.0, 5.0],
+                             'Volume': 1.0}, index=index)
+            for t in tickers}
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_rate(self):
+        rate_limiter = RateLimiter(rate=50, capacity=1)
+        start = time.monotonic()
+        for _ in range(6):
+            rate_limiter.acquire()
+        # the first token is available immediately
+        self.assertGreaterEqual(time.monotonic() - start, 5 / 50 * 0.9)
+
+
+class TestDownloader(unittest.TestCase):
+    def test_retry(self):
+        downloader = FakeDownloader(make_data(['CME/GCG2018']),
+                                    n_failures=2, rate=1000, retries=2,
+                                    backoff=0.0)
+        data = downloader.get('CME/GCG2018')
+        self.assertEqual(len(data), 5)
+        self.assertEqual(len(downloader.calls), 3)
+
+        downloader = FakeDownloader(make_data(['CME/GCG2018']),
+                                    n_failures=3, rate=1000, retries=2,
+                                    backoff=0.0)
+        with self.assertRaises(LimitExceededError):
+            downloader.get('CME/GCG2018')
+
+    def test_not_found(self):
+        downloader = FakeDownloader(dict(), rate=1000, retries=2, backoff=0.0)
+        with self.assertRaises(quandl.NotFoundError):
+            downloader.get('CME/GCG2018')
+        # not found is not retried
+        self.assertEqual(len(downloader.calls), 1)
+
+
+class TestUpdateDatabase(unittest.TestCase):
+    def setUp(self):
+        self.store = InMemoryArctic()
+        # contracts are listed up to a year ahead
+        end_yyyymm = (datetime.today().year + 1) * 100 + 12
+        self.tickers = contract_tickers('CME_GC', 201801, end_yyyymm)
+        self.data = make_data(self.tickers)
+        # a past contract missing on Quandl doesn't stop the update
+        del self.data[self.tickers[1]]
+        self.downloader = FakeDownloader(self.data, n_workers=3, rate=1000,
+                                         backoff=0.0)
+        set_downloader(self.downloader)
+
+    def tearDown(self):
+        set_downloader(None)
+
+    def test_update_database(self):
+        engine = Engine()
+        engine.add(LongOnly(lo_ticker=['CME_GC', 'CME_SI']))
+        engine.compile()
+        start_from = {'CME_GC': 'G2018', 'CME_SI': 'H2018'}
+        for lo in engine[0]:
+            lo[keys.start_from] = start_from[lo.name]
+
+        with use_store(self.store):
+            engine.update_database()
+            symbols = get_library(keys.quandl_contract).list_symbols()
+
+        gc_symbols = sorted(s for s in symbols if s.startswith('CME/GC'))
+        self.assertEqual(gc_symbols, sorted(self.data.keys()))
+        # only contracts expected to be listed are requested
+        gc_calls = [t for t in self.downloader.calls if t.startswith('CME/GC')]
+        self.assertEqual(sorted(gc_calls),
+                         sorted(engine[0][0].get_listed_tickers()))
+        self.assertLessEqual(self.downloader.max_in_flight, 3)
+        self.assertGreater(self.downloader.max_in_flight, 1)
+
+
+class TestIncrementalUpdate(unittest.TestCase):
+    def setUp(self):
+        self.store = InMemoryArctic()
+        # contract which is still traded
+        self.ticker = 'CME/GCZ{}'.format(datetime.today().year + 1)
+        index = pd.bdate_range(end=datetime.today(), periods=100)
+        self.data = pd.DataFrame({'Settle': np.arange(100.0),
+                                  'Volume': np.ones(100)}, index=index)
+        self.downloader = FakeDownloader({self.ticker: self.data}, rate=1000)
+        set_downloader(self.downloader)
+        self.lo = LongOnlyQuandlFutures(lo_ticker='CME_GC')
+
+    def tearDown(self):
+        set_downloader(None)
+
+    def test_append(self):
+        with use_store(self.store):
+            library = get_library(keys.quandl_contract)
+            library.write(self.ticker, self.data.iloc[:90])
+            self.lo._update_contract(self.ticker)
+            item = library.read(self.ticker)
+
+        pd.testing.assert_frame_equal(item.data, self.data)
+        self.assertEqual(item.version, 2)
+        # only recent rows are downloaded
+        self.assertEqual(self.downloader.start_dates,
+                         [self.data.index[89 - AdagioConfig.download_overlap]])
+
+    def test_revision(self):
+        stored = self.data.iloc[:90].copy()
+        stored.iloc[-1, 0] = -1.0
+        with use_store(self.store):
+            library = get_library(keys.quandl_contract)
+            library.write(self.ticker, stored)
+            self.lo._update_contract(self.ticker)
+            item = library.read(self.ticker)
+
+        pd.testing.assert_frame_equal(item.data, self.data)
+
+    def test_no_new_data(self):
+        with use_store(self.store):
+            library = get_library(keys.quandl_contract)
+            library.write(self.ticker, self.data)
+            self.lo._update_contract(self.ticker)
+            item = library.read_metadata(self.ticker)
+
+        # nothing is written
+        self.assertEqual(item.version, 1)
@@ -343,3 +343,136 @@ class TestMultipleEngine(unittest.TestCase):
         self.assertAlmostEqual(engine1_ret, engine2_ret)
         self.assertAlmostEqual(self.engine.get_final_gross_returns().sum(),
                                engine1_ret + engine2_ret)
+
+
+class TestParallelEngine(unittest.TestCase):
+    def test_n_jobs(self):
+        longonly_params = {
+            keys.lo_ticker: ['SGX_NK', 'LIFFE_FTI']
+        }
+
+        engine = adagio.Engine()
+        engine.add(adagio.LongOnly(**longonly_params))
+        engine.backtest()
+
+        engine_parallel = adagio.Engine(n_jobs=2)
+        engine_parallel.add(adagio.LongOnly(**longonly_params))
+        engine_parallel.backtest()
+
+        self.assertEqual(engine.symbol, engine_parallel.symbol)
+        self.assertEqual(len(engine_parallel[0][0].contracts),
+                         len(engine[0][0].contracts))
+        self.assertAlmostEqual(engine_parallel.get_final_net_returns().sum(),
+                               engine.get_final_net_returns().sum())
+
+    def test_nested_n_jobs(self):
+        longonly_params = {
+            keys.lo_ticker: ['SGX_NK', 'LIFFE_FTI']
+        }
+        portfolio_params = {
+            keys.weighting: keys.equal_weight,
+            keys.port_weight_chg_rule: '+Wed-1bd+1bd',
+        }
+
+        engines = []
+        for n_jobs in [1, 2]:
+            engine1 = adagio.Engine()
+            engine1.add(adagio.LongOnly(**longonly_params))
+            engine2 = adagio.Engine()
+            engine2.add(adagio.LongOnly(**longonly_params))
+
+            engine3 = adagio.Engine(n_jobs=n_jobs)
+            engine3.add([engine1, engine2])
+            engine3.add(adagio.Portfolio(**portfolio_params))
+            engine3.backtest()
+            engines.append(engine3)
+
+        position = engines[1][0][0][0][0].contracts[0].position
+        self.assertEqual(position.columns[1], 'portfolio')
+        self.assertAlmostEqual(engines[0].get_final_net_returns().sum(),
+                               engines[1].get_final_net_returns().sum())
+
+
+class TestResultCache(unittest.TestCase):
+    def test_use_cache(self):
+        longonly_params = {
+            keys.lo_ticker: ['SGX_NK', 'LIFFE_FTI']
+        }
+
+        engine = adagio.Engine(use_cache=True)
+        engine.add(adagio.LongOnly(**longonly_params))
+        engine.backtest()
+
+        engine_cached = adagio.Engine(use_cache=True)
+        engine_cached.add(adagio.LongOnly(**longonly_params))
+        engine_cached.backtest()
+
+        self.assertTrue(engine_cached.cached_results is not None)
+        self.assertTrue(engine_cached[0][0].contracts is None)
+        self.assertAlmostEqual(engine_cached.get_final_net_returns().sum(),
+                               engine.get_final_net_returns().sum())
+        self.assertEqual(engine_cached.get_final_positions().shape,
+                         engine.get_final_positions().shape)
+
+
+class TestIncrementalBacktest(unittest.TestCase):
+    def test_incremental(self):
+        longonly_params = {
+            keys.lo_ticker: ['SGX_NK', 'LIFFE_FTI']
+        }
+
+        engine = adagio.Engine()
+        engine.add(adagio.LongOnly(**longonly_params))
+        engine.backtest()
+
+        for _ in range(2):
+            # the first run saves contracts and the second one extends them
+            engine_incremental = adagio.Engine(incremental=True)
+            engine_incremental.add(adagio.LongOnly(**longonly_params))
+            engine_incremental.backtest()
+
+            self.assertEqual(
+                [c.name for c in engine_incremental[0][0].contracts],
+                [c.name for c in engine[0][0].contracts])
+            self.assertAlmostEqual(
+                engine_incremental.get_final_net_returns().sum(),
+                engine.get_final_net_returns().sum())
+
+
+class TestSweep(unittest.TestCase):
+    def test_sweep(self):
+        longonly_params = {
+            keys.lo_ticker: ['SGX_NK', 'LIFFE_FTI']
+        }
+
+        def vol_scale_params(vs_window):
+            return {
+                keys.vs_chg_rule: '+Wed-1bd+1bd',
+                keys.vs_target_vol: 0.1,
+                keys.vs_method_params: {
+                    keys.vs_method: keys.vs_rolling,
+                    keys.vs_window: vs_window,
+                }
+            }
+
+        engine = adagio.Engine()
+        engine.add(adagio.LongOnly(**longonly_params))
+        engine.add(adagio.VolatilityScaling(**vol_scale_params(63)))
+        results = engine.sweep({keys.vs_window: [21, 63],
+                                keys.vs_target_vol: [0.1, 0.2]})
+
+        self.assertEqual(results.shape[1], 4)
+        self.assertEqual(list(results.columns.names),
+                         [keys.vs_window, keys.vs_target_vol])
+        position = engine[0][0].contracts[0].position
+        self.assertEqual(list(position.columns), ['base'])
+
+        engine_single = adagio.Engine()
+        engine_single.add(adagio.LongOnly(**longonly_params))
+        engine_single.add(adagio.VolatilityScaling(**vol_scale_params(21)))
+        engine_single.backtest()
+        self.assertAlmostEqual(results[(21, 0.1)].sum(),
+                               engine_single.get_final_net_returns().sum())
+
+        with self.assertRaises(KeyError):
+            engine.sweep({'unknown_param': [1]})
@@ -0,0 +1,66 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from adagio.benchmarks.synthetic import InMemoryArctic
+from adagio.utils import keys
+from adagio.utils.fx import FxService
+from adagio.utils.mongo import use_store
+
+
+class TestFxService(unittest.TestCase):
+    def setUp(self):
+        self.store = InMemoryArctic()
+        self.store.initialize_library(keys.fx_rates)
+        library = self.store[keys.fx_rates]
+        index = pd.bdate_range('2018-01-01', periods=5)
+        self.eur = pd.Series([1.1, 1.2, 1.3, 1.2, 1.1], index=index,
+                             name='EUR/USD')
+        self.jpy = pd.Series([100.0, 110.0, 120.0, 110.0, 100.0],
+                             index=index, name='USD/JPY')
+        library.write('EUR', self.eur)
+        library.write('JPY', self.jpy)
+        self.fx_service = FxService()
+
+    def test_rates(self):
+        with use_store(self.store):
+            rates = self.fx_service.get_rates('EUR', 'USD')
+            np.testing.assert_allclose(rates.values, self.eur.values)
+            rates = self.fx_service.get_rates('USD', 'EUR')
+            np.testing.assert_allclose(rates.values, 1.0 / self.eur.values)
+            rates = self.fx_service.get_rates('JPY', 'USD')
+            np.testing.assert_allclose(rates.values, 1.0 / self.jpy.values)
+
+            # triangulated through USD
+            rates = self.fx_service.get_rates('EUR', 'JPY')
+            self.assertEqual(rates.name, 'EUR/JPY')
+            np.testing.assert_allclose(rates.values,
+                                       self.eur.values * self.jpy.values)
+
+    def test_adjustment(self):
+        # 2017-12-29 and 2018-01-06 don't exist in fx rates
+        index = pd.DatetimeIndex(['2017-12-29', '2018-01-01', '2018-01-02',
+                                  '2018-01-06', '2018-01-08'])
+        with use_store(self.store):
+            adjustment = self.fx_service.get_adjustment('EUR', 'USD', index)
+
+        expected = (self.eur.reindex(index).fillna(method='pad')
+                    .pct_change().fillna(0).add(1.0))
+        np.testing.assert_allclose(adjustment.values, expected.values)
+        self.assertTrue(adjustment.index.equals(index))
+
+    def test_adjustment_cached(self):
+        index = pd.DatetimeIndex(['2018-01-02', '2018-01-03', '2018-01-05'])
+        with use_store(self.store):
+            growth = self.fx_service.get_growth('EUR', 'USD')
+            adjustment = self.fx_service.get_adjustment('EUR', 'USD', index)
+            self.assertIs(self.fx_service.get_growth('EUR', 'USD'), growth)
+
+            self.fx_service.clear()
+            self.assertIsNot(self.fx_service.get_growth('EUR', 'USD'),
+                             growth)
+
+        expected = (self.eur.reindex(index).pct_change().fillna(0)
+                    .add(1.0))
+        np.testing.assert_allclose(adjustment.values, expected.values)
@@ -1,9 +1,11 @@
 import unittest
 
 import adagio
+from adagio.benchmarks.synthetic import InMemoryArctic, populate
 from adagio.layers.longonly import LongOnlyQuandlFutures
 from adagio.utils import keys
 from adagio.utils.const import FuturesInfo, DEFAULT_ROLL_RULE
+from adagio.utils.mongo import get_library, use_store
 
 
 class TestLongOnly(unittest.TestCase):
@@ -47,3 +49,65 @@ class TestLongOnly(unittest.TestCase):
         self.assertEqual(position.shift(-1)[roll_date], 0)
         self.assertEqual(len(self.engine[0][0].contracts) - 1,
                          len(engine[0][0].contracts))
+
+    def test_panel(self):
+        longonly = self.engine[0][0]
+        panel = longonly.panel
+        self.assertEqual(panel.shape,
+                         (len(panel.index), len(longonly.contracts)))
+
+        prices = longonly.get_individual_prices()
+        self.assertEqual(prices[self.contract.name].dropna().tolist(),
+                         self.contract.price_for_return.tolist())
+
+        date = self.contract.data.index[-1]
+        curve = longonly.get_futures_curve(date)
+        self.assertEqual(curve[self.contract.name],
+                         self.contract.price_for_return[date])
+
+
+class TestIncremental(unittest.TestCase):
+    def setUp(self):
+        self.store = InMemoryArctic()
+        populate(self.store, ['CME_ES'], start_yyyymm=201501,
+                 end_yyyymm=201612)
+
+    def backtest(self, incremental):
+        with use_store(self.store):
+            engine = adagio.Engine(incremental=incremental)
+            engine.add(adagio.LongOnly(lo_ticker='CME_ES'))
+            engine.backtest()
+        return engine
+
+    def test_snapshots(self):
+        self.backtest(True)
+        engine = self.backtest(True)
+        lo = engine[0][0]
+        # expired contracts are restored from snapshots of cleaned data
+        self.assertEqual(lo._restored, set(c.name for c in lo.contracts))
+        self.assertAlmostEqual(engine.get_final_net_returns().sum(),
+                               self.backtest(False).get_final_net_returns()
+                               .sum())
+
+    def test_data_revised(self):
+        returns = self.backtest(True).get_final_net_returns().sum()
+        ticker = 'CME/ESM2015'
+        with use_store(self.store):
+            library = get_library(keys.quandl_contract)
+            data = library.read(ticker).data
+            data.loc['2015-04-01':, 'Settle'] *= 1.1
+            library.write(ticker, data)
+
+        engine = self.backtest(True)
+        lo = engine[0][0]
+        contract = [c for c in lo.contracts if c.name == ticker][0]
+        self.assertNotIn(ticker, lo._restored)
+        self.assertEqual(contract.data_version, 2)
+        self.assertNotAlmostEqual(engine.get_final_net_returns().sum(),
+                                  returns)
+        self.assertAlmostEqual(engine.get_final_net_returns().sum(),
+                               self.backtest(False).get_final_net_returns()
+                               .sum())
+
+        # the snapshot of the revised data is used next time
+        self.assertIn(ticker, self.backtest(True)[0][0]._restored)
@@ -0,0 +1,108 @@
+import unittest
+
+from adagio.benchmarks.synthetic import InMemoryArctic, populate
+from adagio.layers.longonly import LongOnlyQuandlFutures
+from adagio.utils import keys
+from adagio.utils.downloader import set_downloader
+from adagio.utils.manifest import (EXPIRED, N_ROWS, VERSION, YYYYMM,
+                                   read_manifest)
+from adagio.utils.mongo import get_library, use_store
+from adagio.utils.quandl import get_tickers_from_db, to_yyyymm
+from adagio.tests.test_downloader import FakeDownloader, make_data
+
+
+class TestManifest(unittest.TestCase):
+    def setUp(self):
+        self.store = InMemoryArctic()
+        self.tickers = populate(self.store, ['CME_GC'], start_yyyymm=201601,
+                                end_yyyymm=201612)
+
+    def test_populate(self):
+        with use_store(self.store):
+            manifest = read_manifest('CME/GC')
+            library = get_library(keys.quandl_contract)
+            data = library.read(self.tickers[0]).data
+
+        self.assertEqual(manifest.index.tolist(), self.tickers)
+        self.assertTrue(manifest[YYYYMM].is_monotonic_increasing)
+        self.assertEqual(manifest[N_ROWS].iloc[0], len(data))
+        self.assertTrue(manifest[EXPIRED].all())
+
+    def test_get_tickers_from_db(self):
+        lo = LongOnlyQuandlFutures(lo_ticker='CME_GC')
+        expected = [t for t in self.tickers if to_yyyymm(t) >= 201606]
+        with use_store(self.store):
+            # a symbol written without updating the manifest is listed
+            # after build_manifest
+            library = get_library(keys.quandl_contract)
+            library.write('CME/GCZ2017',
+                          make_data(['CME/GCZ2017'])['CME/GCZ2017'])
+            tickers = get_tickers_from_db('CME/GC', start_yyyymm=201606)
+            self.assertEqual(tickers, expected)
+
+            read = []
+            library_read = library.read
+
+            def read_recorded(symbol, **kwargs):
+                read.append(symbol)
+                return library_read(symbol, **kwargs)
+
+            library.read = read_recorded
+            try:
+                lo.build_manifest()
+            finally:
+                del library.read
+            tickers = get_tickers_from_db('CME/GC', start_yyyymm=201606)
+            self.assertEqual(tickers, expected + ['CME/GCZ2017'])
+
+            # symbols are scanned if the manifest does not exist
+            get_library(keys.quandl_manifest).delete('CME/GC')
+            tickers = get_tickers_from_db('CME/GC', start_yyyymm=201606,
+                                          end_yyyymm=201612)
+            library.delete('CME/GCZ2017')
+
+        # only the new contract is read
+        self.assertEqual(read, ['CME/GCZ2017'])
+        self.assertEqual(tickers, expected)
+
+    def test_skip_expired(self):
+        downloader = FakeDownloader(dict(), rate=1000)
+        set_downloader(downloader)
+        lo = LongOnlyQuandlFutures(lo_ticker='CME_GC')
+        lo[keys.start_from] = 'G2016'
+        try:
+            with use_store(self.store):
+                # expired contracts are not read nor downloaded
+                get_library(keys.quandl_contract).delete(self.tickers[0])
+                lo.update_database()
+                manifest = read_manifest('CME/GC')
+        finally:
+            set_downloader(None)
+
+        self.assertNotIn(self.tickers[0], downloader.calls)
+        self.assertEqual(manifest.index.tolist(), self.tickers)
+        self.assertTrue((manifest[VERSION] == 1).all())
+
+    def test_partial_failure(self):
+        set_downloader(FakeDownloader(dict(), rate=1000))
+        lo = LongOnlyQuandlFutures(lo_ticker='CME_GC')
+        lo[keys.start_from] = 'G2016'
+        update_contract = lo._update_contract
+
+        def fail_first(ticker, entry=None):
+            if ticker == self.tickers[0]:
+                raise RuntimeError('Update failed')
+            return update_contract(ticker, entry)
+
+        lo._update_contract = fail_first
+        try:
+            with use_store(self.store):
+                get_library(keys.quandl_manifest).delete('CME/GC')
+                with self.assertRaises(RuntimeError):
+                    lo.update_database()
+                manifest = read_manifest('CME/GC')
+        finally:
+            set_downloader(None)
+
+        # contracts updated are written to the manifest
+        self.assertEqual(manifest.index.tolist(), self.tickers[1:])
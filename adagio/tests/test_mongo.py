@@ -0,0 +1,53 @@
+import unittest
+
+from arctic import Arctic
+
+from adagio.benchmarks.synthetic import InMemoryArctic
+from adagio.utils.mongo import StoreManager, get_store, set_store
+
+
+class CountingStore(InMemoryArctic):
+    def __init__(self):
+        super(CountingStore, self).__init__()
+        self.n_listed = 0
+
+    def list_libraries(self):
+        self.n_listed += 1
+        return super(CountingStore, self).list_libraries()
+
+
+class TestStoreManager(unittest.TestCase):
+    def test_lazy(self):
+        manager = StoreManager()
+        self.assertIsNone(manager._store)
+        self.assertIsInstance(manager.get_store(), Arctic)
+
+    def test_library_cache(self):
+        store = CountingStore()
+        manager = StoreManager(store)
+        library = manager.get_library('test')
+        self.assertIs(manager.get_library('test'), library)
+        self.assertEqual(store.n_listed, 1)
+
+        previous = manager.set_store(InMemoryArctic())
+        self.assertIs(previous, store)
+        self.assertIsNot(manager.get_library('test'), library)
+
+    def test_fork(self):
+        store = CountingStore()
+        manager = StoreManager(store)
+        manager.get_library('test')
+
+        # pretend to be in a forked process
+        manager._pid = -1
+        manager.get_library('test')
+        self.assertEqual(store.n_listed, 2)
+        self.assertIs(manager.get_store(), store)
+
+    def test_set_store(self):
+        store = InMemoryArctic()
+        original = set_store(store)
+        try:
+            self.assertIs(get_store(), store)
+        finally:
+            self.assertIs(set_store(original), store)
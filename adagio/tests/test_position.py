@@ -0,0 +1,45 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from adagio.layers.position import PositionMatrix
+
+
+class TestPositionMatrix(unittest.TestCase):
+    def setUp(self):
+        index = pd.bdate_range('2018-01-01', periods=5)
+        self.position = PositionMatrix(
+            pd.Series([0.0, 1.0, 1.0, 1.0, 0.0], index=index, name='base'),
+            capacity=1)
+        self.index = index
+
+    def test_add_layer(self):
+        self.position.add_layer(pd.Series(2.0, index=self.index[1:],
+                                          name='scaling'))
+        self.position.add_layer(pd.Series([np.nan, 0.5, -1.0],
+                                          index=self.index[:3],
+                                          name='signal'))
+
+        frame = self.position.to_frame()
+        self.assertEqual(list(self.position.columns),
+                         ['base', 'scaling', 'signal'])
+        self.assertEqual(self.position.shape, (5, 3))
+        pd.testing.assert_series_equal(
+            self.position.get_final(),
+            frame.prod(axis=1))
+        pd.testing.assert_series_equal(self.position['scaling'],
+                                       frame['scaling'])
+
+        with self.assertRaises(ValueError):
+            self.position.add_layer(pd.Series(1.0, index=self.index,
+                                              name='signal'))
+
+    def test_truncate(self):
+        position = self.position.copy()
+        position.add_layer(pd.Series(2.0, index=self.index, name='scaling'))
+        position = position.truncate(self.index[1], self.index[2])
+
+        self.assertEqual(len(position), 2)
+        self.assertEqual(position.get_final().tolist(), [2.0, 2.0])
+        self.assertEqual(list(self.position.columns), ['base'])
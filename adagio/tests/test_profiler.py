@@ -0,0 +1,70 @@
+import json
+import unittest
+
+import adagio
+from adagio.benchmarks.synthetic import InMemoryArctic, populate
+from adagio.utils.mongo import use_store
+from adagio.utils.profiler import Profiler, profiling, profiled, timed
+
+
+@profiled()
+def _add(x, y):
+    return x + y
+
+
+class TestProfiler(unittest.TestCase):
+    def test_profiled(self):
+        self.assertEqual(_add(1, 2), 3)
+
+        profiler = Profiler()
+        with profiling(profiler):
+            _add(1, 2)
+            _add(1, 2)
+            with timed('step', 'item'):
+                pass
+        _add(1, 2)
+
+        df = profiler.to_frame().set_index('step')
+        self.assertEqual(df.loc['_add', 'calls'], 2)
+        self.assertEqual(df.loc['step', 'item'], 'item')
+        self.assertTrue(df['memory'].isnull().all())
+        self.assertEqual(len(json.loads(profiler.to_json())), 2)
+
+    def test_engine(self):
+        store = InMemoryArctic()
+        populate(store, ['CME_ES'], start_yyyymm=201501, end_yyyymm=201512)
+        with use_store(store):
+            engine = adagio.Engine()
+            engine.add(adagio.LongOnly(lo_ticker='CME_ES'))
+            engine.backtest()
+            self.assertIsNone(engine.profiler)
+
+            engine = adagio.Engine(profile=True, profile_memory=True)
+            engine.add(adagio.LongOnly(lo_ticker='CME_ES'))
+            engine.backtest()
+
+        df = engine.profiler.to_frame(by_item=False).set_index('step')
+        self.assertEqual(df.loc['Engine.backtest', 'calls'], 1)
+        self.assertEqual(df.loc['QuandlFutures.load_data', 'calls'], 4)
+        self.assertFalse(df['memory'].isnull().any())
+
+        df = engine.profiler.to_frame()
+        items = df.loc[df['step'] == 'QuandlFutures.load_data', 'item']
+        self.assertIn('QuandlFutures(CME/ESH2015)', items.tolist())
+
+    def test_processes(self):
+        store = InMemoryArctic()
+        populate(store, ['CME_ES', 'CME_TY'], start_yyyymm=201501,
+                 end_yyyymm=201512)
+        calls = []
+        with use_store(store):
+            for n_jobs in [1, 2]:
+                engine = adagio.Engine(profile=True, n_jobs=n_jobs)
+                engine.add(adagio.LongOnly(lo_ticker=['CME_ES', 'CME_TY']))
+                engine.backtest()
+                df = engine.profiler.to_frame(by_item=False)
+                calls.append(df.set_index('step')['calls'])
+
+        # steps run in worker processes are recorded as well
+        for step in ['QuandlFutures.load_data', 'QuandlFutures.backtest']:
+            self.assertEqual(calls[1][step], calls[0][step])
@@ -0,0 +1,67 @@
+import unittest
+
+from adagio.benchmarks.synthetic import InMemoryArctic
+from adagio.layers.contract import QuandlFutures
+from adagio.layers.longonly import LongOnlyQuandlFutures
+from adagio.utils import keys
+from adagio.utils.const import DEFAULT_ROLL_RULE, FuturesInfo
+from adagio.utils.mongo import get_library, use_store
+from adagio.utils.roll_calendar import (RollCalendar, RollCalendarService,
+                                        ROLL_DATE)
+from adagio.utils.trading_calendar import (ExchangeCalendar,
+                                           get_exchange_calendar)
+
+
+class TestRollCalendar(unittest.TestCase):
+    def test_build(self):
+        # CME_TY has first notice dates
+        for lo_ticker in ['CME_ES', 'CME_TY']:
+            lo = LongOnlyQuandlFutures(lo_ticker=lo_ticker)
+            info = FuturesInfo[lo_ticker].value
+            calendar = RollCalendar.build(2015, 2017, info.last_trade_date,
+                                          info.first_notice_date,
+                                          calendar=lo.calendar)
+            self.assertEqual(len(calendar.table), 36)
+
+            ticker = lo.generic_ticker + 'H2016'
+            params = dict(lo.backtest_params, quandl_ticker=ticker)
+            contract = QuandlFutures(**params)
+            self.assertEqual(calendar.get_roll_dates([ticker]),
+                             [contract.get_roll_date(DEFAULT_ROLL_RULE)])
+
+    def test_service(self):
+        store = InMemoryArctic()
+        info = FuturesInfo.CME_ES.value
+        service = RollCalendarService()
+        with use_store(store):
+            calendar = service.get_calendar('CME_ES', info.last_trade_date,
+                                            yyyymms=[200003])
+            self.assertIn(200003, calendar)
+            self.assertIs(service.get_calendar('CME_ES', info.last_trade_date),
+                          calendar)
+
+            # loaded from the library
+            stored = get_library(keys.roll_calendar).read('CME_ES').data
+            self.assertTrue(
+                stored[ROLL_DATE].equals(calendar.table[ROLL_DATE]))
+            service.clear()
+            loaded = service.get_calendar('CME_ES', info.last_trade_date)
+            self.assertTrue(loaded.table.equals(calendar.table))
+
+            # extended if months are missing
+            calendar = service.get_calendar('CME_ES', info.last_trade_date,
+                                            yyyymms=[199003])
+            self.assertIn(199003, calendar)
+            self.assertIn(200003, calendar)
+
+            # not loaded if holidays are different even with the same name
+            cme = get_exchange_calendar('CME')
+            service.get_calendar('CME_ES', info.last_trade_date,
+                                 trading_calendar=cme)
+            service.clear()
+            weekday = ExchangeCalendar(cme.name)
+            service.get_calendar('CME_ES', info.last_trade_date,
+                                 trading_calendar=weekday)
+            metadata = get_library(keys.roll_calendar).read_metadata(
+                'CME_ES').metadata
+            self.assertEqual(metadata['calendar'], weekday.content_hash)
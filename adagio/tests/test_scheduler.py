@@ -0,0 +1,35 @@
+import unittest
+
+from adagio.layers.scheduler import Scheduler
+
+
+class TestScheduler(unittest.TestCase):
+    def test_run_in_order(self):
+        result = []
+        scheduler = Scheduler()
+        scheduler.add('c', lambda: result.append('c'), depends_on=['a', 'b'])
+        scheduler.add('a', lambda: result.append('a'))
+        scheduler.add('b', lambda: result.append('b'), depends_on=['a'])
+        scheduler.run()
+        self.assertEqual(result, ['a', 'b', 'c'])
+
+    def test_invalid_dependencies(self):
+        scheduler = Scheduler()
+        scheduler.add('a', lambda: None, depends_on=['b'])
+        scheduler.add('b', lambda: None, depends_on=['a'])
+        with self.assertRaises(ValueError):
+            scheduler.run()
+
+        scheduler = Scheduler()
+        scheduler.add('a', lambda: None, depends_on=['x'])
+        with self.assertRaises(ValueError):
+            scheduler.run()
+
+    def test_exception(self):
+        def fail():
+            raise RuntimeError()
+
+        scheduler = Scheduler()
+        scheduler.add('a', fail)
+        with self.assertRaises(RuntimeError):
+            scheduler.run()
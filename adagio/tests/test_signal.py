@@ -0,0 +1,46 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from adagio.layers.signal import (signal_trend_ma_xover_batch,
+                                  signal_trend_ma_xover_single)
+from adagio.utils.ewm import ewm_mean, ewm_std
+
+
+class TestSignal(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        index = pd.bdate_range('2000-01-03', periods=2000)
+        self.returns = pd.DataFrame(rng.normal(0.0, 0.01, (2000, 3)),
+                                    index=index, columns=['a', 'b', 'c'])
+        # instruments start on different dates and have missing values
+        self.returns.iloc[:300, 1] = np.nan
+        self.returns.iloc[1000:1005, 2] = np.nan
+
+    def test_ewm(self):
+        levels = self.returns.add(1).cumprod()
+        halflives = [0.5, 8, 252]
+        means = ewm_mean(levels.values, halflives)
+        for mean, halflife in zip(means, halflives):
+            expected = levels.ewm(halflife=halflife).mean().values
+            np.testing.assert_allclose(mean, expected, rtol=1e-10)
+
+        for halflife in [8, 252]:
+            expected = self.returns.ewm(halflife=halflife).std().values
+            np.testing.assert_allclose(ewm_std(self.returns.values, halflife),
+                                       expected, rtol=1e-8)
+
+    def test_ma_xover_batch(self):
+        windows = [[8, 24], [16, 48], [32, 96]]
+        signal = signal_trend_ma_xover_batch(self.returns, windows)
+        self.assertTrue(signal.columns.equals(self.returns.columns))
+
+        for name in self.returns:
+            expected = pd.concat([signal_trend_ma_xover_single(
+                self.returns[name], *w) for w in windows], axis=1).mean(axis=1)
+            result = signal_trend_ma_xover_batch(self.returns[name], windows)
+            self.assertIsInstance(result, pd.Series)
+            pd.testing.assert_series_equal(result, expected, rtol=1e-8)
+            pd.testing.assert_series_equal(signal[name], expected,
+                                           check_names=False, rtol=1e-8)
@@ -0,0 +1,176 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+import pandas as pd
+from arctic.date import DateRange
+from arctic.exceptions import NoDataFoundException
+
+import adagio
+from adagio.benchmarks.synthetic import InMemoryArctic, populate
+from adagio.utils import keys
+from adagio.utils.mongo import get_library, iter_read, use_store
+from adagio.utils.storage import LocalStore, copy_library
+
+
+class TestLocalStore(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.store = LocalStore(self.path)
+        self.store.initialize_library('test')
+        self.library = self.store['test']
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_read_write(self):
+        index = pd.date_range('2018-01-01', periods=5, name='Date')
+        df = pd.DataFrame({'Settle': np.arange(5.0), 'Volume': np.arange(5)},
+                          index=index)
+        item = self.library.write('CME/ESH2018', df, metadata={'a': 1})
+        self.assertEqual(item.version, 1)
+
+        item = self.library.read('CME/ESH2018')
+        pd.testing.assert_frame_equal(item.data, df, check_freq=False)
+        self.assertEqual(item.metadata, {'a': 1})
+        data = self.library.read('CME/ESH2018', columns=['Volume']).data
+        pd.testing.assert_frame_equal(data, df[['Volume']], check_freq=False)
+
+        # modifying data read doesn't change the stored data
+        item.data.iloc[0] = -1.0
+        data = self.library.read('CME/ESH2018').data
+        self.assertEqual(data['Settle'].iloc[0], 0.0)
+
+        self.library.write('CME/ESH2018', df.iloc[:3])
+        item = self.library.read('CME/ESH2018')
+        self.assertEqual(item.version, 2)
+        self.assertEqual(len(item.data), 3)
+        self.assertEqual(self.library.read_metadata('CME/ESH2018').version, 2)
+
+        series = pd.Series(np.arange(5.0), index=index, name='EUR/USD')
+        self.library.write('EUR', series)
+        pd.testing.assert_series_equal(self.library.read('EUR').data, series,
+                                       check_freq=False)
+
+        self.library.write('obj', {'x': [1, 2]})
+        self.assertEqual(self.library.read('obj').data, {'x': [1, 2]})
+
+    def test_append(self):
+        index = pd.date_range('2018-01-01', periods=5, name='Date')
+        df = pd.DataFrame({'Settle': np.arange(5.0)}, index=index)
+        self.library.append('CME/ESH2018', df.iloc[:3], metadata={'a': 1})
+        item = self.library.append('CME/ESH2018', df.iloc[3:])
+        self.assertEqual(item.version, 2)
+
+        item = self.library.read('CME/ESH2018')
+        pd.testing.assert_frame_equal(item.data, df, check_freq=False)
+        self.assertEqual(item.metadata, {'a': 1})
+
+    def test_versions(self):
+        for i in range(3):
+            self.library.write('CME/ESH2018', i)
+        path = self.library._symbol_path('CME/ESH2018')
+        self.assertEqual(sorted(i for i in os.listdir(path)
+                                if i.startswith('v')), ['v2', 'v3'])
+
+        # a reader which has read the meta file of a removed version reads
+        # the latest one
+        read_meta = self.library._read_meta
+        stale = [dict(read_meta('CME/ESH2018'), version=1)]
+
+        def read_stale_meta(symbol):
+            return stale.pop() if len(stale) > 0 else read_meta(symbol)
+
+        self.library._read_meta = read_stale_meta
+        self.assertEqual(self.library.read('CME/ESH2018').data, 2)
+
+    def test_read_part(self):
+        index = pd.date_range('2018-01-01', periods=10, name='Date')
+        df = pd.DataFrame({'Open': np.arange(10.0), 'Settle': np.arange(10.0),
+                           'Volume': np.arange(10.0)}, index=index)
+        self.library.write('CME/ESH2018', df)
+        date_range = DateRange('2018-01-03', '2018-01-05')
+
+        data = self.library.read('CME/ESH2018', columns=['Volume', 'Settle',
+                                                         'Last'],
+                                 date_range=date_range).data
+        pd.testing.assert_frame_equal(
+            data, df.loc['2018-01-03':'2018-01-05', ['Settle', 'Volume']],
+            check_freq=False)
+
+        # through the data cache
+        with use_store(self.store):
+            library = get_library(keys.quandl_contract)
+            library.write('CME/ESH2018', df)
+            data = library.read('CME/ESH2018', columns=['Settle']).data
+            self.assertEqual(data.columns.tolist(), ['Settle'])
+            self.assertEqual(len(data), 10)
+            data = library.read('CME/ESH2018', date_range=date_range).data
+            self.assertEqual(data.columns.tolist(), df.columns.tolist())
+            self.assertEqual(len(data), 3)
+
+    def test_symbols(self):
+        self.library.write('CME/ESH2018', 1)
+        self.library.write('CME/ESM2018', 2)
+        self.library.write('CME/SPH2018', 3)
+        self.assertEqual(self.library.list_symbols(regex='^CME/ES'),
+                         ['CME/ESH2018', 'CME/ESM2018'])
+        self.assertEqual(self.store.list_libraries(), ['test'])
+
+        self.library.delete('CME/ESH2018')
+        self.assertFalse(self.library.has_symbol('CME/ESH2018'))
+        with self.assertRaises(NoDataFoundException):
+            self.library.read('CME/ESH2018')
+        with self.assertRaises(KeyError):
+            _ = self.store['unknown']
+
+    def test_backtest(self):
+        memory_store = InMemoryArctic()
+        populate(memory_store, ['CME_ES'], start_yyyymm=201501,
+                 end_yyyymm=201512)
+        library_name = keys.quandl_contract
+        self.store.initialize_library(library_name)
+        copy_library(memory_store[library_name], self.store[library_name])
+
+        returns = []
+        for store in [memory_store, self.store]:
+            with use_store(store):
+                engine = adagio.Engine()
+                engine.add(adagio.LongOnly(lo_ticker='CME_ES'))
+                engine.backtest()
+                returns.append(engine.get_final_net_returns())
+        pd.testing.assert_series_equal(returns[0], returns[1])
+
+
+class TestIterRead(unittest.TestCase):
+    def setUp(self):
+        self.store = InMemoryArctic()
+        self.store.initialize_library('test')
+        self.library = self.store['test']
+        self.symbols = ['a', 'b', 'c', 'd', 'e']
+        for i, symbol in enumerate(self.symbols):
+            self.library.write(symbol, i)
+
+    def test_order(self):
+        items = list(iter_read(self.library, self.symbols, n_workers=2))
+        self.assertEqual([i.data for i in items], [0, 1, 2, 3, 4])
+
+        items = list(iter_read(self.library, self.symbols,
+                               method='read_metadata', n_workers=1))
+        self.assertEqual([i.symbol for i in items], self.symbols)
+
+    def test_concurrent(self):
+        # reads can only finish if two of them run at the same time
+        barrier = threading.Barrier(2, timeout=10)
+        read = self.library.read
+
+        def wait_and_read(symbol):
+            barrier.wait()
+            return read(symbol)
+
+        self.library.read = wait_and_read
+        items = iter_read(self.library, self.symbols[:4], n_workers=2)
+        self.assertEqual([i.data for i in items], [0, 1, 2, 3])
@@ -0,0 +1,126 @@
+import unittest
+from datetime import datetime
+
+import pandas as pd
+from pandas.tseries.offsets import BDay
+
+from adagio.utils.config import AdagioConfig
+from adagio.utils.date import data_asfreq, date_shift
+from adagio.utils.trading_calendar import (ExchangeCalendar, WEEKDAY,
+                                           get_calendar_key,
+                                           get_exchange_calendar,
+                                           get_ticker_calendar)
+
+
+class TestTradingCalendar(unittest.TestCase):
+    def test_holidays(self):
+        cme = get_exchange_calendar('CME')
+        self.assertIs(get_ticker_calendar('CME/ESH2018'), cme)
+        self.assertIs(get_ticker_calendar('CME_TY'), cme)
+        self.assertFalse(cme.is_trading_day(datetime(2018, 7, 4)))
+        self.assertFalse(cme.is_trading_day(datetime(2018, 3, 30)))
+        self.assertTrue(cme.is_trading_day(datetime(2018, 7, 5)))
+
+        eurex = get_exchange_calendar('EUREX')
+        self.assertTrue(eurex.is_trading_day(datetime(2018, 7, 4)))
+        self.assertFalse(eurex.is_trading_day(datetime(2018, 12, 24)))
+
+        days = get_exchange_calendar('LIFFE').trading_days(
+            datetime(2018, 8, 24), datetime(2018, 8, 31))
+        expected = pd.DatetimeIndex(['2018-08-24', '2018-08-28',
+                                     '2018-08-29', '2018-08-30',
+                                     '2018-08-31'])
+        self.assertTrue(days.equals(expected))
+
+        tfx = get_exchange_calendar('TFX')
+        for holiday in [datetime(2019, 1, 14), datetime(2019, 3, 21),
+                        datetime(2019, 7, 15), datetime(2019, 9, 16),
+                        datetime(2018, 9, 24), datetime(2019, 10, 14),
+                        datetime(2018, 12, 24), datetime(2020, 2, 24)]:
+            self.assertFalse(tfx.is_trading_day(holiday))
+        self.assertTrue(tfx.is_trading_day(datetime(2019, 12, 23)))
+        # substitute holiday when May 3 falls on a Sunday
+        self.assertFalse(tfx.is_trading_day(datetime(2015, 5, 6)))
+        self.assertTrue(tfx.is_trading_day(datetime(2016, 5, 6)))
+        self.assertFalse(get_exchange_calendar('SGX').is_trading_day(
+            datetime(2018, 3, 30)))
+
+        # London-listed ICE products follow London holidays
+        brent = get_ticker_calendar('ICE/BH2018')
+        self.assertIs(get_ticker_calendar('ICE_B'), brent)
+        self.assertFalse(brent.is_trading_day(datetime(2018, 8, 27)))
+        self.assertTrue(brent.is_trading_day(datetime(2018, 7, 4)))
+        self.assertFalse(get_ticker_calendar('ICE/SBH2018').is_trading_day(
+            datetime(2018, 7, 4)))
+
+        # continental LIFFE products follow Euronext holidays
+        cac = get_ticker_calendar('LIFFE/FCEH2018')
+        for ticker in ['LIFFE_FTI', 'LIFFE_I', 'LIFFE_S', 'LIFFE/EBMH2018']:
+            self.assertIs(get_ticker_calendar(ticker), cac)
+        self.assertTrue(cac.is_trading_day(datetime(2018, 8, 27)))
+        self.assertFalse(cac.is_trading_day(datetime(2018, 5, 1)))
+        self.assertFalse(get_ticker_calendar('LIFFE_Z').is_trading_day(
+            datetime(2018, 8, 27)))
+
+        # Canola follows Canadian holidays
+        canola = get_ticker_calendar('ICE/RSF2018')
+        self.assertTrue(canola.is_trading_day(datetime(2018, 7, 4)))
+        self.assertFalse(canola.is_trading_day(datetime(2018, 7, 2)))
+        self.assertFalse(canola.is_trading_day(datetime(2018, 8, 6)))
+
+        # exchanges without holiday rules trade on weekdays
+        self.assertEqual(get_exchange_calendar('XXX'),
+                         ExchangeCalendar(WEEKDAY))
+
+    def test_shift(self):
+        # weekdays are the same as BDay
+        index = pd.date_range('2016-07-01', '2016-09-30', freq='D')
+        weekday = get_exchange_calendar(WEEKDAY)
+        for n in [-3, -1, 0, 1, 3]:
+            self.assertTrue(weekday.shift(index, n).equals(index + n * BDay()))
+            self.assertEqual(weekday.shift(index[1], n), index[1] + n * BDay())
+
+        cme = get_exchange_calendar('CME')
+        self.assertEqual(date_shift(datetime(2018, 7, 5), '-1bd', cme),
+                         datetime(2018, 7, 3))
+        self.assertEqual(date_shift(datetime(2018, 7, 5), '-1bd'),
+                         datetime(2018, 7, 4))
+        # holidays are rolled in the same way as weekends
+        self.assertEqual(date_shift(datetime(2018, 7, 4), '+1bd', cme),
+                         datetime(2018, 7, 5))
+        self.assertEqual(date_shift(datetime(2018, 7, 4), '-1bd', cme),
+                         datetime(2018, 7, 3))
+
+        AdagioConfig.exchange_calendars = False
+        try:
+            self.assertEqual(get_exchange_calendar('CME'),
+                             get_exchange_calendar(WEEKDAY))
+        finally:
+            AdagioConfig.exchange_calendars = True
+
+    def test_calendar_key(self):
+        cme = get_exchange_calendar('CME')
+        key = get_calendar_key([cme, None])
+        self.assertEqual(get_calendar_key([ExchangeCalendar.from_rules(
+            'other', [])]), get_calendar_key([ExchangeCalendar(WEEKDAY)]))
+        self.assertNotEqual(key, get_calendar_key([cme, ExchangeCalendar(
+            'CME', holidays=cme.holidays[:-1])]))
+
+        AdagioConfig.exchange_calendars = False
+        try:
+            self.assertNotEqual(key, get_calendar_key([cme]))
+        finally:
+            AdagioConfig.exchange_calendars = True
+        self.assertEqual(key, get_calendar_key([cme]))
+
+    def test_data_asfreq(self):
+        cme = get_exchange_calendar('CME')
+        index = cme.trading_days(datetime(2018, 5, 25), datetime(2018, 7, 13))
+        data = pd.Series(index.month * 100.0 + index.day, index=index)
+
+        # updated on the 4th trading day of months. 2018-07-04 is a holiday
+        result = data_asfreq(data, '-3bd+MonthBegin', calendar=cme)
+        self.assertEqual(result['2018-07-05'], 606.0)
+        self.assertEqual(result['2018-07-06'], 706.0)
+        result = data_asfreq(data, '-3bd+MonthBegin')
+        self.assertEqual(result['2018-07-05'], 705.0)
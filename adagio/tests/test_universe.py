@@ -0,0 +1,31 @@
+from datetime import datetime
+import unittest
+
+from adagio.utils.const import FuturesInfo
+from adagio.utils.universe import (get_contract_universe, last_trade_date,
+                                   list_contracts)
+
+
+class TestUniverse(unittest.TestCase):
+    def test_last_trade_date(self):
+        rule = FuturesInfo.CME_ES.value.last_trade_date
+        self.assertEqual(last_trade_date('CME/ESH2018', rule),
+                         datetime(2018, 3, 16))
+
+    def test_list_contracts(self):
+        info = FuturesInfo.CME_ES.value
+        tickers = list_contracts('CME/ESH2017', info.roll_schedule,
+                                 info.last_trade_date, '+1y',
+                                 as_of=datetime(2018, 1, 15))
+        self.assertEqual(tickers, ['CME/ESH2017', 'CME/ESM2017',
+                                   'CME/ESU2017', 'CME/ESZ2017',
+                                   'CME/ESH2018', 'CME/ESM2018',
+                                   'CME/ESU2018', 'CME/ESZ2018'])
+
+    def test_universe(self):
+        universe = get_contract_universe(['CME_ES', 'CME_GC'],
+                                         as_of=datetime(2018, 1, 15))
+        info = FuturesInfo.CME_GC.value
+        self.assertEqual(universe['CME_GC'][0], 'CME/GC' + info.start_from)
+        # listed two years ahead at most
+        self.assertEqual(universe['CME_ES'][-1], 'CME/ESZ2019')
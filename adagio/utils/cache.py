@@ -0,0 +1,164 @@
+""" Process-wide LRU cache of data read from libraries """
+from collections import OrderedDict
+import threading
+
+import numpy as np
+import pandas as pd
+
+from . import keys
+from .config import AdagioConfig
+from .storage import BaseLibrary, select_columns
+
+# libraries whose reads go through the cache
+CACHED_LIBRARIES = [keys.quandl_contract, keys.quandl_manifest,
+                    keys.fx_rates]
+
+
+class DataCache(object):
+    """ LRU cache of DataFrame and Series keyed by library and symbol.
+
+    Each entry keeps the version of the data so that it is used only while
+    the stored version is the same. Least recently used entries are evicted
+    when the total size exceeds max_size.
+    """
+
+    def __init__(self, max_size=None):
+        """
+        :param max_size: memory budget in bytes. AdagioConfig.cache_size is
+        used if None. 0 disables the cache.
+        """
+        self._max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def max_size(self):
+        if self._max_size is None:
+            return AdagioConfig.cache_size
+        return self._max_size
+
+    def get(self, key, version):
+        """ Return a copy of the cached data. None if not cached or the
+        version is different """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            data = entry[1]
+        return data.copy()
+
+    def put(self, key, version, data):
+        """ Cache a copy of data. Data other than DataFrame and Series and
+        data larger than max_size are not cached. """
+        if not isinstance(data, (pd.DataFrame, pd.Series)):
+            return
+        size = int(np.sum(data.memory_usage(index=True, deep=True)))
+        if size > self.max_size:
+            return
+
+        data = data.copy()
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (version, data, size)
+            self.size += size
+            while self.size > self.max_size:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        """ Remove all entries. Statistics are kept. """
+        with self._lock:
+            self._entries = OrderedDict()
+            self.size = 0
+
+    def stats(self):
+        """ Return a dict of cache statistics """
+        with self._lock:
+            n_reads = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / n_reads if n_reads > 0 else None,
+                'evictions': self.evictions,
+                'n_items': len(self._entries),
+                'size': self.size,
+                'max_size': self.max_size,
+            }
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[2]
+
+
+class CachedLibrary(object):
+    """ Library whose reads of the latest version go through a DataCache.
+    Other methods are passed to the underlying library. """
+
+    def __init__(self, library, cache):
+        self.library = library
+        self.cache = cache
+        # distinguishes libraries of different stores with the same name
+        self._identity = library_identity(library)
+
+    def __getattr__(self, item):
+        return getattr(self.library, item)
+
+    def read(self, symbol, columns=None, date_range=None, **kwargs):
+        """ Read a symbol. The version is checked with read_metadata and
+        the data is read only if it's not cached. Reads of different columns
+        and date ranges are cached separately. """
+        if len(kwargs) > 0:
+            return self.library.read(symbol, **kwargs)
+        if self.cache.max_size <= 0:
+            return self._read(symbol, columns, date_range)
+
+        key = (self._identity, symbol,
+               None if columns is None else tuple(columns),
+               None if date_range is None else (date_range.start,
+                                                date_range.end))
+        item = self.library.read_metadata(symbol)
+        data = self.cache.get(key, item.version)
+        if data is not None:
+            return item._replace(data=data)
+
+        item = self._read(symbol, columns, date_range)
+        self.cache.put(key, item.version, item.data)
+        return item
+
+    def _read(self, symbol, columns, date_range):
+        if isinstance(self.library, BaseLibrary):
+            return self.library.read(symbol, columns=columns,
+                                     date_range=date_range)
+        # arctic only supports date_range
+        item = self.library.read(symbol, date_range=date_range)
+        return item._replace(data=select_columns(item.data, columns))
+
+
+def library_identity(library):
+    """ Return a key identifying where a library is stored. It's the same
+    for all handles of the library (e.g., those created again by set_store
+    or in a forked process) so that they share entries of the cache.
+
+    :param library: arctic VersionStore or BaseLibrary
+    :return: hashable object
+    """
+    if isinstance(library, BaseLibrary):
+        return library.identity
+    arctic_lib = library._arctic_lib
+    return 'arctic', arctic_lib.arctic.mongo_host, arctic_lib.get_name()
+
+
+_data_cache = DataCache()
+
+
+def get_data_cache():
+    """ Return the process-wide DataCache """
+    return _data_cache
@@ -1,3 +1,21 @@
 class AdagioConfig:
     quandl_token = ''
     arctic_host = 'localhost'
+    n_read_workers = 8
+    # memory budget of the data cache in bytes
+    cache_size = 2 ** 30
+    # business days of futures skip exchange holidays if True, otherwise
+    # all weekdays are business days
+    exchange_calendars = True
+    # max number of rebalance masks kept
+    rebalance_cache_size = 1024
+    # max number of downloads in flight
+    download_workers = 4
+    # max number of downloads per second
+    download_rate = 10.0
+    download_retries = 3
+    # seconds to wait before the first retry
+    download_backoff = 1.0
+    # business days before the last stored date downloaded again to pick up
+    # revisions of live contracts
+    download_overlap = 5
@@ -19,6 +19,12 @@ ANNUAL_FACTOR = 252.0
 RETURN_KEY_PRIORITY = ("Settle", "Settlement Price", "Last Traded",
                        "Last", "Close", "Previous Settlement")
 VOLUME_KEY_PRIORITY = ('Volume', 'Total Volume')
+# columns of contract data read for backtests by default
+DATA_COLUMNS = RETURN_KEY_PRIORITY + VOLUME_KEY_PRIORITY
+# data loaded before and after the backtest period so that prices at both
+# ends are cleaned in the same way as with the whole history
+DATA_MARGIN_BEFORE = "-1m"
+DATA_MARGIN_AFTER = "+1m"
 DEFAULT_ROLL_RULE = "-3bd"
 QUANDL_GENERIC_TICKER_MATCH = '^\w+/\w+$'
 QUANDL_FULL_TICKER_MATCH = '^\w+/\w+[FGHJKMNQUVXZ][0-9]+$'
@@ -55,6 +61,18 @@ class AssetClass(Enum):
     COMDTY_FUT = "commodity_futures"
 
 
+# contracts whose last trade date is within the horizon are assumed to be
+# listed (shift string applied to the as-of date)
+LISTING_HORIZON = {
+    AssetClass.EQUITY_FUT.value: '+2y',
+    AssetClass.VOL_INDEX_FUT.value: '+1y',
+    AssetClass.GOVT_FUT.value: '+1y',
+    AssetClass.MM_FUT.value: '+10y',
+    AssetClass.FX_FUT.value: '+2y',
+    AssetClass.COMDTY_FUT.value: '+3y',
+}
+
+
 class Denominator(Enum):
     GOVT_FUT = 'government_bond_futures'
     MM_FUT = 'money_market_futures'
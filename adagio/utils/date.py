@@ -1,10 +1,17 @@
+from collections import OrderedDict
+from datetime import date
+from functools import lru_cache
 import re
+import threading
 
 import pandas as pd
 import numpy as np
-from numpy import int64
 from pandas.tseries.offsets import *
 
+from .config import AdagioConfig
+from .profiler import profiled
+from .trading_calendar import get_exchange_calendar, WEEKDAY
+
 # copied from pandas.tseries.offset
 __all__ = {
     'day': Day,
@@ -74,19 +81,72 @@ _offset_kwds = {
 }
 
 
-def date_shift(dtime, shift_string):
+_SHIFT_PATTERN = re.compile(r"[-+]?\w+")
+_NUMBER_PATTERN = re.compile(r"^[-+]?[0-9]*")
+
+
+class ShiftRule(object):
+    """ Shift string compiled into offsets. Rules are hashable and compared
+    by their offsets so that equivalent shift strings give the same rule.
+    Use get_shift_rule to share compiled rules. """
+
+    def __init__(self, shift_string):
+        self.shift_string = shift_string
+        self.offsets = tuple(n * offset for n, offset
+                             in parse_shift_string(shift_string))
+
+    def __repr__(self):
+        return "{}('{}')".format(self.__class__.__name__, self.shift_string)
+
+    def __eq__(self, other):
+        return (isinstance(other, ShiftRule)
+                and self.offsets == other.offsets)
+
+    def __hash__(self):
+        return hash(self.offsets)
+
+    def __call__(self, dtime, calendar=None):
+        return self.apply(dtime, calendar)
+
+    def apply(self, dtime, calendar=None):
+        """ Shift dtime (either datetime or DatetimeIndex). Business days
+        are counted on calendar with numpy busday arithmetic.
+
+        :param dtime: datetime or DatetimeIndex
+        :param calendar: ExchangeCalendar. Weekdays if None
+        :return: shifted datetime
+        """
+        if calendar is None:
+            calendar = get_exchange_calendar(WEEKDAY)
+        for offset in self.offsets:
+            if (type(offset) is BusinessDay
+                    and isinstance(dtime, (pd.DatetimeIndex, date))):
+                dtime = calendar.shift(dtime, offset.n)
+            else:
+                dtime = dtime + offset
+        return dtime
+
+
+@lru_cache(maxsize=None)
+def get_shift_rule(shift_string):
+    """ Return a ShiftRule compiled from shift_string. Rules are cached. """
+    return ShiftRule(shift_string)
+
+
+def date_shift(dtime, shift_string, calendar=None):
     """
     Apply shift_string to dtime (can be either datetime or DatetimeIndex)
 
     :param dtime: base datetime one wants to shift
     :param shift_string: string representing how one wants to shift the
-    base datetime
+    base datetime, or ShiftRule
+    :param calendar: ExchangeCalendar on which business days (bd) are
+    counted. Weekdays if None
     :return: shifted datetime
     """
-    _parsed_list = parse_shift_string(shift_string)
-    for _offset in _parsed_list:
-        dtime += _offset[0] * _offset[1]
-    return dtime
+    if not isinstance(shift_string, ShiftRule):
+        shift_string = get_shift_rule(shift_string)
+    return shift_string.apply(dtime, calendar)
 
 
 def parse_shift_string(shift_string):
@@ -97,36 +157,130 @@ def parse_shift_string(shift_string):
     base datetime
     :return:
     """
-    _shift_list = re.findall("[-+]?\w+", shift_string)
+    return [list(i) for i in _parse_shift_string(shift_string)]
+
+
+@lru_cache(maxsize=None)
+def _parse_shift_string(shift_string):
     _parsed_list = []
 
-    for _offset in _shift_list:
+    for _offset in _SHIFT_PATTERN.findall(shift_string):
         # split into shift integer and offset class name
-        _shift_num = re.match("(^[-+]?[0-9]*)", _offset).group(0)
+        _shift_num = _NUMBER_PATTERN.match(_offset).group(0)
         _shift_str = _offset.replace(_shift_num, "")
-        _split = [_shift_num, _shift_str]
 
-        if _split[0] == "+":
+        if _shift_num == "+":
             n = 1
-        elif _split[0] == "-":
+        elif _shift_num == "-":
             n = -1
         else:
-            n = int(_split[0])
-        name = assign_offset_class(_split[1].lower())
-        _parsed_list.append([n, name])
-    return _parsed_list
+            n = int(_shift_num)
+        name = assign_offset_class(_shift_str.lower())
+        _parsed_list.append((n, name))
+    return tuple(_parsed_list)
 
 
 def assign_offset_class(offset_name):
     _class = __all__[offset_name]
     if offset_name in _offset_kwds.keys():
         _kwds = _offset_kwds[offset_name]
-        return eval("_class({}={})".format(_kwds[0], _kwds[1]))
+        return _class(**{_kwds[0]: _kwds[1]})
     else:
         return _class()
 
 
-def data_asfreq(data, shift_string, fill_method="pad"):
+class RebalanceMaskCache(object):
+    """ LRU cache of rebalance masks keyed by index and ShiftRule.
+
+    A rebalance mask is a boolean array which is True on dates of an index
+    whose shifted date differs from the one of the previous date, i.e., the
+    dates data is updated on when its frequency is changed. Items on the
+    same index with the same rule and calendar share one mask.
+    """
+
+    def __init__(self, max_size=None):
+        """
+        :param max_size: max number of masks kept.
+        AdagioConfig.rebalance_cache_size is used if None. 0 disables the
+        cache.
+        """
+        self._max_size = max_size
+        self._masks = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_size(self):
+        if self._max_size is None:
+            return AdagioConfig.rebalance_cache_size
+        return self._max_size
+
+    def get_mask(self, index, shift_string, calendar=None):
+        """ Return a read-only rebalance mask of a DatetimeIndex
+
+        :param index: DatetimeIndex
+        :param shift_string: string or ShiftRule
+        :param calendar: ExchangeCalendar. Weekdays if None
+        :return: numpy array of bool
+        """
+        if not isinstance(shift_string, ShiftRule):
+            shift_string = get_shift_rule(shift_string)
+        if calendar is None:
+            calendar = get_exchange_calendar(WEEKDAY)
+        values = index.asi8
+        key = (shift_string, calendar, len(values), hash(values.tobytes()))
+
+        with self._lock:
+            mask = self._masks.get(key)
+            if mask is not None:
+                self._masks.move_to_end(key)
+                self.hits += 1
+                return mask
+            self.misses += 1
+
+        mask = _rebalance_mask(index, shift_string, calendar)
+        if self.max_size > 0:
+            with self._lock:
+                self._masks[key] = mask
+                while len(self._masks) > self.max_size:
+                    self._masks.popitem(last=False)
+        return mask
+
+    def clear(self):
+        """ Remove all masks. Statistics are kept. """
+        with self._lock:
+            self._masks = OrderedDict()
+
+    def stats(self):
+        """ Return a dict of cache statistics """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'n_items': len(self._masks),
+                'max_size': self.max_size,
+            }
+
+
+def _rebalance_mask(index, rule, calendar):
+    shifted = rule.apply(index, calendar).asi8
+    mask = np.zeros(len(shifted), dtype=bool)
+    mask[1:] = np.diff(shifted) > 0
+    mask.flags.writeable = False
+    return mask
+
+
+_rebalance_mask_cache = RebalanceMaskCache()
+
+
+def get_rebalance_mask_cache():
+    """ Return the process-wide RebalanceMaskCache """
+    return _rebalance_mask_cache
+
+
+@profiled()
+def data_asfreq(data, shift_string, fill_method="pad", calendar=None):
     """ Change the data frequency based on shift_string while keeping 
     the original index of data
     
@@ -134,18 +288,21 @@ def data_asfreq(data, shift_string, fill_method="pad"):
     :param shift_string: string representing how one wants to shift the
     base datetime. Data specified by this string will be returned.
     :param fill_method: fill method to be used for non-specified data
+    :param calendar: ExchangeCalendar on which business days are counted.
+    Weekdays if None
     :return: 
     """
-    flg = freq_flg(data, shift_string)
-    return data.where(flg.values > 0).fillna(method=fill_method)
+    mask = get_rebalance_mask_cache().get_mask(data.index, shift_string,
+                                               calendar)
+    if data.ndim > 1:
+        # view of the mask repeated over columns
+        mask = np.broadcast_to(mask[:, np.newaxis], data.shape)
+    return data.where(mask).fillna(method=fill_method)
 
 
-def freq_flg(data, shift_string):
+def freq_flg(data, shift_string, calendar=None):
     """ Create series which contains flag values on dates specified
     by shift_string. Internal function. """
-    tmp = data.copy(True)
-    tmp.index = date_shift(data.index, shift_string)
-
-    flg = pd.Series(tmp.index.astype(int64),
-                    index=data.index).diff().fillna(0).pipe(np.sign)
-    return flg
+    mask = get_rebalance_mask_cache().get_mask(data.index, shift_string,
+                                               calendar)
+    return pd.Series(mask.astype(float), index=data.index)
@@ -13,3 +13,18 @@ def check_quandl_ticker(func):
         return ret
 
     return wrapper
+
+
+def cached(func):
+    """ Cache the return value of a method in the _cache dict of the
+    instance. The cache must be cleared by the instance when the inputs of
+    the method change. Returned objects are shared between calls and should
+    not be modified in place. """
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        key = (func.__name__, args, tuple(sorted(kwargs.items())))
+        if key not in self._cache:
+            self._cache[key] = func(self, *args, **kwargs)
+        return self._cache[key]
+
+    return wrapper
@@ -0,0 +1,132 @@
+""" Downloaders of contract data with rate limiting and retries """
+import threading
+import time
+
+import quandl
+from quandl.errors.quandl_error import (LimitExceededError,
+                                        InternalServerError,
+                                        ServiceUnavailableError)
+from requests.exceptions import ConnectionError, Timeout
+
+from .config import AdagioConfig
+from .logging import get_logger
+
+logger = get_logger(name=__name__)
+
+# errors which might not happen again
+RETRY_ERRORS = (LimitExceededError, InternalServerError,
+                ServiceUnavailableError, ConnectionError, Timeout)
+
+
+class RateLimiter(object):
+    """ Token bucket allowing rate calls per second on average and up to
+    capacity calls at once. Can be shared across threads. """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """ Take a token. Block until a token is available """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens +
+                                   (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class Downloader(object):
+    """ Base class of downloaders. Calls of download are limited by a
+    RateLimiter and the number of calls in flight, and retried with
+    exponential backoff on RETRY_ERRORS. """
+
+    def __init__(self, n_workers=None, rate=None, retries=None,
+                 backoff=None):
+        """
+        :param n_workers: max number of calls in flight.
+        AdagioConfig.download_workers if None
+        :param rate: calls per second. AdagioConfig.download_rate if None
+        :param retries: max number of retries. AdagioConfig.download_retries
+        if None
+        :param backoff: seconds to wait before the first retry, doubled
+        every retry. AdagioConfig.download_backoff if None
+        """
+        if n_workers is None:
+            n_workers = AdagioConfig.download_workers
+        if rate is None:
+            rate = AdagioConfig.download_rate
+        if retries is None:
+            retries = AdagioConfig.download_retries
+        if backoff is None:
+            backoff = AdagioConfig.download_backoff
+        self.n_workers = n_workers
+        self.rate_limiter = RateLimiter(rate)
+        self._semaphore = threading.BoundedSemaphore(n_workers)
+        self.retries = retries
+        self.backoff = backoff
+
+    def get(self, ticker, start_date=None):
+        """ Return data of a ticker
+
+        :param ticker: quandl ticker
+        :param start_date: datetime. Only rows on and after start_date are
+        returned if given
+        :return:
+        """
+        for attempt in range(self.retries + 1):
+            self.rate_limiter.acquire()
+            try:
+                with self._semaphore:
+                    return self.download(ticker, start_date=start_date)
+            except RETRY_ERRORS as e:
+                if attempt == self.retries:
+                    raise
+                wait = self.backoff * 2 ** attempt
+                logger.warning('Retrying {} in {}s: {!r}'
+                               .format(ticker, wait, e))
+                time.sleep(wait)
+
+    def download(self, ticker, start_date=None):
+        """ Download data of a ticker on and after start_date (all rows if
+        None). quandl.NotFoundError must be raised if the ticker doesn't
+        exist """
+        raise NotImplementedError()
+
+
+class QuandlDownloader(Downloader):
+    def download(self, ticker, start_date=None):
+        kwargs = dict()
+        if start_date is not None:
+            kwargs['start_date'] = start_date.strftime('%Y-%m-%d')
+        return quandl.get(ticker, api_key=AdagioConfig.quandl_token, **kwargs)
+
+
+_downloader = None
+_lock = threading.Lock()
+
+
+def get_downloader():
+    """ Return the downloader used to update the database. QuandlDownloader
+    is created on first use if not set """
+    global _downloader
+    with _lock:
+        if _downloader is None:
+            _downloader = QuandlDownloader()
+        return _downloader
+
+
+def set_downloader(downloader):
+    """ Replace the downloader (e.g., with one reading a local server). If
+    None, QuandlDownloader is created again on next use. """
+    global _downloader
+    with _lock:
+        _downloader = downloader
@@ -0,0 +1,99 @@
+""" Exponentially weighted moments computed with numpy.
+
+Functions give the same results as pandas ewm(halflife=...) with the
+default options (adjust=True, ignore_na=False) but take 2d arrays of
+dates x instruments and evaluate several halflives at once.
+
+The recursion S_t = decay * S_{t-1} + x_t is written in closed form as
+decay ** t * cumsum(x_i * decay ** -i) so that it runs as vectorised
+cumulative sums. Dates are processed in blocks short enough for
+decay ** -i not to overflow.
+"""
+import numpy as np
+
+# max of -log(decay ** i) within a block
+MAX_EXPONENT = 500.0
+
+
+def halflife_to_decay(halflife):
+    """ Return the decay factor (1 - alpha) of a halflife """
+    return np.exp(np.log(0.5) / np.asarray(halflife, dtype=float))
+
+
+def ewm_sum(values, decays):
+    """ Return exponentially weighted cumulative sums
+    S_t = decay * S_{t-1} + values_t for each decay factor
+
+    :param values: array of shape (n_dates, ...) without NaN
+    :param decays: list-like of decay factors between 0 and 1
+    :return: array of shape (len(decays), n_dates, ...)
+    """
+    values = np.asarray(values, dtype=float)
+    decays = np.asarray(decays, dtype=float)
+    log_decays = np.log(decays)
+    n_dates = values.shape[0]
+
+    max_rate = -log_decays.min() if len(decays) > 0 else 0.0
+    if max_rate > 0:
+        block = max(1, int(MAX_EXPONENT // max_rate))
+    else:
+        block = max(1, n_dates)
+
+    # decays broadcast over dates and instruments
+    shape = (len(decays),) + (1,) * values.ndim
+    out = np.empty((len(decays),) + values.shape)
+    carry = np.zeros((len(decays),) + values.shape[1:])
+    for start in range(0, n_dates, block):
+        chunk = values[start:start + block]
+        exponents = np.outer(log_decays, np.arange(len(chunk)))
+        exponents = exponents.reshape(exponents.shape + shape[2:])
+        sums = out[:, start:start + len(chunk)]
+        np.multiply(chunk[np.newaxis], np.exp(-exponents), out=sums)
+        np.cumsum(sums, axis=1, out=sums)
+        sums += carry[:, np.newaxis] * decays.reshape(shape)
+        sums *= np.exp(exponents)
+        carry = sums[:, -1]
+    return out
+
+
+def ewm_mean(values, halflives):
+    """ Exponentially weighted moving averages of several halflives
+
+    :param values: array of shape (n_dates, ...). NaN is skipped.
+    :param halflives: list-like of halflives
+    :return: array of shape (len(halflives), n_dates, ...)
+    """
+    values = np.asarray(values, dtype=float)
+    is_valid = ~np.isnan(values)
+    decays = halflife_to_decay(halflives)
+
+    numerator = ewm_sum(np.where(is_valid, values, 0.0), decays)
+    denominator = ewm_sum(is_valid, decays)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator > 0, numerator / denominator, np.nan)
+
+
+def ewm_std(values, halflife):
+    """ Exponentially weighted moving standard deviation (bias corrected)
+
+    :param values: array of shape (n_dates, ...). NaN is skipped.
+    :param halflife: halflife
+    :return: array of the same shape as values
+    """
+    values = np.asarray(values, dtype=float)
+    is_valid = ~np.isnan(values)
+    x = np.where(is_valid, values, 0.0)
+    decay = halflife_to_decay(halflife)
+
+    # sums of weights, values and squared values in one pass
+    sums = ewm_sum(np.stack([is_valid, x, x * x], axis=1), [decay])[0]
+    weights, first, second = np.moveaxis(sums, 1, 0)
+    squared_weights = ewm_sum(is_valid, [decay * decay])[0]
+    n_obs = np.cumsum(is_valid, axis=0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = first / weights
+        variance = second / weights - mean * mean
+        variance *= weights * weights / (weights * weights - squared_weights)
+    variance = np.where(n_obs >= 2, np.maximum(variance, 0.0), np.nan)
+    return np.sqrt(variance)
@@ -0,0 +1,141 @@
+""" Fx rates used to convert contract returns into the backtest currency """
+import threading
+
+import numpy as np
+import pandas as pd
+
+from . import keys
+from .mongo import get_library
+
+BASE_CCY = 'USD'
+
+
+class FxService(object):
+    """ Fx rates loaded once and shared by all contracts.
+
+    Rates stored in the fx_rates library are quoted against BASE_CCY (e.g.,
+    EUR/USD or USD/JPY). They are read once per currency and kept as the
+    value of one unit of the currency in BASE_CCY. Rates of a pair are
+    computed once in both directions and crosses are triangulated through
+    BASE_CCY. Adjustments (1 + fx returns) of a pair are computed once over
+    all dates of the rates and sliced for each contract.
+    """
+
+    def __init__(self):
+        self._values = dict()
+        self._rates = dict()
+        self._growths = dict()
+        self._lock = threading.RLock()
+
+    def symbols(self, currency):
+        """ Return fx symbols stored for a currency """
+        if currency == BASE_CCY:
+            return []
+        library = get_library(keys.fx_rates)
+        symbols = library.list_symbols(regex=currency)
+        if len(symbols) > 1:
+            raise ValueError('Multiple fx rates found')
+        if len(symbols) == 0:
+            raise ValueError('No fx rates found for {}'.format(currency))
+        return symbols
+
+    def get_value(self, currency):
+        """ Return a series of the value of one unit of currency in
+        BASE_CCY """
+        with self._lock:
+            if currency not in self._values:
+                self._values[currency] = self._load_value(currency)
+            return self._values[currency]
+
+    def get_rates(self, base, quote):
+        """ Return a series of fx rates base/quote (units of quote per one
+        unit of base). The inverse is computed at the same time. """
+        with self._lock:
+            if (base, quote) not in self._rates:
+                if base == quote:
+                    raise ValueError('Same currencies are given: {}'
+                                     .format(base))
+                rates = self._cross(base, quote)
+                self._rates[(base, quote)] = rates
+                self._rates[(quote, base)] = (
+                    rates.pow(-1).rename('{}/{}'.format(quote, base)))
+            return self._rates[(base, quote)]
+
+    def get_adjustment(self, base, quote, index):
+        """ Return a series of (1 + fx returns) of base/quote aligned to index.
+        Rates are padded over dates of index which don't exist in the
+        rates. Only rates within the range of index are used.
+
+        :param base: contract currency
+        :param quote: backtest currency
+        :param index: DatetimeIndex of the contract
+        :return:
+        """
+        if len(index) == 0:
+            return pd.Series(index=index, dtype=float)
+        dates, growth = self.get_growth(base, quote)
+
+        # dates of index found in the rates padded over the others
+        values = index.values.astype(dates.dtype)
+        positions = np.minimum(np.searchsorted(dates, values), len(dates) - 1)
+        found = np.where(dates[positions] == values,
+                         np.arange(len(index)), -1)
+        found = np.maximum.accumulate(found)
+        levels = np.where(found >= 0, growth[positions[found]], np.nan)
+
+        adjustment = np.ones(len(index))
+        adjustment[1:] = levels[1:] / levels[:-1]
+        adjustment[np.isnan(adjustment)] = 1.0
+        return pd.Series(adjustment, index=index)
+
+    def get_growth(self, base, quote):
+        """ Return dates of the rates base/quote and the cumulative product
+        of (1 + fx returns) over them as numpy arrays. The adjustment
+        between two dates is the ratio of their values. """
+        with self._lock:
+            if (base, quote) not in self._growths:
+                rates = self.get_rates(base, quote)
+                adjustment = rates.pct_change().fillna(0.0).add(1.0)
+                self._growths[(base, quote)] = (
+                    rates.index.values, adjustment.cumprod().values)
+            return self._growths[(base, quote)]
+
+    def clear(self):
+        """ Remove rates loaded so that they are read again on next use """
+        with self._lock:
+            self._values = dict()
+            self._rates = dict()
+            self._growths = dict()
+
+    def _load_value(self, currency):
+        library = get_library(keys.fx_rates)
+        rates = library.read(self.symbols(currency)[0]).data
+
+        if rates.name == '{}/{}'.format(currency, BASE_CCY):
+            return rates
+        elif rates.name == '{}/{}'.format(BASE_CCY, currency):
+            return rates.pow(-1)
+        raise ValueError('Fx rates of {} are not quoted against {}. Got {}'
+                         .format(currency, BASE_CCY, rates.name))
+
+    def _cross(self, base, quote):
+        name = '{}/{}'.format(base, quote)
+        if quote == BASE_CCY:
+            return self.get_value(base).rename(name)
+        if base == BASE_CCY:
+            return self.get_value(quote).pow(-1).rename(name)
+
+        base_value = self.get_value(base)
+        quote_value = self.get_value(quote)
+        index = base_value.index.union(quote_value.index)
+        base_value = base_value.reindex(index).fillna(method='pad')
+        quote_value = quote_value.reindex(index).fillna(method='pad')
+        return base_value.div(quote_value).dropna().rename(name)
+
+
+_fx_service = FxService()
+
+
+def get_fx_service():
+    """ Return the process-wide FxService """
+    return _fx_service
@@ -32,12 +32,18 @@ n_items = 'n_items'
 slippage = 'slippage'
 backtest_ccy = 'backtest_ccy'
 price_source = 'price_source'
+data_columns = 'data_columns'
 nth_contract = 'nth_contract'
 is_spliced = 'is_spliced'
 splice_func = 'splice_func'
 splice_es_and_sp = 'splice_es_and_sp'
 splice_nq_and_nd = 'splice_nq_and_nd'
 splice_ym_and_dj = 'splice_ym_and_dj'
+n_jobs = 'n_jobs'
+use_cache = 'use_cache'
+incremental = 'incremental'
+profile = 'profile'
+profile_memory = 'profile_memory'
 
 # backtest price sources
 pcs_quandl_futures = 'pcs_quandl_futures'
@@ -63,8 +69,17 @@ roll_schedule = 'roll_schedule'
 first_notice_date = 'first_notice_date'
 last_trade_date = 'last_trade_date'
 
+# backtest results
+positions = 'positions'
+gross_returns = 'gross_returns'
+net_returns = 'net_returns'
+data_version = 'data_version'
+trading_calendar = 'trading_calendar'
+
 # MongoDB
 quandl_contract = 'quandl_contract'
+quandl_manifest = 'quandl_manifest'
 cash_returns = 'cash_returns'
 fx_rates = 'fx_rates'
 backtest = 'backtest'
+roll_calendar = 'roll_calendar'
@@ -0,0 +1,76 @@
+""" Manifest of contracts stored in the quandl_contract library.
+
+The manifest of a generic ticker (e.g., CME/ES) is a DataFrame with one row
+per contract describing the stored data, so that contracts can be listed and
+checked for expiry without reading their data.
+"""
+from arctic.exceptions import NoDataFoundException
+import pandas as pd
+
+from . import keys
+from .mongo import get_library
+
+FIRST_DATE = 'first_date'
+LAST_DATE = 'last_date'
+N_ROWS = 'n_rows'
+COLUMNS = 'columns'
+EXPIRED = 'expired'
+VERSION = 'version'
+YYYYMM = 'yyyymm'
+
+MANIFEST_COLUMNS = [FIRST_DATE, LAST_DATE, N_ROWS, COLUMNS, EXPIRED, VERSION,
+                    YYYYMM]
+
+
+def make_entry(yyyymm, data, version, is_expired):
+    """ Return a manifest entry of a contract
+
+    :param yyyymm: int, delivery month of the contract (YYYYMM)
+    :param data: DataFrame stored
+    :param version: version of the stored data
+    :param is_expired: True if the contract is expired
+    :return: dict
+    """
+    return {
+        FIRST_DATE: data.index[0] if len(data) > 0 else pd.NaT,
+        LAST_DATE: data.index[-1] if len(data) > 0 else pd.NaT,
+        N_ROWS: len(data),
+        COLUMNS: ','.join(data.columns),
+        EXPIRED: bool(is_expired),
+        VERSION: version,
+        YYYYMM: yyyymm,
+    }
+
+
+def read_manifest(generic_ticker):
+    """ Return the manifest of a generic ticker sorted by delivery month.
+    None if not found """
+    library = get_library(keys.quandl_manifest)
+    try:
+        return library.read(generic_ticker).data
+    except NoDataFoundException:
+        return None
+
+
+def write_manifest(generic_ticker, entries):
+    """ Write the manifest of a generic ticker
+
+    :param generic_ticker: generic ticker such as CME/ES
+    :param entries: dict of manifest entries keyed by ticker
+    :return:
+    """
+    manifest = pd.DataFrame.from_dict(entries, orient='index',
+                                      columns=MANIFEST_COLUMNS)
+    manifest.index.name = keys.quandl_ticker
+    manifest = manifest.sort_values(YYYYMM)
+    library = get_library(keys.quandl_manifest)
+    library.write(generic_ticker, manifest)
+
+
+def get_entries(generic_ticker):
+    """ Return a dict of manifest entries keyed by ticker. Empty if the
+    manifest is not found """
+    manifest = read_manifest(generic_ticker)
+    if manifest is None:
+        return dict()
+    return manifest.to_dict(orient='index')
@@ -1,16 +1,144 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from itertools import islice
+import os
+import threading
+
 from arctic import Arctic
 
+from .cache import CACHED_LIBRARIES, CachedLibrary, get_data_cache
 from .config import AdagioConfig
 
-arctic_store = Arctic(AdagioConfig.arctic_host)
+
+class StoreManager(object):
+    """ Hold the store from which libraries are returned.
+
+    The Arctic store is created on first use with AdagioConfig.arctic_host
+    and library handles are cached so that only the first access to a
+    library lists the libraries. Reads of CACHED_LIBRARIES go through the
+    process-wide data cache. The manager can be shared across threads.
+    In a forked process, the cached handles are discarded as they refer to
+    the MongoDB connection of the parent process (Arctic re-connects by
+    itself).
+    """
+
+    def __init__(self, store=None):
+        self._store = store
+        self._libraries = dict()
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def get_store(self):
+        """ Return the store. Arctic is created if no store is set """
+        self._check_fork()
+        with self._lock:
+            if self._store is None:
+                self._store = Arctic(AdagioConfig.arctic_host)
+            return self._store
+
+    def set_store(self, store):
+        """ Replace the store and discard cached library handles. Return
+        the previous store """
+        self._check_fork()
+        with self._lock:
+            previous = self._store
+            self._store = store
+            self._libraries = dict()
+            return previous
+
+    def get_library(self, library_name):
+        """ Return a library of the store. Library is initialised if not
+        exists """
+        self._check_fork()
+        library = self._libraries.get(library_name)
+        if library is not None:
+            return library
+
+        store = self.get_store()
+        with self._lock:
+            if library_name not in self._libraries:
+                if library_name not in store.list_libraries():
+                    store.initialize_library(library_name)
+                library = store[library_name]
+                if library_name in CACHED_LIBRARIES:
+                    library = CachedLibrary(library, get_data_cache())
+                self._libraries[library_name] = library
+            return self._libraries[library_name]
+
+    def _check_fork(self):
+        if self._pid != os.getpid():
+            # the lock might have been held by another thread at fork
+            self._lock = threading.Lock()
+            self._libraries = dict()
+            self._pid = os.getpid()
+
+
+_manager = StoreManager()
+
+
+def get_store():
+    """ Return the store from which libraries are returned """
+    return _manager.get_store()
+
+
+def set_store(store):
+    """ Replace the store from which libraries are returned. The store must
+    have the interface of arctic.Arctic (e.g., storage.LocalStore). If None,
+    Arctic is created again on next use.
+
+    :param store: store such as arctic.Arctic or storage.LocalStore
+    :return: the previous store. None if Arctic hasn't been created yet.
+    """
+    return _manager.set_store(store)
+
+
+@contextmanager
+def use_store(store):
+    """ Return libraries of store instead of the current one within the
+    context """
+    original = _manager.set_store(store)
+    try:
+        yield store
+    finally:
+        _manager.set_store(original)
 
 
 def get_library(library_name):
     """ Return arctic library. Library is initialised if not exists
     :rtype: arctic.store.version_store.VersionStore
     """
-    libraries = arctic_store.list_libraries()
-    if library_name not in libraries:
-        arctic_store.initialize_library(library_name)
+    return _manager.get_library(library_name)
+
+
+def iter_read(library, symbols, method='read', n_workers=None, **kwargs):
+    """ Yield items of symbols in order. Symbols are read on threads so that
+    up to n_workers reads are in flight at a time. Reads ahead of the
+    consumer are at most n_workers if the iteration is stopped.
+
+    :param library: library returned by get_library
+    :param symbols: list of symbols to read
+    :param method: name of the library method to call (e.g., read_metadata)
+    :param n_workers: number of threads. AdagioConfig.n_read_workers is used
+    if None.
+    :param kwargs: keyword arguments passed to the method (e.g., columns)
+    :return:
+    """
+    if n_workers is None:
+        n_workers = AdagioConfig.n_read_workers
+    read = partial(getattr(library, method), **kwargs)
+    if n_workers <= 1:
+        for symbol in symbols:
+            yield read(symbol)
+        return
 
-    return arctic_store[library_name]
+    symbols = iter(symbols)
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        futures = deque(executor.submit(read, symbol)
+                        for symbol in islice(symbols, n_workers))
+        while len(futures) > 0:
+            item = futures.popleft().result()
+            for symbol in islice(symbols, 1):
+                futures.append(executor.submit(read, symbol))
+            yield item
@@ -0,0 +1,158 @@
+""" Instrumentation recording wall time, call counts and allocated memory of
+backtest steps. Nothing is recorded unless a Profiler is activated with
+profiling. """
+from contextlib import contextmanager
+from functools import wraps
+import threading
+import time
+import tracemalloc
+
+import pandas as pd
+
+_profiler = None
+
+
+class Profiler(object):
+    """ Statistics of steps keyed by step name and item """
+
+    def __init__(self, trace_memory=False):
+        """
+        :param trace_memory: bool. If True, memory allocated in each step is
+        recorded with tracemalloc which slows down the backtest.
+        """
+        self.trace_memory = trace_memory
+        self.stats = dict()
+        self._lock = threading.Lock()
+
+    def record(self, step, item, elapsed, memory=None):
+        """ Add a call of a step to the statistics """
+        with self._lock:
+            stats = self.stats.setdefault((step, item), [0, 0.0, 0])
+            stats[0] += 1
+            stats[1] += elapsed
+            if memory is not None:
+                stats[2] += memory
+
+    def merge(self, stats):
+        """ Add statistics recorded by another Profiler (e.g., in a worker
+        process) """
+        with self._lock:
+            for key, (calls, elapsed, memory) in stats.items():
+                own = self.stats.setdefault(key, [0, 0.0, 0])
+                own[0] += calls
+                own[1] += elapsed
+                own[2] += memory
+
+    def to_frame(self, by_item=True):
+        """ Return statistics as a DataFrame sorted by time. Time and memory
+        include those of the steps called inside.
+
+        :param by_item: bool. If False, statistics of all items are summed up
+        for each step.
+        :return: DataFrame with columns step, item, calls, time (seconds) and
+        memory (net bytes allocated, NaN if not traced)
+        """
+        records = [[step, item] + stats
+                   for (step, item), stats in self.stats.items()]
+        df = pd.DataFrame(records,
+                          columns=['step', 'item', 'calls', 'time', 'memory'])
+        if not self.trace_memory:
+            df['memory'] = float('nan')
+        if not by_item:
+            df = (df.groupby('step', as_index=False)
+                  .agg({'calls': 'sum', 'time': 'sum', 'memory': 'sum'}))
+            if not self.trace_memory:
+                df['memory'] = float('nan')
+        return df.sort_values('time', ascending=False).reset_index(drop=True)
+
+    def to_json(self, by_item=True):
+        """ Return statistics as a JSON string of a list of records """
+        return self.to_frame(by_item=by_item).to_json(orient='records')
+
+
+class _Timer(object):
+    def __init__(self, profiler, step, item):
+        self.profiler = profiler
+        self.step = step
+        self.item = item
+
+    def __enter__(self):
+        if self.profiler.trace_memory:
+            self.memory = tracemalloc.get_traced_memory()[0]
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, *args):
+        elapsed = time.perf_counter() - self.start
+        if exc_type is not None:
+            # e.g., AttributeError raised while looking for a layer which
+            # has the function in Engine.cascade
+            return
+        memory = None
+        if self.profiler.trace_memory:
+            memory = tracemalloc.get_traced_memory()[0] - self.memory
+        self.profiler.record(self.step, str(self.item), elapsed, memory)
+
+
+class _NullTimer(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+_null_timer = _NullTimer()
+
+
+def get_profiler():
+    """ Return the active Profiler. None if not profiling """
+    return _profiler
+
+
+@contextmanager
+def profiling(profiler):
+    """ Record steps to profiler within the context """
+    global _profiler
+    original = _profiler
+    _profiler = profiler
+    is_tracing = tracemalloc.is_tracing()
+    if profiler.trace_memory and not is_tracing:
+        tracemalloc.start()
+    try:
+        yield profiler
+    finally:
+        if profiler.trace_memory and not is_tracing:
+            tracemalloc.stop()
+        _profiler = original
+
+
+def timed(step, item=''):
+    """ Return a context manager recording a step to the active Profiler.
+    item is converted to a string only if profiling. """
+    if _profiler is None:
+        return _null_timer
+    return _Timer(_profiler, step, item)
+
+
+def profiled(per_item=False):
+    """ Record calls of a function to the active Profiler under its
+    qualified name.
+
+    :param per_item: bool. If True the function is a method and statistics
+    are kept for each instance.
+    """
+    def decorator(func):
+        step = func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if _profiler is None:
+                return func(*args, **kwargs)
+            item = args[0] if per_item else ''
+            with _Timer(_profiler, step, item):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -2,6 +2,7 @@ import re
 from .decorators import check_quandl_ticker
 from .const import (FutureContractMonth, QUANDL_FULL_TICKER_MATCH,
                     QUANDL_GENERIC_TICKER_MATCH, QUANDL_TICKER_FORMAT)
+from .manifest import YYYYMM, read_manifest
 from .mongo import get_library
 from . import keys
 
@@ -79,7 +80,10 @@ def is_generic_futures_ticker(generic_ticker):
 
 def get_tickers_from_db(generic_ticker, start_yyyymm=None, end_yyyymm=None):
     """ Return a sorted list of individual tickers for the given generic
-    Both start_yyyymm and end_yyyymm are inclusive
+    Both start_yyyymm and end_yyyymm are inclusive. Tickers are read from the
+    manifest of the generic ticker. Symbols in the library are scanned only
+    if the manifest does not exist. Contracts written without
+    update_database (e.g., by copy_library) are listed after build_manifest.
 
     :param generic_ticker: generic ticker such as CME/ES
     :param start_yyyymm: int, start date (YYYYMM)
@@ -90,6 +94,17 @@ def get_tickers_from_db(generic_ticker, start_yyyymm=None, end_yyyymm=None):
         raise ValueError('{} is not a generic Quandl ticker'
                          .format(generic_ticker))
 
+    manifest = read_manifest(generic_ticker)
+    if manifest is not None:
+        # the manifest is sorted by delivery month
+        yyyymm = manifest[YYYYMM]
+        selected = yyyymm.notnull()
+        if start_yyyymm is not None:
+            selected &= yyyymm >= start_yyyymm
+        if end_yyyymm is not None:
+            selected &= yyyymm <= end_yyyymm
+        return manifest.index[selected.values].tolist()
+
     library = get_library(keys.quandl_contract)
     symbol_regex = QUANDL_TICKER_FORMAT.format(generic_ticker)
     all_tickers = library.list_symbols(regex=symbol_regex)
@@ -0,0 +1,175 @@
+""" Roll calendars of futures contracts.
+
+A roll calendar is a table with one row per delivery month (yyyymm) holding
+the last trade date, first notice date and roll date of a contract delivered
+in the month. Dates only depend on the delivery month and the date rules of
+the instrument so that one table serves any roll schedule and contracts of
+spliced tickers.
+"""
+from datetime import datetime
+import threading
+
+import numpy as np
+import pandas as pd
+from arctic.exceptions import NoDataFoundException
+
+from . import keys
+from .const import DEFAULT_ROLL_RULE
+from .date import date_shift
+from .logging import get_logger
+from .mongo import get_library
+from .quandl import to_yyyymm
+from .trading_calendar import get_exchange_calendar, WEEKDAY
+
+logger = get_logger(name=__name__)
+
+LAST_TRADE_DATE = 'last_trade_date'
+FIRST_NOTICE_DATE = 'first_notice_date'
+ROLL_DATE = 'roll_date'
+
+# years of delivery months computed after the current year
+HORIZON_YEARS = 5
+
+
+class RollCalendar(object):
+    def __init__(self, table):
+        """
+        :param table: DataFrame indexed by yyyymm with columns LAST_TRADE_DATE,
+        FIRST_NOTICE_DATE and ROLL_DATE
+        """
+        self.table = table
+        self._roll_dates = dict(zip(table.index, table[ROLL_DATE]))
+
+    def __contains__(self, yyyymm):
+        return yyyymm in self._roll_dates
+
+    @classmethod
+    def build(cls, start_year, end_year, last_trade_date,
+              first_notice_date=None, roll_rule=DEFAULT_ROLL_RULE,
+              calendar=None):
+        """ Compute dates of all delivery months between start_year and
+        end_year (both including) at once
+
+        :param start_year: int
+        :param end_year: int
+        :param last_trade_date: shift string from the delivery month-begin
+        :param first_notice_date: shift string from the delivery
+        month-begin. None if the instrument has no first notice date.
+        :param roll_rule: shift string from the roll base date, which is the
+        earlier one of the first notice date and the last trade date
+        :param calendar: ExchangeCalendar on which business days are
+        counted. Weekdays if None
+        :return: RollCalendar
+        """
+        months = pd.date_range(datetime(start_year, 1, 1),
+                               datetime(end_year, 12, 1), freq='MS')
+        last_trade_dates = date_shift(months, last_trade_date, calendar)
+        if first_notice_date is not None:
+            first_notice_dates = date_shift(months, first_notice_date,
+                                            calendar)
+            base_dates = pd.DatetimeIndex(np.minimum(
+                first_notice_dates.values, last_trade_dates.values))
+        else:
+            first_notice_dates = pd.DatetimeIndex([pd.NaT] * len(months))
+            base_dates = last_trade_dates
+
+        table = pd.DataFrame({
+            LAST_TRADE_DATE: last_trade_dates,
+            FIRST_NOTICE_DATE: first_notice_dates,
+            ROLL_DATE: date_shift(base_dates, roll_rule, calendar),
+        }, index=months.year * 100 + months.month)
+        table.index.name = 'yyyymm'
+        return cls(table)
+
+    def get_roll_date(self, yyyymm):
+        """ Return the roll date of the contract delivered in yyyymm """
+        return self._roll_dates[yyyymm]
+
+    def get_roll_dates(self, tickers):
+        """ Return a list of roll dates of full quandl tickers """
+        return [self._roll_dates[to_yyyymm(t)] for t in tickers]
+
+
+class RollCalendarService(object):
+    """ Roll calendars shared by all LongOnly objects.
+
+    A calendar is looked up in memory, then in the roll_calendar library
+    and built only if not found or its rules, trading calendar or months
+    don't match. Built calendars are stored in the library keyed by
+    lo_ticker.
+    """
+
+    def __init__(self):
+        self._calendars = dict()
+        self._lock = threading.Lock()
+
+    def get_calendar(self, lo_ticker, last_trade_date, first_notice_date=None,
+                     roll_rule=DEFAULT_ROLL_RULE, yyyymms=None,
+                     trading_calendar=None):
+        """ Return a RollCalendar of an instrument
+
+        :param lo_ticker: name of the instrument such as CME_ES
+        :param last_trade_date: shift string of the last trade date
+        :param first_notice_date: shift string of the first notice date
+        :param roll_rule: shift string of the roll date
+        :param yyyymms: list of delivery months which must be in the calendar
+        :param trading_calendar: ExchangeCalendar. Weekdays if None
+        :return: RollCalendar
+        """
+        if trading_calendar is None:
+            trading_calendar = get_exchange_calendar(WEEKDAY)
+        rules = [last_trade_date, first_notice_date, roll_rule]
+        # calendars are identified by holidays as names can be the same
+        metadata = {'rules': rules,
+                    'calendar': trading_calendar.content_hash}
+        yyyymms = list(yyyymms) if yyyymms is not None else []
+        key = (lo_ticker, tuple(rules), trading_calendar)
+
+        with self._lock:
+            calendar = self._calendars.get(key)
+            if calendar is None:
+                calendar = self._load(lo_ticker, metadata)
+            if calendar is None or not all(i in calendar for i in yyyymms):
+                start_year = datetime.today().year
+                end_year = start_year + HORIZON_YEARS
+                if calendar is not None:
+                    yyyymms = yyyymms + [calendar.table.index[0],
+                                         calendar.table.index[-1]]
+                if len(yyyymms) > 0:
+                    start_year = min(start_year, min(yyyymms) // 100)
+                    end_year = max(end_year, max(yyyymms) // 100)
+                logger.debug('Building roll calendar of {}'.format(lo_ticker))
+                calendar = RollCalendar.build(start_year, end_year, *rules,
+                                              calendar=trading_calendar)
+                self._save(lo_ticker, metadata, calendar)
+            self._calendars[key] = calendar
+            return calendar
+
+    def clear(self):
+        """ Remove calendars kept in memory """
+        with self._lock:
+            self._calendars = dict()
+
+    @staticmethod
+    def _load(lo_ticker, metadata):
+        library = get_library(keys.roll_calendar)
+        try:
+            item = library.read(lo_ticker)
+        except NoDataFoundException:
+            return None
+        if item.metadata != metadata:
+            return None
+        return RollCalendar(item.data)
+
+    @staticmethod
+    def _save(lo_ticker, metadata, calendar):
+        library = get_library(keys.roll_calendar)
+        library.write(lo_ticker, calendar.table, metadata=metadata)
+
+
+_roll_calendar_service = RollCalendarService()
+
+
+def get_roll_calendar_service():
+    """ Return the process-wide RollCalendarService """
+    return _roll_calendar_service
@@ -0,0 +1,337 @@
+""" Storage backends which can replace the Arctic store used by get_library.
+
+A store has the interface of arctic.Arctic used in adagio (list_libraries,
+initialize_library and item access) and returns libraries with the interface
+of arctic VersionStore (read, read_metadata, write, append, list_symbols,
+has_symbol and delete). Items read are arctic VersionedItem.
+
+read accepts columns and date_range (arctic.date.DateRange, both ends
+included) so that only a part of the data is loaded. Columns which don't
+exist are ignored.
+"""
+import json
+import os
+import pickle
+import re
+import shutil
+import tempfile
+from urllib.parse import quote, unquote
+
+import numpy as np
+import pandas as pd
+from arctic.exceptions import NoDataFoundException
+from arctic.store.versioned_item import VersionedItem
+
+_META_FILE = 'meta.json'
+_INDEX_FILE = 'index.npy'
+_VALUES_FILE = 'values.npy'
+_PICKLE_FILE = 'data.pkl'
+_VERSION_DIR = re.compile(r'^v(\d+)$')
+
+# kinds of stored data
+_FRAME = 'frame'
+_SERIES = 'series'
+_PICKLE = 'pickle'
+
+
+class BaseLibrary(object):
+    def __init__(self, name):
+        self.name = name
+
+    @property
+    def identity(self):
+        """ Key identifying where the library is stored. Libraries kept in
+        memory are identified by the object itself. """
+        return self
+
+    def list_symbols(self, regex=None):
+        raise NotImplementedError()
+
+    def has_symbol(self, symbol):
+        raise NotImplementedError()
+
+    def read(self, symbol, columns=None, date_range=None, **kwargs):
+        raise NotImplementedError()
+
+    def read_metadata(self, symbol, **kwargs):
+        raise NotImplementedError()
+
+    def write(self, symbol, data, metadata=None, **kwargs):
+        raise NotImplementedError()
+
+    def append(self, symbol, data, metadata=None, **kwargs):
+        """ Append rows of data to the stored data as a new version. The
+        stored metadata is kept if metadata is None. """
+        if not self.has_symbol(symbol):
+            return self.write(symbol, data, metadata=metadata)
+        item = self.read(symbol)
+        if metadata is None:
+            metadata = item.metadata
+        return self.write(symbol, pd.concat([item.data, data]),
+                          metadata=metadata)
+
+    def delete(self, symbol):
+        raise NotImplementedError()
+
+    def _not_found(self, symbol):
+        return NoDataFoundException('No data found for {} in library {}'
+                                    .format(symbol, self.name))
+
+
+class BaseStore(object):
+    def __getitem__(self, library_name):
+        raise NotImplementedError()
+
+    def list_libraries(self):
+        raise NotImplementedError()
+
+    def initialize_library(self, library_name, **kwargs):
+        raise NotImplementedError()
+
+
+class LocalLibrary(BaseLibrary):
+    """ Library keeping each symbol in a directory on local disk.
+
+    DataFrame and Series with a DatetimeIndex and numeric values of a single
+    dtype are stored as NPY files, one for the index and one for the values
+    with a row per column. They are read through copy-on-write
+    memory-mapping so that pages are loaded only when accessed and shared
+    between processes until they are modified. Other objects (including
+    DataFrames with columns of different dtypes) are pickled so that dtypes
+    are kept.
+    """
+
+    def __init__(self, name, path):
+        super(LocalLibrary, self).__init__(name)
+        self.path = path
+
+    @property
+    def identity(self):
+        return 'local', os.path.realpath(self.path)
+
+    def list_symbols(self, regex=None):
+        symbols = sorted(unquote(i) for i in os.listdir(self.path)
+                         if os.path.isfile(os.path.join(self.path, i,
+                                                        _META_FILE)))
+        if regex is not None:
+            symbols = [s for s in symbols if re.search(regex, s)]
+        return symbols
+
+    def has_symbol(self, symbol):
+        return os.path.isfile(self._meta_path(symbol))
+
+    def read(self, symbol, columns=None, date_range=None, **kwargs):
+        """ Read data. Only pages of the columns and dates requested are
+        loaded from memory-mapped files. If the version is removed by
+        writes in other processes while reading, the latest version is
+        read instead. """
+        meta = self._read_meta(symbol)
+        while True:
+            try:
+                data = self._read_data(symbol, meta, columns, date_range)
+                return self._item(symbol, data, meta)
+            except FileNotFoundError:
+                latest = self._read_meta(symbol)
+                if latest['version'] == meta['version']:
+                    raise
+                meta = latest
+
+    def _read_data(self, symbol, meta, columns, date_range):
+        """ Read data of the version given by meta """
+        version_path = self._version_path(symbol, meta['version'])
+        if meta['kind'] == _PICKLE:
+            with open(os.path.join(version_path, _PICKLE_FILE), 'rb') as f:
+                data = pickle.load(f)
+            return select_dates(select_columns(data, columns), date_range)
+
+        index = np.load(os.path.join(version_path, _INDEX_FILE),
+                        mmap_mode='c')
+        values = np.load(os.path.join(version_path, _VALUES_FILE),
+                         mmap_mode='c')
+        rows = _date_slice(index, date_range)
+        index = pd.DatetimeIndex(index[rows], name=meta['index_name'])
+        values = values[:, rows]
+        if meta['kind'] == _FRAME:
+            names = meta['columns']
+            if columns is not None:
+                positions = [i for i, c in enumerate(names) if c in columns]
+                names = [names[i] for i in positions]
+                values = values[positions]
+            return pd.DataFrame(values.T, index=index, columns=names,
+                                copy=False)
+        return pd.Series(values[0], index=index, name=meta['name'],
+                         copy=False)
+
+    def read_metadata(self, symbol, **kwargs):
+        return self._item(symbol, None, self._read_meta(symbol))
+
+    def write(self, symbol, data, metadata=None, **kwargs):
+        """ Write data as a new version. The previous version is kept for
+        readers in other processes which have read the meta file before it
+        is replaced and older versions are removed. metadata must be
+        serialisable to JSON. """
+        symbol_path = self._symbol_path(symbol)
+        version = 1
+        if self.has_symbol(symbol):
+            version = self._read_meta(symbol)['version'] + 1
+        else:
+            os.makedirs(symbol_path, exist_ok=True)
+
+        version_path = self._version_path(symbol, version)
+        shutil.rmtree(version_path, ignore_errors=True)
+        os.makedirs(version_path)
+        meta = {'version': version, 'metadata': metadata}
+        meta.update(_write_data(version_path, data))
+
+        # replacing the meta file switches readers to the new version
+        fd, tmp_path = tempfile.mkstemp(dir=symbol_path)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._meta_path(symbol))
+
+        self._remove_versions(symbol, version - 1)
+        return self._item(symbol, None, meta)
+
+    def delete(self, symbol):
+        if not self.has_symbol(symbol):
+            raise self._not_found(symbol)
+        shutil.rmtree(self._symbol_path(symbol))
+
+    def _item(self, symbol, data, meta):
+        return VersionedItem(symbol=symbol, library=self.name, data=data,
+                             version=meta['version'],
+                             metadata=meta['metadata'])
+
+    def _remove_versions(self, symbol, version):
+        """ Remove versions older than version """
+        symbol_path = self._symbol_path(symbol)
+        for name in os.listdir(symbol_path):
+            match = _VERSION_DIR.match(name)
+            if match is not None and int(match.group(1)) < version:
+                shutil.rmtree(os.path.join(symbol_path, name),
+                              ignore_errors=True)
+
+    def _read_meta(self, symbol):
+        try:
+            with open(self._meta_path(symbol)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise self._not_found(symbol)
+
+    def _symbol_path(self, symbol):
+        return os.path.join(self.path, quote(symbol, safe=''))
+
+    def _meta_path(self, symbol):
+        return os.path.join(self._symbol_path(symbol), _META_FILE)
+
+    def _version_path(self, symbol, version):
+        return os.path.join(self._symbol_path(symbol), 'v{}'.format(version))
+
+
+class LocalStore(BaseStore):
+    """ Store keeping each library in a directory on local disk """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def __repr__(self):
+        return '{}({})'.format(self.__class__.__name__, self.path)
+
+    def __getitem__(self, library_name):
+        if library_name not in self.list_libraries():
+            raise KeyError('Library {} not found in {}'
+                           .format(library_name, self))
+        return LocalLibrary(library_name,
+                            os.path.join(self.path, library_name))
+
+    def list_libraries(self):
+        return sorted(i for i in os.listdir(self.path)
+                      if os.path.isdir(os.path.join(self.path, i)))
+
+    def initialize_library(self, library_name, **kwargs):
+        os.makedirs(os.path.join(self.path, library_name), exist_ok=True)
+
+
+def copy_library(source, target):
+    """ Copy the latest version of all symbols in a library to another
+    library (e.g., from Arctic to LocalStore). Versions are not kept, so
+    manifests of copied contracts should be rebuilt by build_manifest. """
+    for symbol in source.list_symbols():
+        item = source.read(symbol)
+        target.write(symbol, item.data, metadata=item.metadata)
+
+
+def select_columns(data, columns):
+    """ Return columns of a DataFrame in the stored order. Columns which
+    don't exist are ignored. Other data is returned as it is. """
+    if columns is None or not isinstance(data, pd.DataFrame):
+        return data
+    return data[[c for c in data.columns if c in columns]]
+
+
+def select_dates(data, date_range):
+    """ Return rows of a DataFrame or Series within date_range (both ends
+    included). Other data is returned as it is. """
+    if date_range is None or not isinstance(data, (pd.DataFrame, pd.Series)):
+        return data
+    return data.loc[date_range.start:date_range.end]
+
+
+def _date_slice(index, date_range):
+    """ Return a slice of rows of a sorted datetime64 array within
+    date_range """
+    if date_range is None:
+        return slice(None)
+    start, end = 0, len(index)
+    if date_range.start is not None:
+        start_dt = pd.Timestamp(date_range.start).to_datetime64()
+        start = np.searchsorted(index, start_dt, side='left')
+    if date_range.end is not None:
+        end_dt = pd.Timestamp(date_range.end).to_datetime64()
+        end = np.searchsorted(index, end_dt, side='right')
+    return slice(start, end)
+
+
+def _is_columnar(data):
+    """ Return True if data can be stored as NPY files """
+    if not isinstance(data, (pd.DataFrame, pd.Series)):
+        return False
+    if not isinstance(data.index, pd.DatetimeIndex) or data.index.tz:
+        return False
+    if isinstance(data, pd.DataFrame):
+        if not all(isinstance(c, str) for c in data.columns):
+            return False
+        dtypes = data.dtypes.tolist()
+    else:
+        if not isinstance(data.name, (str, type(None))):
+            return False
+        dtypes = [data.dtype]
+    # empty files can't be memory-mapped
+    if len(data) == 0 or len(dtypes) == 0:
+        return False
+    # values are stored in one array which has a single dtype
+    if len(set(dtypes)) > 1:
+        return False
+    return np.issubdtype(dtypes[0], np.number)
+
+
+def _write_data(path, data):
+    """ Write data to a directory and return entries of the meta file
+    describing it """
+    if not _is_columnar(data):
+        with open(os.path.join(path, _PICKLE_FILE), 'wb') as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return {'kind': _PICKLE}
+
+    np.save(os.path.join(path, _INDEX_FILE),
+            data.index.values.astype('datetime64[ns]'))
+    meta = {'index_name': data.index.name}
+    if isinstance(data, pd.DataFrame):
+        values = data.values.T
+        meta.update({'kind': _FRAME, 'columns': data.columns.tolist()})
+    else:
+        values = data.values.reshape(1, -1)
+        meta.update({'kind': _SERIES, 'name': data.name})
+    np.save(os.path.join(path, _VALUES_FILE), np.ascontiguousarray(values))
+    return meta
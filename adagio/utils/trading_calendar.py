@@ -0,0 +1,423 @@
+""" Trading calendars of exchanges.
+
+An ExchangeCalendar holds the trading days of an exchange as a numpy
+busdaycalendar (weekmask and an array of holidays) so that business days of
+whole arrays of dates are shifted at once with numpy.busday_offset.
+
+Holidays are generated from the regular holiday rules of each exchange.
+Holidays which don't follow a rule (e.g., lunar new year, unscheduled
+closures) are not included. Calendars are keyed by the exchange prefix of
+tickers (e.g., CME of CME/ESH2018) except for products listed in
+PRODUCT_EXCHANGES (e.g., ICE Brent which is listed in London or CAC40 futures
+listed on Euronext Paris) and exchanges without rules trade on all weekdays.
+"""
+from datetime import datetime
+from functools import lru_cache
+import hashlib
+import re
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.holiday import (Holiday, EasterMonday, GoodFriday,
+                                    USLaborDay, USMemorialDay, USPresidentsDay,
+                                    USThanksgivingDay, MO, nearest_workday,
+                                    next_monday, next_monday_or_tuesday,
+                                    sunday_to_monday)
+from pandas.tseries.offsets import DateOffset
+
+from .config import AdagioConfig
+from .hash import to_hash
+
+WEEKDAY = 'WEEKDAY'
+
+# years between which holidays are generated
+HOLIDAY_START = datetime(1970, 1, 1)
+HOLIDAY_END = datetime(2060, 12, 31)
+
+
+
+class ComputedHoliday(object):
+    """ Holiday whose date is computed for each year (e.g., equinoxes).
+    It has dates of pandas Holiday used by ExchangeCalendar.from_rules. """
+
+    def __init__(self, name, func, observance=None):
+        """
+        :param name: name of the holiday
+        :param func: function returning the date of a year
+        :param observance: function to adjust the date (e.g., sunday_to_monday)
+        """
+        self.name = name
+        self.func = func
+        self.observance = observance
+
+    def __repr__(self):
+        return '{}({})'.format(self.__class__.__name__, self.name)
+
+    def dates(self, start_date, end_date):
+        """ Return a DatetimeIndex of dates between start_date and end_date
+        (both including) """
+        start_date = pd.Timestamp(start_date)
+        end_date = pd.Timestamp(end_date)
+        dates = [pd.Timestamp(self.func(year))
+                 for year in range(start_date.year, end_date.year + 1)]
+        if self.observance is not None:
+            dates = [self.observance(d) for d in dates]
+        dates = pd.DatetimeIndex(dates)
+        return dates[(dates >= start_date) & (dates <= end_date)]
+
+
+def _vernal_equinox(year):
+    """ Day of the vernal equinox in Japan (valid from 1900 to 2099) """
+    if year < 1980:
+        day = int(20.8357 + 0.242194 * (year - 1980)
+                  - int((year - 1983) / 4))
+    else:
+        day = int(20.8431 + 0.242194 * (year - 1980)
+                  - (year - 1980) // 4)
+    return datetime(year, 3, day)
+
+
+def _autumnal_equinox(year):
+    """ Day of the autumnal equinox in Japan (valid from 1900 to 2099) """
+    if year < 1980:
+        day = int(23.2588 + 0.242194 * (year - 1980)
+                  - int((year - 1983) / 4))
+    else:
+        day = int(23.2488 + 0.242194 * (year - 1980)
+                  - (year - 1980) // 4)
+    return datetime(year, 9, day)
+
+
+_US_RULES = [
+    Holiday('New Years Day', month=1, day=1, observance=sunday_to_monday),
+    Holiday('Martin Luther King Jr. Day', start_date=datetime(1998, 1, 1),
+            month=1, day=1, offset=DateOffset(weekday=MO(3))),
+    USPresidentsDay,
+    GoodFriday,
+    USMemorialDay,
+    Holiday('Juneteenth', month=6, day=19, start_date=datetime(2022, 1, 1),
+            observance=nearest_workday),
+    Holiday('Independence Day', month=7, day=4, observance=nearest_workday),
+    USLaborDay,
+    USThanksgivingDay,
+    Holiday('Christmas', month=12, day=25, observance=nearest_workday),
+]
+
+_EUREX_RULES = [
+    Holiday('New Years Day', month=1, day=1),
+    GoodFriday,
+    EasterMonday,
+    Holiday('Labour Day', month=5, day=1),
+    Holiday('Christmas Eve', month=12, day=24),
+    Holiday('Christmas', month=12, day=25),
+    Holiday('Boxing Day', month=12, day=26),
+    Holiday('New Years Eve', month=12, day=31),
+]
+
+# Euronext derivatives markets (Paris, Amsterdam, Brussels, Lisbon) and
+# euro money market futures which follow TARGET closing days
+_EURONEXT_RULES = [
+    Holiday('New Years Day', month=1, day=1),
+    GoodFriday,
+    EasterMonday,
+    Holiday('Labour Day', month=5, day=1),
+    Holiday('Christmas', month=12, day=25),
+    Holiday('Boxing Day', month=12, day=26),
+]
+
+_LONDON_RULES = [
+    Holiday('New Years Day', month=1, day=1, observance=next_monday),
+    GoodFriday,
+    EasterMonday,
+    Holiday('Early May Bank Holiday', month=5, day=1,
+            offset=DateOffset(weekday=MO(1))),
+    Holiday('Spring Bank Holiday', month=5, day=31,
+            offset=DateOffset(weekday=MO(-1))),
+    Holiday('Summer Bank Holiday', month=8, day=31,
+            offset=DateOffset(weekday=MO(-1))),
+    Holiday('Christmas', month=12, day=25, observance=next_monday),
+    Holiday('Boxing Day', month=12, day=26,
+            observance=next_monday_or_tuesday),
+]
+
+_SINGAPORE_RULES = [
+    Holiday('New Years Day', month=1, day=1, observance=sunday_to_monday),
+    GoodFriday,
+    Holiday('Labour Day', month=5, day=1, observance=sunday_to_monday),
+    Holiday('National Day', month=8, day=9, observance=sunday_to_monday),
+    Holiday('Christmas', month=12, day=25, observance=sunday_to_monday),
+]
+
+_SYDNEY_RULES = [
+    Holiday('New Years Day', month=1, day=1, observance=next_monday),
+    Holiday('Australia Day', month=1, day=26, observance=next_monday),
+    GoodFriday,
+    EasterMonday,
+    Holiday('Anzac Day', month=4, day=25),
+    Holiday('Queens Birthday', month=6, day=1,
+            offset=DateOffset(weekday=MO(2))),
+    Holiday('Christmas', month=12, day=25, observance=next_monday),
+    Holiday('Boxing Day', month=12, day=26,
+            observance=next_monday_or_tuesday),
+]
+
+_TOKYO_RULES = [
+    Holiday('New Years Day', month=1, day=1),
+    Holiday('Bank Holiday 2', month=1, day=2),
+    Holiday('Bank Holiday 3', month=1, day=3),
+    Holiday('Coming of Age Day', month=1, day=15,
+            end_date=datetime(1999, 12, 31), observance=sunday_to_monday),
+    Holiday('Coming of Age Day', month=1, day=1,
+            start_date=datetime(2000, 1, 1),
+            offset=DateOffset(weekday=MO(2))),
+    Holiday('National Foundation Day', month=2, day=11,
+            observance=sunday_to_monday),
+    Holiday('Emperors Birthday', month=2, day=23,
+            start_date=datetime(2020, 1, 1), observance=sunday_to_monday),
+    ComputedHoliday('Vernal Equinox Day', _vernal_equinox,
+                    observance=sunday_to_monday),
+    Holiday('Showa Day', month=4, day=29, observance=sunday_to_monday),
+    Holiday('Constitution Memorial Day', month=5, day=3),
+    Holiday('Greenery Day', month=5, day=4),
+    Holiday('Childrens Day', month=5, day=5, observance=sunday_to_monday),
+    # May 6 is a substitute holiday if any of May 3-5 falls on a Sunday,
+    # i.e., May 6 falls on Monday to Wednesday
+    Holiday('Golden Week Substitute Holiday', month=5, day=6,
+            start_date=datetime(2007, 1, 1), days_of_week=(0, 1, 2)),
+    Holiday('Marine Day', month=7, day=20, start_date=datetime(1996, 1, 1),
+            end_date=datetime(2002, 12, 31), observance=sunday_to_monday),
+    Holiday('Marine Day', month=7, day=1, start_date=datetime(2003, 1, 1),
+            offset=DateOffset(weekday=MO(3))),
+    Holiday('Mountain Day', month=8, day=11, start_date=datetime(2016, 1, 1),
+            observance=sunday_to_monday),
+    Holiday('Respect for the Aged Day', month=9, day=15,
+            end_date=datetime(2002, 12, 31), observance=sunday_to_monday),
+    Holiday('Respect for the Aged Day', month=9, day=1,
+            start_date=datetime(2003, 1, 1),
+            offset=DateOffset(weekday=MO(3))),
+    ComputedHoliday('Autumnal Equinox Day', _autumnal_equinox,
+                    observance=sunday_to_monday),
+    Holiday('Sports Day', month=10, day=10, end_date=datetime(1999, 12, 31),
+            observance=sunday_to_monday),
+    Holiday('Sports Day', month=10, day=1, start_date=datetime(2000, 1, 1),
+            offset=DateOffset(weekday=MO(2))),
+    Holiday('Culture Day', month=11, day=3, observance=sunday_to_monday),
+    Holiday('Labour Thanksgiving Day', month=11, day=23,
+            observance=sunday_to_monday),
+    Holiday('Emperors Birthday', month=12, day=23,
+            start_date=datetime(1989, 1, 1), end_date=datetime(2018, 12, 31),
+            observance=sunday_to_monday),
+    Holiday('New Years Eve', month=12, day=31),
+]
+
+_MONTREAL_RULES = [
+    Holiday('New Years Day', month=1, day=1, observance=sunday_to_monday),
+    GoodFriday,
+    Holiday('Victoria Day', month=5, day=24,
+            offset=DateOffset(weekday=MO(-1))),
+    Holiday('Canada Day', month=7, day=1, observance=sunday_to_monday),
+    USLaborDay,
+    Holiday('Thanksgiving', month=10, day=1,
+            offset=DateOffset(weekday=MO(2))),
+    Holiday('Christmas', month=12, day=25, observance=next_monday),
+    Holiday('Boxing Day', month=12, day=26,
+            observance=next_monday_or_tuesday),
+]
+
+# ICE Futures Canada (Winnipeg)
+_WINNIPEG_RULES = [
+    Holiday('New Years Day', month=1, day=1, observance=sunday_to_monday),
+    Holiday('Louis Riel Day', month=2, day=1,
+            start_date=datetime(2008, 1, 1), offset=DateOffset(weekday=MO(3))),
+    GoodFriday,
+    Holiday('Victoria Day', month=5, day=24,
+            offset=DateOffset(weekday=MO(-1))),
+    Holiday('Canada Day', month=7, day=1, observance=sunday_to_monday),
+    Holiday('Civic Holiday', month=8, day=1,
+            offset=DateOffset(weekday=MO(1))),
+    USLaborDay,
+    Holiday('Thanksgiving', month=10, day=1,
+            offset=DateOffset(weekday=MO(2))),
+    Holiday('Christmas', month=12, day=25, observance=next_monday),
+    Holiday('Boxing Day', month=12, day=26,
+            observance=next_monday_or_tuesday),
+]
+
+_CHINA_RULES = [
+    Holiday('New Years Day', month=1, day=1),
+    Holiday('Labour Day', month=5, day=1),
+] + [Holiday('National Day {}'.format(i), month=10, day=i)
+     for i in range(1, 8)]
+
+# holiday rules keyed by the exchange prefix of tickers
+EXCHANGE_HOLIDAY_RULES = {
+    'CME': _US_RULES,
+    'CBOE': _US_RULES,
+    'ICE': _US_RULES,
+    'ICE_EU': _LONDON_RULES,
+    'ICE_CA': _WINNIPEG_RULES,
+    'MGEX': _US_RULES,
+    'EUREX': _EUREX_RULES,
+    'LIFFE': _LONDON_RULES,
+    'EURONEXT': _EURONEXT_RULES,
+    'SGX': _SINGAPORE_RULES,
+    'ASX': _SYDNEY_RULES,
+    'TFX': _TOKYO_RULES,
+    'MX': _MONTREAL_RULES,
+    'CFFEX': _CHINA_RULES,
+}
+
+# exchanges of products listed on another exchange than their ticker prefix
+PRODUCT_EXCHANGES = {
+    'ICE_B': 'ICE_EU',
+    'ICE_G': 'ICE_EU',
+    'ICE_M': 'ICE_EU',
+    'ICE_C': 'ICE_EU',
+    'ICE_RS': 'ICE_CA',
+    'LIFFE_FCE': 'EURONEXT',
+    'LIFFE_FTI': 'EURONEXT',
+    'LIFFE_BXF': 'EURONEXT',
+    'LIFFE_PSI': 'EURONEXT',
+    'LIFFE_I': 'EURONEXT',
+    'LIFFE_S': 'EURONEXT',
+    'LIFFE_EBM': 'EURONEXT',
+    'LIFFE_ECO': 'EURONEXT',
+}
+
+# exchange prefix, product and optional delivery month of a ticker
+_TICKER_REGEX = re.compile(r'^([^/_]+)[/_](.+?)(?:[FGHJKMNQUVXZ]\d{4})?$')
+
+
+class ExchangeCalendar(object):
+    """ Trading days of an exchange. Calendars are compared by their
+    weekmask and holidays. Use get_exchange_calendar to share calendars. """
+
+    def __init__(self, name, holidays=None, weekmask='1111100'):
+        """
+        :param name: name of the calendar such as the exchange prefix
+        :param holidays: list-like of dates which are not trading days
+        :param weekmask: trading days of the week from Monday
+        """
+        self.name = name
+        if holidays is None:
+            holidays = []
+        self.busdaycalendar = np.busdaycalendar(
+            weekmask=weekmask,
+            holidays=np.asarray(holidays, dtype='datetime64[D]'))
+        self.holidays = self.busdaycalendar.holidays
+        self._key = (tuple(self.busdaycalendar.weekmask),
+                     self.holidays.tobytes())
+        # same across processes unlike hash()
+        self.content_hash = hashlib.sha1(
+            self.busdaycalendar.weekmask.tobytes()
+            + self.holidays.tobytes()).hexdigest()
+
+    def __repr__(self):
+        return "{}('{}')".format(self.__class__.__name__, self.name)
+
+    def __eq__(self, other):
+        return (isinstance(other, ExchangeCalendar)
+                and self._key == other._key)
+
+    def __hash__(self):
+        return hash(self._key)
+
+    @classmethod
+    def from_rules(cls, name, rules, start_date=HOLIDAY_START,
+                   end_date=HOLIDAY_END):
+        """ Create a calendar from pandas Holiday rules
+
+        :param name: name of the calendar
+        :param rules: list of pandas.tseries.holiday.Holiday
+        :param start_date: first date of holidays generated
+        :param end_date: last date of holidays generated
+        :return: ExchangeCalendar
+        """
+        holidays = [rule.dates(start_date, end_date) for rule in rules]
+        return cls(name, pd.DatetimeIndex([]).append(holidays))
+
+    def is_trading_day(self, dtime):
+        """ Return True on trading days
+
+        :param dtime: datetime or DatetimeIndex
+        :return: bool or numpy array of bool
+        """
+        if isinstance(dtime, pd.DatetimeIndex):
+            return np.is_busday(dtime.values.astype('datetime64[D]'),
+                                busdaycal=self.busdaycalendar)
+        return bool(np.is_busday(np.datetime64(dtime, 'D'),
+                                 busdaycal=self.busdaycalendar))
+
+    def trading_days(self, start_date, end_date):
+        """ Return a DatetimeIndex of trading days between start_date and
+        end_date (both including) """
+        index = pd.date_range(start_date, end_date, freq='D')
+        return index[self.is_trading_day(index)]
+
+    def shift(self, dtime, n):
+        """ Shift dtime by n trading days in the same way as n * BDay().
+        Non-trading days are rolled backward if n > 0 and forward
+        otherwise. The time of day is kept.
+
+        :param dtime: date, datetime or DatetimeIndex
+        :param n: int
+        :return: Timestamp or DatetimeIndex
+        """
+        roll = 'backward' if n > 0 else 'forward'
+        if isinstance(dtime, pd.DatetimeIndex):
+            values = dtime.values
+            days = values.astype('datetime64[D]')
+            shifted = np.busday_offset(days, n, roll=roll,
+                                       busdaycal=self.busdaycalendar)
+            return pd.DatetimeIndex(shifted + (values - days), name=dtime.name)
+
+        dtime = pd.Timestamp(dtime)
+        day = np.datetime64(dtime.date(), 'D')
+        shifted = np.busday_offset(day, n, roll=roll,
+                                   busdaycal=self.busdaycalendar)
+        return dtime + (shifted - day).item()
+
+
+@lru_cache(maxsize=None)
+def _get_exchange_calendar(exchange):
+    rules = EXCHANGE_HOLIDAY_RULES.get(exchange)
+    if rules is None:
+        return ExchangeCalendar(WEEKDAY)
+    return ExchangeCalendar.from_rules(exchange, rules)
+
+
+def get_exchange_calendar(exchange=WEEKDAY):
+    """ Return the ExchangeCalendar of an exchange. Calendars are cached.
+    The weekday calendar is returned for exchanges without holiday rules and
+    if AdagioConfig.exchange_calendars is False.
+
+    :param exchange: exchange prefix such as CME
+    :return: ExchangeCalendar
+    """
+    if not AdagioConfig.exchange_calendars:
+        exchange = WEEKDAY
+    return _get_exchange_calendar(exchange)
+
+
+def get_ticker_calendar(ticker):
+    """ Return the ExchangeCalendar of a ticker such as CME/ESH2018, CME/ES
+    or CME_ES """
+    match = _TICKER_REGEX.match(ticker)
+    if match is None:
+        return get_exchange_calendar(ticker)
+    exchange, product = match.groups()
+    product = '{}_{}'.format(exchange, product)
+    return get_exchange_calendar(PRODUCT_EXCHANGES.get(product, exchange))
+
+
+def get_calendar_key(calendars):
+    """ Return a key identifying trading calendars used for a backtest so
+    that results saved with other holidays or with exchange calendars
+    switched off are not reused.
+
+    :param calendars: list of ExchangeCalendar. None is ignored.
+    :return: str
+    """
+    hashes = sorted(set(c.content_hash for c in calendars if c is not None))
+    return to_hash({'exchange_calendars': AdagioConfig.exchange_calendars,
+                    'calendars': hashes})
@@ -0,0 +1,63 @@
+""" Contracts expected to be listed, derived from the futures calendar """
+from datetime import datetime
+
+from .const import FuturesInfo, FutureContractMonth, LISTING_HORIZON
+from .date import date_shift
+from .quandl import next_fut_ticker, futures_contract_month, year
+from .trading_calendar import get_ticker_calendar
+
+
+def last_trade_date(ticker, last_trade_date_rule):
+    """ Return the last trade date of a contract
+
+    :param ticker: full quandl ticker such as CME/ESH2018
+    :param last_trade_date_rule: shift string from the delivery month-begin
+    :return: datetime
+    """
+    month = FutureContractMonth[futures_contract_month(ticker)].value
+    return date_shift(datetime(year(ticker), month, 1), last_trade_date_rule,
+                      get_ticker_calendar(ticker))
+
+
+def list_contracts(first_ticker, roll_schedule, last_trade_date_rule,
+                   horizon, as_of=None):
+    """ Return a list of tickers which should be listed as of a date.
+    Tickers follow roll_schedule from first_ticker up to the last contract
+    whose last trade date is within the horizon after as_of. Expired
+    contracts are included.
+
+    :param first_ticker: first ticker such as CME/ESH1998
+    :param roll_schedule: list of month identifiers
+    :param last_trade_date_rule: shift string from the delivery month-begin
+    :param horizon: shift string applied to as_of such as '+2y'
+    :param as_of: datetime. Today if None
+    :return:
+    """
+    if as_of is None:
+        as_of = datetime.today()
+    listed_until = date_shift(as_of, horizon)
+
+    tickers = []
+    ticker = first_ticker
+    while last_trade_date(ticker, last_trade_date_rule) <= listed_until:
+        tickers.append(ticker)
+        ticker = next_fut_ticker(ticker, roll_schedule)
+    return tickers
+
+
+def get_contract_universe(lo_tickers, as_of=None):
+    """ Return a dict of tickers which should be listed as of a date keyed
+    by lo_ticker
+
+    :param lo_tickers: list of names of FuturesInfo
+    :param as_of: datetime. Today if None
+    :return:
+    """
+    universe = dict()
+    for lo_ticker in lo_tickers:
+        info = FuturesInfo[lo_ticker].value
+        first_ticker = lo_ticker.replace('_', '/') + info.start_from
+        universe[lo_ticker] = list_contracts(
+            first_ticker, info.roll_schedule, info.last_trade_date,
+            LISTING_HORIZON[info.asset_class], as_of=as_of)
+    return universe